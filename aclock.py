@@ -10,28 +10,40 @@
 #   0x39 - IR, Proximity & Gesture Sensor
 #   0x3A - LED Arcade Button 1x4
 
-import time
 import datetime
+import argparse
+import asyncio
 from datetime import datetime as dt
-from adafruit_ht16k33.segments import Seg7x4
-from adafruit_ht16k33.segments import Seg14x4
-from adafruit_seesaw.seesaw import Seesaw
-from adafruit_seesaw import rotaryio, digitalio
-from adafruit_seesaw.digitalio import DigitalIO
-from adafruit_seesaw.pwmout import PWMOut
-from adafruit_apds9960.apds9960 import APDS9960
-import digitalio
-import logging
-import board
-import busio
 import json
+import logging
+import signal
+from hardware import create_hardware
+from clock import SystemClock, VirtualClock
+from i2c_instrument import InstrumentedI2C
+from profiler import LoopProfiler, WakeStats
+from startup import StartupTimeline
+from log_pipeline import setup_logging, VERBOSITY
+from i2c_bus import I2CBusScheduler, PRIORITY_ALARM, PRIORITY_DISPLAY
+from device_health import DeviceHealth
+from input_backend import create_input_backend, INPUT_SOURCES
+from brightness_schedule import BrightnessSchedule, WINDOW_NAMES
+from shadow_display import ShadowDisplay
+from glyphs import GlyphTable, ALPHA_TEXTS, clock_number
+from control_api import ControlServer, ClockControl, CONTROL_SOCKET
+from animation import Animator
+from settings_store import SettingsStore
+from audio_cache import AudioCache
+from volume_ramp import VolumeRamp
+from alarm_timer import AlarmTimer, AlarmLatency
+from gesture_sampler import GestureSampler, GESTURE_OFF, GESTURE_SLOW, GESTURE_FAST
+from alarms import Alarm, AlarmSchedule, DAY_PRESETS, EVERY_DAY
 
 class AlarmClock:
     """
     AlarmClock provides an alarm clock with LED display, rotary encoder controls, and optional audio features.
 
     Features:
-        - Alarm time and status management
+        - Multiple named alarms with weekday recurrence or a one-shot date, each with its own track and volume
         - LED display brightness and override controls
         - Rotary encoder and button input handling
         - Persistent settings storage and loading
@@ -39,49 +51,114 @@ class AlarmClock:
         - Proximity and Gesture sensor for snooze and display wake
     """
     SETTINGS_FILE = "settings.json"
+    I2C_STATS_FILE = "i2c_stats.json"
     PERSISTED_SETTINGS = [
-        "alarm_hour", "alarm_minute", "period", "alarm_track", "vol_level",
-        "manual_dim_level", "auto_dim_level", "auto_dim", "display_mode", "display_override"
+        "alarm_hour", "alarm_minute", "period", "alarm_track", "vol_level", "alarm_index",
+        "manual_dim_level", "auto_dim_level", "auto_dim", "display_mode", "display_override",
+        "ramp_curve", "ramp_target", "ramp_duration"
     ]
-
-    def __init__(self):
+    # Fixed time windows used by debug_brightness()
+    DEBUG_BRIGHTNESS_WINDOWS = {
+        "manual_dim_start": "07:30", "manual_dim_end": "12:00",
+        "auto_dim_start": "12:00", "auto_dim_end": "12:59",
+        "auto_off_start": "13:00", "auto_off_end": "15:00",
+    }
+    # Names of the I2C devices on the bus scheduler, each with its own circuit breaker
+    I2C_DEVICES = ("num_display", "alpha_display", "arcade", "encoder", "apds")
+    # BCM GPIO pins wired to the INT outputs of the input boards, None to poll that board instead
+    INPUT_INT_PINS = {"encoder": None, "arcade": None, "apds": None}
+
+    def __init__(self, int_pins=None, hardware=None, clock=None, profiler=None, verbosity=None, control_socket=None):
         """
         Initialize the AlarmClock instance, set up hardware interfaces, state variables, and load persisted settings.
-        """
-        # Set up logger for error logging
+
+        Args:
+            int_pins (dict): Input source ("encoder", "arcade", "apds") to BCM pin of its INT line. Defaults to INPUT_INT_PINS.
+            hardware: Device backend from hardware.create_hardware(). Defaults to the Raspberry Pi devices.
+            clock: Time source for every time read and sleep, SystemClock or VirtualClock. Defaults to SystemClock.
+            profiler (LoopProfiler): Times the phases of main_loop_iteration(). Defaults to a disabled profiler.
+            verbosity (str): "quiet", "info" or "debug". Defaults to "info", or keeps the level of a running pipeline.
+            control_socket (str): Path of the Unix socket for the JSON control API, None for no API.
+        """
+        # Status messages and errors only pay an enqueue here: a background thread writes them to the console
+        # and as JSON lines to LOG_FILE (rotated at 1 MB), rate limited per message. SIGHUP cycles the verbosity on the next loop pass.
         self.logger = logging.getLogger("aclock")
-        self.logger.setLevel(logging.ERROR)
-        if not self.logger.handlers:
-            handler = logging.FileHandler("aclock_error.log")
-            formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+        self.log = setup_logging(self.logger)
+        if verbosity is not None:
+            self.log.set_verbosity(verbosity)
+        try:
+            signal.signal(signal.SIGHUP, self.log.request_cycle)
+        except (AttributeError, ValueError):
+            pass
+        # Duration of each init step, from process start; slow device setup runs on startup threads
+        self.startup = StartupTimeline(self.logger)
+
+        # All time reads and sleeps go through one clock, so the loop can also run on virtual time
+        self.clock = SystemClock() if clock is None else clock
+
+        # Every device is created by the hardware backend: the real Pi devices or the simulator
+        self.hardware = create_hardware() if hardware is None else hardware
+
+        # All device traffic goes through the bus scheduler, which owns the busio.I2C object.
+        # The instrumented wrapper records per-device transactions, latency, retries and errors.
+        # A device that keeps failing is skipped with exponential backoff by its circuit breaker, its errors
+        # are logged at most once a minute, and reinit_device() restores it once it answers again.
+        self.i2c_stats = InstrumentedI2C(self.hardware.i2c(), time_source=self.clock.monotonic)
+        self.health = DeviceHealth(self.logger, bus_recovery=self.recover_bus, time_source=self.clock.monotonic)
+        for name in self.I2C_DEVICES:
+            self.health.register(name, lambda name=name: self.reinit_device(name))
+        self.bus = I2CBusScheduler(self.i2c_stats, self.logger, tick_budget=0.015,
+                                   time_source=self.clock.monotonic, health=self.health)
+        self.i2c = self.bus.i2c
+        self.startup.mark("i2c")
+
+        # The clock face comes first: the numeric display shows the time before any other device is set up
+        self.settings_store = SettingsStore(self.SETTINGS_FILE, self.logger, time_source=self.clock.monotonic)
+        self.num_display = ShadowDisplay(self.hardware.seg7x4(self.i2c, address=0x72, auto_write=False))
+        # Display RAM images of the clock face, copied into the display buffer instead of formatted and printed
+        self.num_glyphs = GlyphTable(self.num_display.display)
+        self.show_first_frame()
+        self.startup.mark("num_display")
+        self.startup.milestone("first_frame")
+
+        self.bus_stats_interval = 60  # seconds between bus statistics reports and I2C_STATS_FILE writes
+        self.last_bus_stats = self.clock.monotonic()
+        # SIGUSR2 asks for an I2C stats dump on the next loop pass
+        self.i2c_dump_requested = False
+        try:
+            signal.signal(signal.SIGUSR2, self.request_i2c_dump)
+        except (AttributeError, ValueError):
+            # No SIGUSR2 on this platform, or not created on the main thread
+            pass
 
-        self.i2c = busio.I2C(board.SCL, board.SDA)
+        # Per-phase loop timing; SIGUSR1 prints a report when profiling is enabled
+        self.profiler = LoopProfiler() if profiler is None else profiler
+        if self.profiler.enabled:
+            try:
+                signal.signal(signal.SIGUSR1, self.profiler.request_report)
+            except (AttributeError, ValueError):
+                pass
+
+        # Input backend: interrupt driven for boards with an INT pin configured, polled otherwise
+        self.input = create_input_backend(self.INPUT_INT_PINS if int_pins is None else int_pins, self.logger,
+                                          None if self.clock.realtime else self.clock.sleep)
+        # run() sleeps until the next instant anything can change (see next_wake()), or 20 ms per pass when False
+        self.wake_on_events = True
+        self.input_interval = 0.02  # seconds between polls of boards without an INT pin while a menu is open or the alarm rings
+        self.idle_input_interval = 0.1  # seconds between those polls otherwise
+        self.max_sleep = 60.0  # longest sleep when nothing is scheduled
+        self.wake_stats = WakeStats(self.clock.monotonic)
 
         # Initialize I2C for Arcade Button 1x4 (address 0x3A)
         self.last_state = [True, True]  # True means not pressed (pull-up)
         self.last_press = [0, 0]
         self.debounce_time = 0.21  # 210 ms debounce
-        ARCADE_BUTTON_ADDR = 0x3A
-        # Button pins: 18 (yellow, display settings), 19 (white, alarm settings)
-        # LED Pins: 12 (yellow), 13 (white)
-        BUTTON_PINS = (18, 19)
-        LED_PINS = (12, 13)  
+        self.init_arcade()
+        self.startup.mark("arcade")
+        self.led_pulse_time = 0.05  # seconds for each half of the button press pulse
 
-        # Set up I2C and Seesaw device
-        self.arcade = Seesaw(self.i2c, addr=ARCADE_BUTTON_ADDR)
-
-        # Set up digitalio for buttons
-        self.arcade_buttons = []
-        for pin in BUTTON_PINS:
-            button = DigitalIO(self.arcade, pin)
-            button.direction = digitalio.Direction.INPUT
-            button.pull = digitalio.Pull.UP
-            self.arcade_buttons.append(button)
-
-        # Set up PWMOut for LEDs
-        self.arcade_leds = [PWMOut(self.arcade, pin) for pin in LED_PINS]
+        # LED pulses and display fades are advanced one frame per loop tick
+        self.animator = Animator(time_source=self.clock.monotonic)
 
         # Track last button state for edge detection
         self.last_arcade_button_states = [btn.value for btn in self.arcade_buttons]
@@ -89,30 +166,36 @@ class AlarmClock:
         # Define increment for alarm minute adjustment
         self.minute_incr = 1
 
-        # Create display instances
-        self.alpha_display = Seg14x4(self.i2c)
-        self.num_display = Seg7x4(self.i2c, address=0x72)
+        # Create display instances, written only by explicit show() calls through the bus scheduler.
+        # The shadow framebuffer sends only the display RAM bytes that changed since the last show().
+        self.alpha_display = ShadowDisplay(self.hardware.seg14x4(self.i2c, auto_write=False))
+        self.alpha_glyphs = GlyphTable(self.alpha_display.display)
+        self.startup.mark("alpha_display")
+        self.startup.background("glyphs", self.preload_glyphs, threaded=self.clock.realtime)
 
         # Initialize Stemma QT rotary encoder
-        self.encoder_seesaw = Seesaw(self.i2c, addr=0x36)
-        self.encoder = rotaryio.IncrementalEncoder(self.encoder_seesaw)
-        self.encoder_button = DigitalIO(self.encoder_seesaw, 24)
-        self.last_encoder_position = self.encoder.position
-        self.last_encoder_button = self.encoder_button.value
+        self.init_encoder()
         self.encoder_button_down = False
         self.encoder_button_up = False
+        self.startup.mark("encoder")
 
         # Initialize APDS9960 gesture sensor
-        self.apds = APDS9960(self.i2c)
-        self.apds.enable_proximity = True
-        self.apds.enable_gesture = True
+        # The sampler thread owns the sensor; it enables it once the main loop asks for gestures.
+        # The sensor is set up by init_gesture_sensor() on a startup thread, and the sampler waits for it.
+        self.apds = None
+        self.gesture_sensor_enabled = False
+        self.gesture_sampler = GestureSampler(None, self.bus, self.input, self.logger,
+                                              time_source=self.clock.monotonic)
+
+        # Arm device interrupts of the input boards that exist; the APDS9960 is armed once it is set up
+        self.input.arm(self, ("encoder", "arcade"))
+        # On virtual time the sampler runs inline from handle_gesture() and startup steps run inline
+        if self.clock.realtime:
+            self.gesture_sampler.start()
+        self.startup.background("gesture", self.init_gesture_sensor, threaded=self.clock.realtime)
 
         # Audio feature flag
         self.use_audio = True  # Set to True to enable audio features
-        if self.use_audio:
-            import pygame
-            pygame.mixer.init()
-            self.mixer = pygame.mixer
 
         # State variables
         self.alarm_settings_state = 1
@@ -125,17 +208,56 @@ class AlarmClock:
         self.alarm_set = 1
         self.display_set = 1
         self.alarm_stat = "OFF"
+        # All alarms, indexed by next fire instant. The alarm_hour ... vol_level fields above and below
+        # mirror the alarm selected in the alarm menu (alarm_index; len(alarms) is the NEW entry)
+        self.alarms = AlarmSchedule()
+        self.alarm_index = 0
+        # Alarm that is ringing or snoozed
+        self.ringing_alarm = None
         self.alarm_ringing = 0
         self.sleep_state = "OFF"
+        # Alarm ring state machine, advanced by check_alarm()
+        self.ring_state = "IDLE"
+        self.snooze_cooldown = 10  # seconds to wait before alarm can re-trigger after snooze
+        self.snooze_cooldown_deadline = 0.0
         self.period = "AM"
         self.dim_level = 6
         self.auto_dim_level = 0
         self.manual_dim_level = 6
         self.alarm_track = 1
         self.vol_level = 65
+        # Alarm volume ramp from vol_level to ramp_target over ramp_duration seconds
+        self.ramp_curve = "linear"  # "linear", "exponential" or "stepped"
+        self.ramp_target = 100
+        self.ramp_duration = 300
+        self.ramp_steps = 10
         self.alarm_tracks = {1: '01.mp3', 2: '02.mp3', 3: '03.mp3', 4: '04.mp3', 5: '05.mp3', 6: '06.mp3'}
+        # Decoded tracks are kept in memory so the alarm loops without reloading from the SD card
+        self.audio_cache_budget = 32 * 1024 * 1024  # bytes of decoded PCM
+        self.audio_preload = True  # decode all tracks on a startup thread instead of on first use
+        if self.use_audio:
+            # pygame is imported and the mixer initialized on first use: by the preload, or by the first track played
+            self.audio = AudioCache(self.hardware.mixer, self.alarm_tracks, self.audio_cache_budget, self.logger)
+            if self.audio_preload:
+                self.startup.background("audio", self.audio.preload, threaded=self.clock.realtime)
+        # The next alarm or snooze is armed as a monotonic deadline on the alarm timer thread, which starts the
+        # audio as soon as it is due (see alarm_timer.py). On virtual time the main loop checks the deadline instead.
+        self.alarm_timer = AlarmTimer(self.alarm_deadline, time_source=self.clock.monotonic, logger=self.logger)
+        self.alarm_timer_state = None
+        # Scheduled instant until the alarm audio started, per firing
+        self.alarm_latency = AlarmLatency()
+        self.ring_fire = None
+        self.ring_audio_pending = False
+        if self.clock.realtime:
+            self.alarm_timer.start()
         self.auto_dim = "ON"
-        self.loop_count = 0
+        # A wave while the display is off shows the time until display_wake_until (monotonic), then fades it out
+        self.display_wake_duration = 4.0
+        self.display_wake_fade = 1.0
+        self.display_wake_until = None
+        self.display_wake_fading = False
+        self.display_wake_mode = None
+        self.display_wakes = 0
         self.debug = "NO"
 
         # Time range configuration for brightness modes
@@ -145,23 +267,32 @@ class AlarmClock:
         self.auto_dim_end = "23:59"
         self.auto_off_start = "00:00"
         self.auto_off_end = "07:00"
+        # Compiled minute-of-day tables for brightness() and debug_brightness(); per-weekday
+        # windows can be set with brightness_schedule.set_weekday_windows()
+        self.brightness_schedule = BrightnessSchedule({name: getattr(self, name) for name in WINDOW_NAMES})
+        self.debug_brightness_schedule = BrightnessSchedule(self.DEBUG_BRIGHTNESS_WINDOWS)
 
         # Rotary encoder action dictionaries
+        # Alarm menu steps: 1 alarm select, 2 hour, 3 minute, 4 period, 5 on/off, 6 track, 7 volume, 8 days
         self.clockwise_alarm_actions = {
-            1: self.inc_alarm_hour,
-            2: self.inc_alarm_minute,
-            3: self.toggle_period,
-            4: self.toggle_alarm_stat,
-            5: self.inc_alarm_track,
-            6: self.inc_vol_level
+            1: self.inc_selected_alarm,
+            2: self.inc_alarm_hour,
+            3: self.inc_alarm_minute,
+            4: self.toggle_period,
+            5: self.toggle_alarm_stat,
+            6: self.inc_alarm_track,
+            7: self.inc_vol_level,
+            8: self.inc_alarm_days
         }
         self.anticlockwise_alarm_actions = {
-            1: self.dec_alarm_hour,
-            2: self.dec_alarm_minute,
-            3: self.dec_period,
-            4: self.dec_alarm_stat,
-            5: self.dec_alarm_track,
-            6: self.dec_vol_level
+            1: self.dec_selected_alarm,
+            2: self.dec_alarm_hour,
+            3: self.dec_alarm_minute,
+            4: self.dec_period,
+            5: self.dec_alarm_stat,
+            6: self.dec_alarm_track,
+            7: self.dec_vol_level,
+            8: self.dec_alarm_days
         }
         self.clockwise_display_actions = {
             1: self.inc_manual_dim_level,
@@ -179,147 +310,436 @@ class AlarmClock:
         self.last_alpha_brightness = None
         self.last_alpha_type = None
 
-        # Load settings at startup
+        # Load settings at startup. Settings are written behind: debounced, atomic and skipped when unchanged
         self.load_settings()
+        self.startup.mark("settings")
+
+        # JSON control API on a Unix socket, polled once per loop pass (see control_api.py)
+        self.control = None
+        self.control_commands = ClockControl(self)
+        if control_socket:
+            try:
+                self.control = ControlServer(self.control_commands, control_socket, self.logger,
+                                             time_source=self.clock.monotonic)
+            except OSError as e:
+                self.logger.error("Control API socket %s error: %s", control_socket, str(e))
+        self.startup.mark("control")
+        self.logger.info("%s", self.startup.report(), extra={"key": "startup", "startup": self.startup.summary()})
+
+    def show_first_frame(self):
+        """
+        Show the current time on the numeric display right away, at the saved manual brightness.
+        """
+        now = self.get_time()
+        # A corrupt settings file must not keep the time off the display; load_settings() reports it again
+        try:
+            settings = self.settings_store.load()
+        except Exception as e:
+            self.logger.error("Failed to load settings: %s", str(e))
+            settings = None
+        if not isinstance(settings, dict):
+            settings = {}
+        level = settings.get("manual_dim_level", 6)
+        if not isinstance(level, int) or not 0 <= level <= 15:
+            level = 6
+        self.num_display.set_frame(self.num_glyphs.clock(now))
+        self.num_display.colon = now.second % 2
+        self.num_display.brightness = level / 15.0
+        self.show_display("num_display")
+        self.bus.begin_tick()
+        self.bus.flush()
+
+    def preload_glyphs(self):
+        """
+        Render the display RAM images of all clock times and the fixed alphanumeric texts.
+        """
+        self.num_glyphs.preload_clock()
+        self.alpha_glyphs.preload(ALPHA_TEXTS)
+
+    def init_arcade(self):
+        """
+        Set up the Arcade Button 1x4 board: pulled up button inputs and PWM LEDs.
+        """
+        ARCADE_BUTTON_ADDR = 0x3A
+        # Button pins: 18 (yellow, display settings), 19 (white, alarm settings)
+        # LED Pins: 12 (yellow), 13 (white)
+        BUTTON_PINS = (18, 19)
+        LED_PINS = (12, 13)
+
+        # Set up I2C and Seesaw device
+        self.arcade = self.hardware.seesaw(self.i2c, ARCADE_BUTTON_ADDR)
+
+        # Set up pulled up inputs for buttons
+        self.arcade_buttons = [self.hardware.button(self.arcade, pin) for pin in BUTTON_PINS]
+
+        # Set up PWMOut for LEDs
+        self.arcade_leds = [self.hardware.pwm_out(self.arcade, pin) for pin in LED_PINS]
+        self.arcade_led_duty = [None, None]  # Last duty cycle written to each LED
+
+    def init_encoder(self):
+        """
+        Set up the Stemma QT rotary encoder and its push button, taking the current position as the reference.
+        """
+        self.encoder_seesaw = self.hardware.seesaw(self.i2c, 0x36)
+        self.encoder = self.hardware.rotary_encoder(self.encoder_seesaw)
+        self.encoder_button = self.hardware.digital_io(self.encoder_seesaw, 24)
+        self.last_encoder_position = self.encoder.position
+        self.last_encoder_button = self.encoder_button.value
+
+    def init_gesture_sensor(self):
+        """
+        Set up the APDS9960, arm its interrupt and hand it to the gesture sampler. Runs on a startup thread.
+        """
+        apds = self.hardware.gesture_sensor(self.i2c)
+        self.apds = apds
+        self.input.arm(self, ("apds",))
+        self.gesture_sampler.attach(apds)
+
+    def reinit_device(self, name):
+        """
+        Restore a device that answers again after its circuit breaker opened. It may have been power cycled,
+        so its configuration is sent again and the cached display state is dropped to redraw everything.
+
+        Args:
+            name (str): One of I2C_DEVICES.
+        """
+        if name == "num_display":
+            self.num_display.reinit()
+            self.last_num_message = None
+            self.last_num_brightness = None
+        elif name == "alpha_display":
+            self.alpha_display.reinit()
+            self.last_alpha_message = None
+            self.last_alpha_brightness = None
+            self.last_alpha_type = None
+        elif name == "arcade":
+            self.init_arcade()
+            self.input.arm(self, ("arcade",))
+        elif name == "encoder":
+            self.init_encoder()
+            self.input.arm(self, ("encoder",))
+        elif name == "apds" and self.apds is not None:
+            self.init_gesture_sensor()
+
+    def recover_bus(self):
+        """
+        Reset the I2C bus when several devices fail at once. Called by the device health layer.
+        """
+        self.hardware.recover_bus(self.i2c_stats.i2c)
 
     def get_time(self):
         """
-        Return the current datetime.
+        Return the current datetime from the clock.
 
         Returns:
             datetime: The current date and time.
         """
-        return dt.now()
+        return self.clock.now()
+
+    def show_display(self, name, priority=PRIORITY_DISPLAY):
+        """
+        Queue a refresh of a display on the bus scheduler. Repeated refreshes in one tick are sent once.
+
+        Args:
+            name (str): Attribute name of the display ("alpha_display" or "num_display").
+            priority (int): Bus priority for the refresh.
+        """
+        self.bus.submit(name, getattr(self, name).show, priority, label=f"{name}.show()")
 
     def set_gesture_sensor_state(self, enable):
         """
-        Enable or disable the APDS9960 proximity and gesture sensor.
+        Enable or disable gesture sampling. The sampler thread samples fast while the alarm rings or is
+        snoozed and slowly otherwise, and switches the sensor on or off itself.
         """
-        try:
-            self.apds.enable_proximity = enable
-            self.apds.enable_gesture = enable
-        except Exception as e:
-            self.logger.error("APDS9960 sensor state error: %s", str(e))
+        self.gesture_sensor_enabled = enable
+        if not enable:
+            mode = GESTURE_OFF
+        elif self.alarm_ringing == 1 or self.sleep_state == "ON":
+            mode = GESTURE_FAST
+        else:
+            mode = GESTURE_SLOW
+        self.gesture_sampler.set_mode(mode)
 
     def check_alarm(self, now):
         """
-        Check if the alarm should ring based on the current time and alarm settings.
-        Handles alarm ringing, snooze logic, and audio playback if enabled.
+        Check if an alarm or a snooze is due, and advance the ring state machine by one tick. Never
+        blocks: ringing, volume ramp, snooze and cooldown are driven by deadlines checked on each call.
+        Only the head of the alarm index is compared against now, however many alarms there are.
+
+        States:
+            IDLE: waiting for the next alarm or snooze.
+            RINGING: showing RING and playing audio; a ring step runs every snooze window.
+            COOLDOWN: snoozed by gesture; the alarm cannot re-trigger until the cooldown deadline.
 
         Args:
-            now (datetime): The current datetime to check against the alarm time.
-        """
-        loop_count = 0
-        vol_increase = 0
-        time_decrease = 0
-        # Print the time only once per second
-        if not hasattr(self, '_last_printed_second') or self._last_printed_second != now.second:
-            print(f"time: {now.strftime('%H:%M:%S')} {self.period} alarm time: {self.alarm_time.strftime('%H:%M:%S')}")
+            now (datetime): The current datetime to check against the next alarm.
+        """
+        # Log the time only once per second, and only at debug verbosity
+        if self.logger.isEnabledFor(logging.DEBUG) and getattr(self, '_last_printed_second', None) != now.second:
+            next_fire = self.alarms.next_fire()
+            next_text = next_fire.strftime('%a %H:%M:%S') if next_fire else "none"
+            self.logger.debug("time: %s next alarm: %s", now.strftime('%H:%M:%S'), next_text)
             self._last_printed_second = now.second
-        if now.strftime("%p") == self.period and now.time() >= self.alarm_time.time() and self.alarm_stat == "ON":
-            self.alarm_ringing = 1
-            self.sleep_state = "OFF"
-            snooze_triggered = False
-            snooze_cooldown = 10  # seconds to wait before alarm can re-trigger after snooze
-            snooze_time = None
-            # Flicker reduction: cache last num display value and colon
-            last_num_message = None
-            last_colon = None
-            # Enable gesture sensor for alarm
-            self.set_gesture_sensor_state(True)
-            initial_volume = self.vol_level  # Use the alarm setting's volume
-            while self.alarm_ringing == 1 and self.alarm_stat == "ON":
-                # Poll arcade buttons during alarm ring
-                self.poll_arcade_buttons()
-                loop_count += 1
-                self.alpha_display.fill(0)
-                self.alpha_display.print("RING")
-                self.alpha_display.show()
-                now = self.get_time()
-                num_message = int(now.strftime("%I"))*100+int(now.strftime("%M"))
-                colon_state = now.second % 2
-                # Only update numeric display if value or colon changed
-                if (num_message != last_num_message) or (colon_state != last_colon):
-                    self.num_display.fill(0)
-                    self.num_display.print(num_message)
-                    self.num_display.colon = colon_state
-                    try:
-                        self.num_display.show()
-                    except Exception as e:
-                        self.logger.error("num_display.show() error: %s", str(e))
-                    last_num_message = num_message
-                    last_colon = colon_state
-                if self.use_audio:
-                    # Volume starts at vol_level% and increases by 2% each step: vol_level%, vol_level+2%, ...
-                    if loop_count == 1:
-                        vol_increase = 0  # Start at vol_level%
-                    elif loop_count % 10 == 0:
-                        vol_increase += 2  # Increase by 2% every 10 loops
-                    # Set volume (0.0 to 1.0)
-                    volume = min((initial_volume + vol_increase) / 100.0, 1.0)
-                    self.mixer.music.set_volume(volume)
-                    if not self.mixer.music.get_busy():
-                        self.mixer.music.load(self.alarm_tracks[self.alarm_track])
-                        self.mixer.music.play()
-                print(f"alarm ring, now: {now.time()} alarm: {self.alarm_time.time()} Count: {loop_count} Vol: {initial_volume+vol_increase} Ring Time: {3-time_decrease} alarm_ringing: {self.alarm_ringing} sleep_state: {self.sleep_state}")
-                # Check gesture sensor for snooze every 0.1s for up to 2 seconds (or less as time_decrease increases)
-                snooze_window = max(0.5, 2-time_decrease)  # never less than 0.5s
-                start_time = time.time()
-                while time.time() - start_time < snooze_window:
-                    # Poll arcade buttons during snooze window
-                    self.poll_arcade_buttons()
-                    try:
-                        gesture = self.apds.gesture()
-                    except Exception as e:
-                        self.logger.error("APDS9960 gesture() error: %s", str(e))
-                        gesture = None
-                    # print(f"APDS9960 gesture: {gesture}")
-                    # 0x03 = left (right-to-left), 0x04 = right (left-to-right)
-                    if gesture == 0x03:
-                        if self.alarm_ringing == 1:
-                            print("Gesture detected: turning off alarm (right-to-left)!");
-                            self.alarm_ringing = 0
-                            self.alarm_stat = "OFF"
-                            self.sleep_state = "OFF"
-                            self.alpha_display.fill(0)
-                            try:
-                                self.alpha_display.show()
-                            except Exception as e:
-                                self.logger.error("alpha_display.show() error: %s", str(e))
-                            break
-                    elif gesture == 0x04:
-                        if self.alarm_ringing == 1:
-                            print("Snooze triggered by hand wave (left-to-right)!")
-                            self.alarm_ringing = 0
-                            self.alarm_time = self.alarm_time + datetime.timedelta(minutes=5)  # 5 min snooze
-                            self.sleep_state = "ON"
-                            snooze_triggered = True
-                            snooze_time = time.time()
-                            break
-                    time.sleep(0.01)
-                if snooze_triggered:
-                    # Wait for cooldown before allowing alarm to re-trigger
-                    print(f"Snooze cooldown for {snooze_cooldown} seconds.")
-                    while time.time() - snooze_time < snooze_cooldown:
-                        # --- POLL ARCADE BUTTONS DURING SNOOZE COOLDOWN ---
-                        self.poll_arcade_buttons()
-                        time.sleep(0.01)
-                    break
-            # Disable gesture sensor after alarm
-            self.set_gesture_sensor_state(False)
-        elif now >= self.alarm_time and self.alarm_stat == "OFF":
-            print("alarm mode off")
+        if self.ring_state == "COOLDOWN":
+            if self.clock.monotonic() < self.snooze_cooldown_deadline:
+                return
+            self.ring_state = "IDLE"
+        if self.ring_state == "IDLE":
+            fire = self.alarms.next_fire()
+            alarm = self.alarms.due(now)
+            if alarm is not None:
+                self.start_ring(alarm, fire)
+        if self.ring_state == "RINGING":
+            self.ring_tick(now)
         return
 
+    def start_ring(self, alarm, fire=None):
+        """
+        Enter the RINGING state. The first ring step runs on the same tick.
+
+        Args:
+            alarm (Alarm): The alarm that fired; its track and volume are used.
+            fire (datetime): The instant it was scheduled for, used to measure the audio latency.
+        """
+        self.logger.info("alarm %s firing", alarm.name, extra={"key": "alarm.fire", "alarm": alarm.to_dict()})
+        self.ringing_alarm = alarm
+        self.alarm_ringing = 1
+        self.sleep_state = "OFF"
+        # Enable gesture sensor for alarm
+        self.set_gesture_sensor_state(True)
+        self.ring_state = "RINGING"
+        self.ring_count = 0
+        self.ring_started = self.clock.monotonic()
+        self.ring_next_step = self.ring_started
+        # Volume ramp starts at the alarm setting's volume and is driven by elapsed time
+        self.ring_ramp = VolumeRamp(alarm.volume, max(self.ramp_target, alarm.volume), self.ramp_duration, self.ramp_curve, self.ramp_steps)
+        self.ring_volume = None
+        # The alarm timer thread may have started the audio already; otherwise the first ring step starts it
+        self.ring_fire = fire
+        self.ring_audio_pending = self.use_audio and fire is not None and self.alarm_timer.claim(fire)
+        # Flicker reduction: cache last num display value and colon
+        self.ring_last_num_message = None
+        self.ring_last_colon = None
+        # Longest gap between ring ticks, i.e. the worst case input latency while ringing
+        self.ring_last_tick = None
+        self.ring_tick_gap_max = 0.0
+        self.ring_ticks = 0
+
+    def ring_tick(self, now):
+        """
+        Advance the RINGING state by one tick: refresh RING and the time, and run a ring step
+        (volume ramp, audio restart, status print) when its deadline has passed.
+
+        Args:
+            now (datetime): The current datetime.
+        """
+        mono = self.clock.monotonic()
+        if self.ring_last_tick is not None:
+            self.ring_tick_gap_max = max(self.ring_tick_gap_max, mono - self.ring_last_tick)
+        self.ring_last_tick = mono
+        self.ring_ticks += 1
+        if self.alarm_ringing == 0 or not self.ringing_alarm.enabled:
+            # Stopped by a button, the encoder or a gesture, or the alarm was switched off
+            self.stop_ring()
+            return
+        self.alpha_display.set_frame(self.alpha_glyphs.frame("RING"))
+        self.show_display("alpha_display", PRIORITY_ALARM)
+        num_message = clock_number(now)
+        colon_state = now.second % 2
+        # Only update numeric display if value or colon changed
+        if (num_message != self.ring_last_num_message) or (colon_state != self.ring_last_colon):
+            self.num_display.set_frame(self.num_glyphs.clock(now))
+            self.num_display.colon = colon_state
+            self.show_display("num_display", PRIORITY_ALARM)
+            self.ring_last_num_message = num_message
+            self.ring_last_colon = colon_state
+        if self.use_audio:
+            # Volume follows the ramp every tick; the mixer is only touched when its quantized level changes
+            volume = self.ring_ramp.mixer_level_at(mono - self.ring_started)
+            if volume != self.ring_volume:
+                self.audio.set_volume(volume)
+                self.ring_volume = volume
+        if mono < self.ring_next_step:
+            return
+        self.ring_count += 1
+        if self.use_audio and not self.audio.busy():
+            # Loops from memory until the ring stops
+            self.audio.play(self.ringing_alarm.track, self.ring_volume)
+            if self.ring_audio_pending:
+                self.ring_audio_pending = False
+                self.record_alarm_latency(self.ring_fire, "loop")
+        self.logger.debug("alarm ring, now: %s alarm: %s Count: %d Vol: %.0f Ring Time: 3 alarm_ringing: %d sleep_state: %s",
+                          now.time(), self.ringing_alarm.name, self.ring_count, self.ring_ramp.level_at(mono - self.ring_started),
+                          self.alarm_ringing, self.sleep_state)
+        # Gestures are queued by the sampler thread and handled on every tick; the next ring step runs after the 2 s snooze window
+        self.ring_next_step = mono + 2
+
+    def alarm_deadline(self, fire, alarm):
+        """
+        Alarm timer callback, run on the timer thread when an alarm or snooze is due: start its audio right away
+        and wake the main loop, which enters RINGING and shows RING on the pass it wakes for.
+
+        Args:
+            fire (datetime): The instant the alarm was scheduled for.
+            alarm (Alarm): The alarm that is due.
+        """
+        if self.use_audio and self.ring_state == "IDLE" and alarm.enabled and self.alarm_timer.claim(fire):
+            ramp = VolumeRamp(alarm.volume, max(self.ramp_target, alarm.volume), self.ramp_duration, self.ramp_curve, self.ramp_steps)
+            self.audio.play(alarm.track, ramp.mixer_level_at(0))
+            self.record_alarm_latency(fire, "timer")
+        self.input.notify()
+
+    def arm_alarm_timer(self):
+        """
+        Arm the alarm timer with the next alarm or snooze when the schedule changed, and once a minute so
+        wall clock adjustments reach the monotonic deadline.
+        """
+        now = self.get_time()
+        state = (self.alarms.revision, now.minute)
+        if state == self.alarm_timer_state:
+            return
+        self.alarm_timer_state = state
+        due = self.alarms.next_due()
+        if due is None:
+            self.alarm_timer.disarm()
+            return
+        fire, alarm = due
+        self.alarm_timer.arm(self.clock.monotonic() + (fire - now).total_seconds(), fire, alarm)
+
+    def record_alarm_latency(self, fire, source):
+        """
+        Record and log how long after its scheduled instant an alarm became audible.
+
+        Args:
+            fire (datetime): The instant the alarm was scheduled for.
+            source (str): "timer" when the alarm timer thread started the audio, "loop" for the main loop.
+        """
+        latency = max((self.get_time() - fire).total_seconds(), 0.0)
+        self.alarm_latency.record(latency, source)
+        summary = self.alarm_latency.summary()
+        self.logger.info("alarm audio started %.1f ms after %s by the %s, p99 %.1f ms over %d firings",
+                         latency * 1000, fire.strftime('%H:%M:%S'), source, summary["p99_ms"], summary["firings"],
+                         extra={"key": "alarm.latency", "latency_ms": round(latency * 1000, 1), "source": source,
+                                "p99_ms": summary["p99_ms"], "over_target": latency > self.alarm_latency.target})
+
+    def stop_ring(self, cooldown=False):
+        """
+        Leave the RINGING state.
+
+        Args:
+            cooldown (bool): True when snoozed by gesture, so the alarm cannot re-trigger for snooze_cooldown seconds.
+        """
+        self.logger.info("alarm ring stopped after %d ticks, max tick gap: %.1f ms", self.ring_ticks, self.ring_tick_gap_max * 1000,
+                         extra={"key": "alarm.stop", "ticks": self.ring_ticks, "tick_gap_max_ms": round(self.ring_tick_gap_max * 1000, 1)})
+        if cooldown:
+            self.logger.info("Snooze cooldown for %s seconds.", self.snooze_cooldown)
+            self.snooze_cooldown_deadline = self.clock.monotonic() + self.snooze_cooldown
+            self.ring_state = "COOLDOWN"
+        else:
+            self.ring_state = "IDLE"
+        if self.use_audio:
+            # The track loops until stopped
+            self.audio.stop()
+        # Disable gesture sensor after alarm
+        self.set_gesture_sensor_state(False)
+
+    def handle_ring_gesture(self, gesture):
+        """
+        Handle a gesture while the alarm rings: right-to-left turns the alarm off, left-to-right snoozes it for 5 minutes.
+
+        Args:
+            gesture (int): Gesture code from the APDS9960.
+        """
+        # 0x03 = left (right-to-left), 0x04 = right (left-to-right)
+        if gesture == 0x03:
+            self.logger.info("Gesture detected: turning off alarm (right-to-left)!")
+            self.dismiss_alarm()
+            self.alpha_display.fill(0)
+            self.show_display("alpha_display")
+            self.stop_ring()
+        elif gesture == 0x04:
+            self.logger.info("Snooze triggered by hand wave (left-to-right)!")
+            self.snooze_alarm(5)
+            self.stop_ring(cooldown=True)
+
+    def snooze_alarm(self, minutes):
+        """
+        Stop the ringing alarm and schedule it to ring again after the given number of minutes.
+        """
+        self.alarm_ringing = 0
+        self.sleep_state = "ON"
+        self.alarms.snooze(self.ringing_alarm, self.get_time() + datetime.timedelta(minutes=minutes))
+
+    def dismiss_alarm(self):
+        """
+        Stop the ringing alarm and cancel its snooze. A recurring alarm stays on for its next occurrence.
+        """
+        self.alarm_ringing = 0
+        self.sleep_state = "OFF"
+        self.alarms.cancel_snooze()
+
+    def selected_alarm(self):
+        """
+        Return the alarm selected in the alarm menu, or None while NEW is selected.
+        """
+        if self.alarm_index < len(self.alarms):
+            return self.alarms.alarms[self.alarm_index]
+        return None
+
+    def select_alarm(self, index):
+        """
+        Select an alarm for the menu and copy its fields into alarm_hour ... vol_level.
+
+        Args:
+            index (int): Index into the alarm list; len(alarms) selects NEW.
+        """
+        self.alarm_index = index
+        alarm = self.selected_alarm()
+        if alarm is None:
+            return
+        self.alarm_time = dt.strptime(f"{alarm.hour:02d}:{alarm.minute:02d}", "%H:%M")
+        self.alarm_minute = alarm.minute
+        self.alarm_hour = alarm.hour % 12 or 12
+        self.period = "AM" if alarm.hour < 12 else "PM"
+        self.alarm_stat = "ON" if alarm.enabled else "OFF"
+        self.alarm_track = alarm.track
+        self.vol_level = alarm.volume
+
+    def apply_alarm_fields(self):
+        """
+        Copy alarm_time, alarm_stat, alarm_track and vol_level into the selected alarm and re-index it.
+        """
+        alarm = self.selected_alarm()
+        if alarm is None:
+            return
+        alarm.hour = self.alarm_time.hour
+        alarm.minute = self.alarm_time.minute
+        alarm.enabled = self.alarm_stat == "ON"
+        alarm.track = self.alarm_track
+        alarm.volume = self.vol_level
+        self.alarms.update(alarm, self.get_time())
+
+    def alarm_status(self):
+        """
+        Return "ON" if any alarm or a snooze is scheduled, else "OFF", for the brightness schedule.
+        """
+        return "ON" if self.alarms.armed() else "OFF"
+
+    def next_alarm_minute(self):
+        """
+        Return the minute of day of the next alarm or snooze, or of the selected alarm if none is scheduled.
+        """
+        fire = self.alarms.next_fire()
+        if fire is None:
+            return self.alarm_time.hour * 60 + self.alarm_time.minute
+        return fire.hour * 60 + fire.minute
+
     def clear_alpha_display(self):
         """
         Clear the alphanumeric display and handle exceptions.
         """
         self.alpha_display.fill(0)
-        try:
-            self.alpha_display.show()
-        except Exception as e:
-            self.logger.error("alpha_display.show() error: %s", str(e))
+        self.show_display("alpha_display")
 
     def alarm_settings_callback(self, channel):
         """
@@ -333,13 +753,11 @@ class AlarmClock:
         # Only act on BUTTONUP (button release)
         if channel != 1:
             debug_lines.append("alarm_settings_callback: Ignored, not BUTTONUP")
-            print("\n".join(debug_lines), end="\n")
+            self.logger.debug("%s", "\n".join(debug_lines), extra={"key": "settings_callback"})
             return
         if self.alarm_ringing == 1:
             debug_lines.append("alarm_settings_callback: Stopping alarm ring")
-            self.alarm_ringing = 0
-            self.alarm_stat = "OFF"
-            self.sleep_state = "OFF"
+            self.dismiss_alarm()
         elif self.alarm_settings_state == 1:
             debug_lines.append("alarm_settings_callback: Entering alarm settings mode")
             self.alarm_settings_state = 2
@@ -347,11 +765,10 @@ class AlarmClock:
         elif self.alarm_settings_state == 2:
             debug_lines.append("alarm_settings_callback: Exiting alarm settings mode")
             self.alarm_settings_state = 1
+            if self.selected_alarm() is None:
+                self.select_alarm(0)
             self.alpha_display.fill(0)
-            try:
-                self.alpha_display.show()
-            except Exception as e:
-                self.logger.error("alpha_display.show() error: %s", str(e))
+            self.show_display("alpha_display")
         # Reset display cache to force refresh
         self.last_num_message = None
         self.last_num_brightness = None
@@ -359,7 +776,7 @@ class AlarmClock:
         self.last_alpha_brightness = None
         self.last_alpha_type = None
         debug_lines.append(f"alarm_settings_callback exit: alarm_state={self.alarm_settings_state}, display_state={self.display_settings_state}, alarm_set={self.alarm_set}")
-        print("\n".join(debug_lines), end="\n")
+        self.logger.debug("%s", "\n".join(debug_lines), extra={"key": "settings_callback"})
         return
 
     def display_settings_callback(self, channel):
@@ -378,9 +795,7 @@ class AlarmClock:
             debug_lines.append("display_settings_callback: Entering display mode")
             self.alarm_settings_state = 1
             if self.alarm_ringing == 1:
-                self.alarm_ringing = 0
-                self.alarm_stat = "OFF"
-                self.sleep_state = "OFF"
+                self.dismiss_alarm()
             # Always reset display_settings_state and display_set when entering display settings
             self.display_settings_state = 2
             self.display_set = 1
@@ -393,7 +808,7 @@ class AlarmClock:
             self.last_alpha_brightness = None
             self.last_alpha_type = None
             debug_lines.append(f"display_settings_callback exit: display_state={self.display_settings_state}, alarm_set={self.alarm_set}, aux_set={self.display_set}")
-            print("\n".join(debug_lines), end="\n")
+            self.logger.debug("%s", "\n".join(debug_lines), extra={"key": "settings_callback"})
             return
         elif self.display_settings_state == 2:
             debug_lines.append("display_settings_callback: Exiting display mode")
@@ -406,16 +821,75 @@ class AlarmClock:
             self.last_alpha_brightness = None
             self.last_alpha_type = None
             debug_lines.append(f"display_settings_callback exit: display_state={self.display_settings_state}, alarm_set={self.alarm_set}, aux_set={self.display_set}")
-            print("\n".join(debug_lines), end="\n")
+            self.logger.debug("%s", "\n".join(debug_lines), extra={"key": "settings_callback"})
             return
 
     # --- Rotary encoder action methods ---
+    def inc_selected_alarm(self):
+        """
+        Select the next alarm, then NEW, wrapping around to the first alarm.
+        """
+        self.select_alarm((self.alarm_index + 1) % (len(self.alarms) + 1))
+        return False
+
+    def dec_selected_alarm(self):
+        """
+        Select the previous alarm, wrapping around from the first alarm to NEW.
+        """
+        self.select_alarm((self.alarm_index - 1) % (len(self.alarms) + 1))
+        return False
+
+    def add_selected_alarm(self):
+        """
+        Create an alarm for the NEW entry with the fields of the previously selected alarm, switched off.
+        """
+        alarm = Alarm(self.alarms.new_name(), self.alarm_time.hour, self.alarm_time.minute, EVERY_DAY,
+                      track=self.alarm_track, volume=self.vol_level, enabled=False)
+        self.alarms.add(alarm, self.get_time())
+        self.select_alarm(len(self.alarms) - 1)
+        self.logger.info("added alarm %s", alarm.name)
+
+    def step_alarm_days(self, step):
+        """
+        Move the selected alarm to the next or previous DAY_PRESETS recurrence. ONCE fires on the next occurrence only.
+        """
+        alarm = self.selected_alarm()
+        if alarm is None:
+            return False
+        labels = [label for label, _mask in DAY_PRESETS]
+        current = alarm.days_label()
+        index = labels.index(current) if current in labels else -1
+        label, mask = DAY_PRESETS[(index + step) % len(DAY_PRESETS)]
+        if mask is None:
+            alarm.days = EVERY_DAY
+            alarm.date = None
+            fire = alarm.next_fire(self.get_time())
+            alarm.date = fire.date() if fire else None
+        else:
+            alarm.days = mask
+            alarm.date = None
+        self.alarms.update(alarm, self.get_time())
+        self.logger.debug("alarm %s days %s", alarm.name, label)
+        return False
+
+    def inc_alarm_days(self):
+        """
+        Select the next recurrence preset of the selected alarm.
+        """
+        return self.step_alarm_days(1)
+
+    def dec_alarm_days(self):
+        """
+        Select the previous recurrence preset of the selected alarm.
+        """
+        return self.step_alarm_days(-1)
+
     def inc_alarm_hour(self):
         """
         Increment the alarm hour, wrapping around at 12.
         """
         self.alarm_hour = (self.alarm_hour % 12) + 1
-        print(f"clockwise {self.alarm_hour}")
+        self.logger.debug("clockwise %s", self.alarm_hour)
         return True
 
     def inc_alarm_minute(self):
@@ -423,7 +897,7 @@ class AlarmClock:
         Increment the alarm minute, wrapping around at 60.
         """
         self.alarm_minute = (self.alarm_minute + self.minute_incr) % 60
-        print(f"clockwise {self.alarm_minute}")
+        self.logger.debug("clockwise %s", self.alarm_minute)
         return True
 
     def toggle_period(self):
@@ -431,7 +905,7 @@ class AlarmClock:
         Toggle the alarm period between AM and PM.
         """
         self.period = "PM" if self.period == "AM" else "AM"
-        print(f"clockwise {self.period}")
+        self.logger.debug("clockwise %s", self.period)
         return True
 
     def toggle_alarm_stat(self):
@@ -439,7 +913,7 @@ class AlarmClock:
         Toggle the alarm status between ON and OFF.
         """
         self.alarm_stat = "OFF" if self.alarm_stat == "ON" else "ON"
-        print(f"clockwise {self.alarm_stat}")
+        self.logger.debug("clockwise %s", self.alarm_stat)
         return True
 
     def inc_alarm_track(self):
@@ -448,8 +922,7 @@ class AlarmClock:
         """
         self.alarm_track = (self.alarm_track % 6) + 1
         if self.use_audio:
-            self.mixer.music.load(self.alarm_tracks[self.alarm_track])
-            self.mixer.music.play()
+            self.audio.play(self.alarm_track, self.vol_level / 100.0, loops=0)
         return False
 
     def inc_vol_level(self):
@@ -459,9 +932,7 @@ class AlarmClock:
         self.vol_level = (self.vol_level + 1) % 96
         if self.use_audio:
             volume = self.vol_level / 100.0
-            self.mixer.music.set_volume(volume)
-            self.mixer.music.load(self.alarm_tracks[self.alarm_track])
-            self.mixer.music.play()
+            self.audio.play(self.alarm_track, volume, loops=0)
         return False
 
     def dec_alarm_hour(self):
@@ -469,7 +940,7 @@ class AlarmClock:
         Decrement the alarm hour, wrapping around at 1.
         """
         self.alarm_hour = 12 if self.alarm_hour == 1 else self.alarm_hour - 1
-        print(f"counter clockwise {self.alarm_hour}")
+        self.logger.debug("counter clockwise %s", self.alarm_hour)
         return True
 
     def dec_alarm_minute(self):
@@ -477,7 +948,7 @@ class AlarmClock:
         Decrement the alarm minute, wrapping around at 0.
         """
         self.alarm_minute = (self.alarm_minute - self.minute_incr) % 60
-        print(f"counter clockwise {self.alarm_minute}")
+        self.logger.debug("counter clockwise %s", self.alarm_minute)
         return True
 
     def dec_period(self):
@@ -485,7 +956,7 @@ class AlarmClock:
         Toggle the alarm period between AM and PM (counterclockwise action).
         """
         self.period = "PM" if self.period == "AM" else "AM"
-        print(f"counter clockwise {self.period}")
+        self.logger.debug("counter clockwise %s", self.period)
         return True
 
     def dec_alarm_stat(self):
@@ -493,7 +964,7 @@ class AlarmClock:
         Toggle the alarm status between ON and OFF (counterclockwise action).
         """
         self.alarm_stat = "OFF" if self.alarm_stat == "ON" else "ON"
-        print(f"counter clockwise {self.alarm_stat}")
+        self.logger.debug("counter clockwise %s", self.alarm_stat)
         return True
 
     def dec_alarm_track(self):
@@ -502,8 +973,7 @@ class AlarmClock:
         """
         self.alarm_track = 6 if self.alarm_track == 1 else self.alarm_track - 1
         if self.use_audio:
-            self.mixer.music.load(self.alarm_tracks[self.alarm_track])
-            self.mixer.music.play()
+            self.audio.play(self.alarm_track, self.vol_level / 100.0, loops=0)
         return False
 
     def dec_vol_level(self):
@@ -513,9 +983,7 @@ class AlarmClock:
         self.vol_level = 95 if self.vol_level == 0 else self.vol_level - 1
         if self.use_audio:
             volume = self.vol_level / 100.0
-            self.mixer.music.set_volume(volume)
-            self.mixer.music.load(self.alarm_tracks[self.alarm_track])
-            self.mixer.music.play()
+            self.audio.play(self.alarm_track, volume, loops=0)
         return False
 
     def inc_manual_dim_level(self):
@@ -539,14 +1007,20 @@ class AlarmClock:
         Toggle the display override between ON and OFF.
         """
         self.display_override = "OFF" if self.display_override == "ON" else "ON"
+        # An explicit choice ends a gesture wake instead of being undone when it expires
+        self.display_wake_until = None
         return False
 
     def poll_rotary_encoder(self):
         """
         Poll the I2C rotary encoder for position and button events, and handle alarm/display settings accordingly.
+        With an interrupt driven input backend the encoder is only read after it signaled.
         """
-        position = self.encoder.position
-        button = self.encoder_button.value
+        if not self.input.take("encoder"):
+            return
+        # A failed read keeps the last state
+        position = self.bus.read("encoder", lambda: self.encoder.position, default=self.last_encoder_position)
+        button = self.bus.read("encoder", lambda: self.encoder_button.value, default=self.last_encoder_button)
         # Detect rotation
         if position != self.last_encoder_position:
             direction = 'CLOCKWISE' if position > self.last_encoder_position else 'ANTICLOCKWISE'
@@ -564,6 +1038,8 @@ class AlarmClock:
                             update_time = True
                 if update_time:
                     self.alarm_time = dt.strptime(f"{self.alarm_hour}:{self.alarm_minute} {self.period}", "%I:%M %p")
+                if self.alarm_set in (2, 3, 4, 5, 6, 7):
+                    self.apply_alarm_fields()
             elif self.display_settings_state == 2:
                 action = None
                 if direction == 'CLOCKWISE':
@@ -577,12 +1053,9 @@ class AlarmClock:
                     self.display_override = "ON"
                     self.display_settings_state = 1
                 elif self.alarm_ringing == 1 and self.sleep_state == "OFF":
-                    self.alarm_ringing = 0
-                    self.alarm_time = self.alarm_time + datetime.timedelta(minutes=1)
-                    self.sleep_state = "ON"
+                    self.snooze_alarm(1)
                 elif self.alarm_ringing == 0 and self.sleep_state == "ON":
-                    self.alarm_stat = "OFF"
-                    self.sleep_state = "OFF"
+                    self.dismiss_alarm()
             self.save_settings()
             self.last_encoder_position = position
         # Detect button press/release
@@ -593,7 +1066,9 @@ class AlarmClock:
         # Handle button events
         if self.encoder_button_down:
             if self.alarm_settings_state == 2:
-                self.alarm_set = (self.alarm_set % 6) + 1
+                if self.alarm_set == 1 and self.selected_alarm() is None:
+                    self.add_selected_alarm()
+                self.alarm_set = (self.alarm_set % len(self.clockwise_alarm_actions)) + 1
             elif self.display_settings_state == 2:
                 self.display_set = (self.display_set % 2) + 1
             self.save_settings()
@@ -605,23 +1080,21 @@ class AlarmClock:
         Poll the Adafruit LED Arcade Button 1x4 for button presses and handle display/alarm settings.
         Switch 1 (yellow): Display settings, Switch 2 (white): Alarm settings.
         Also turns off a ringing or snoozed alarm when either button is pressed.
+        With an interrupt driven input backend the buttons are only read after the board signaled.
         """
-        now = time.monotonic()
+        if not self.input.take("arcade"):
+            return
+        now = self.clock.monotonic()
         for idx, btn in enumerate(self.arcade_buttons):
-            pressed = not btn.value # Button is active low: pressed == False
+            pressed = not self.bus.read("arcade", lambda: btn.value, default=True) # Button is active low: pressed == False
             if pressed and self.last_state[idx]:  # Button down event
                 if now - self.last_press[idx] > self.debounce_time:
                     # Turn off alarm if ringing or snoozed
                     if self.alarm_ringing == 1 or self.sleep_state == "ON":
-                        self.alarm_ringing = 0
-                        self.alarm_stat = "OFF"
-                        self.sleep_state = "OFF"
+                        self.dismiss_alarm()
                         # Immediately clear only the alphanumeric display to stop RING, but do NOT show it or clear the numeric display
                         self.alpha_display.fill(0)
-                        try:
-                            self.alpha_display.show()
-                        except Exception as e:
-                            self.logger.error("alpha_display.show() error: %s", str(e))
+                        self.show_display("alpha_display")
                         # Do NOT clear or update the numeric display here
                         # Do NOT call display_settings_callback or alarm_settings_callback in this case
                     else:
@@ -633,22 +1106,64 @@ class AlarmClock:
                             # Switch 2 (white): Alarm settings
                             self.alarm_settings_callback(1)
                             self.arcade_leds[1].value = True  # Turn on white LED
-                    # Set max brightness for each button LED
-                    max_brightness = 65535 if idx == 0 else 20000  # Lower for alarm settings button
-                    for cycle in range(0, max_brightness, 8000):
-                        self.arcade_leds[idx].duty_cycle = cycle
-                        time.sleep(0.002)
-                    for cycle in range(max_brightness - 1, 0, -8000):
-                        self.arcade_leds[idx].duty_cycle = cycle
-                        time.sleep(0.002)
+                    self.pulse_arcade_led(idx)
                 self.last_press[idx] = now
-            elif not pressed:
-                self.arcade_leds[idx].duty_cycle = 0  # Turn off LED
+            elif not pressed and not self.animator.is_running(f"led{idx}"):
+                self.set_arcade_led(idx, 0)  # Turn off LED
             self.last_state[idx] = pressed
 
+    def set_arcade_led(self, idx, duty_cycle):
+        """
+        Queue a duty cycle write for an arcade button LED, skipped if the LED already has that value.
+
+        Args:
+            idx (int): 0 for the yellow LED, 1 for the white LED.
+            duty_cycle (float): 0 to 65535, rounded to an integer.
+        """
+        duty_cycle = int(round(duty_cycle))
+        if duty_cycle == self.arcade_led_duty[idx]:
+            return
+        self.arcade_led_duty[idx] = duty_cycle
+        led = self.arcade_leds[idx]
+        self.bus.submit("arcade", lambda: setattr(led, "duty_cycle", duty_cycle), PRIORITY_DISPLAY, key=f"led{idx}")
+
+    def pulse_arcade_led(self, idx):
+        """
+        Start the button press pulse on an arcade LED: fade up to full brightness and back to off.
+        The pulse is advanced by the animator, one duty cycle write per frame.
+
+        Args:
+            idx (int): 0 for the yellow LED, 1 for the white LED.
+        """
+        # Set max brightness for each button LED
+        max_brightness = 65535 if idx == 0 else 20000  # Lower for alarm settings button
+        self.animator.start(
+            f"led{idx}",
+            lambda value: self.set_arcade_led(idx, value),
+            [(0.0, 0), (self.led_pulse_time, max_brightness - 1), (2 * self.led_pulse_time, 0)],
+        )
+
+    def fade_display(self, name, target, duration):
+        """
+        Fade a display's brightness from its current level to target over duration seconds.
+
+        Args:
+            name (str): Attribute name of the display ("alpha_display" or "num_display").
+            target (float): Final brightness, 0.0 to 1.0.
+            duration (float): Length of the fade in seconds.
+        """
+        display = getattr(self, name)
+
+        def set_brightness(value):
+            display.brightness = min(max(value, 0.0), 1.0)
+            self.show_display(name)
+        self.animator.start(f"{name}.brightness", set_brightness, [(0.0, display.brightness), (duration, target)])
+
     def brightness(self, auto_dim, alarm_stat, display_mode, now):
         """
         Determine the display mode based on auto dim, alarm status, and current time.
+        The time windows are looked up in the compiled minute-of-day table, which is rebuilt only
+        when a window or the next alarm time changes.
 
         Args:
             auto_dim (str): Whether auto dim is enabled ("ON"/"OFF").
@@ -659,25 +1174,20 @@ class AlarmClock:
             str: The updated display mode.
         """
         if auto_dim == "ON":
-            if dt.strptime(self.manual_dim_start, "%H:%M").time() <= now.time() <= dt.strptime(self.manual_dim_end, "%H:%M").time():
-                display_mode = "MANUAL_DIM"
-            elif dt.strptime(self.auto_dim_start, "%H:%M").time() < now.time() <= dt.strptime(self.auto_dim_end, "%H:%M").time():
-                display_mode = "AUTO_DIM"
-            if alarm_stat == "OFF":
-                if dt.strptime(self.auto_off_start, "%H:%M").time() < now.time() <= dt.strptime(self.auto_off_end, "%H:%M").time():
-                    if self.display_override == "OFF":
-                        display_mode = "AUTO_OFF"
-            elif alarm_stat == "ON":
-                if dt.strptime("00:01", "%H:%M").time() <= now.time() < dt.strptime(self.alarm_time.time().strftime("%H:%M"), "%H:%M").time():
-                    if self.display_override == "OFF":
-                        display_mode = "AUTO_OFF"
-                if dt.strptime(self.alarm_time.time().strftime("%H:%M"), "%H:%M").time() <= now.time() < dt.strptime(self.manual_dim_start, "%H:%M").time():
-                    display_mode = "MANUAL_DIM"
+            self.brightness_schedule.compile(
+                (self.manual_dim_start, self.manual_dim_end, self.auto_dim_start,
+                 self.auto_dim_end, self.auto_off_start, self.auto_off_end),
+                self.next_alarm_minute(),
+            )
+            mode = self.brightness_schedule.lookup(now.hour * 60 + now.minute, now.weekday(), alarm_stat, self.display_override)
+            if mode is not None:
+                display_mode = mode
         return display_mode
 
     def debug_brightness(self, auto_dim, alarm_stat, display_mode, now):
         """
         Debug version of brightness() for testing display mode logic with different time ranges.
+        Uses the fixed windows in DEBUG_BRIGHTNESS_WINDOWS.
 
         Args:
             auto_dim (str): Whether auto dim is enabled ("ON"/"OFF").
@@ -688,20 +1198,13 @@ class AlarmClock:
             str: The updated display mode.
         """
         if auto_dim == "ON":
-            if dt.strptime("07:30", "%H:%M").time() <= now.time() <= dt.strptime("12:00", "%H:%M").time():
-                display_mode = "MANUAL_DIM"
-            elif dt.strptime("12:00", "%H:%M").time() < now.time() <= dt.strptime("12:59", "%H:%M").time():
-                display_mode = "AUTO_DIM"
-            if alarm_stat == "OFF":
-                if dt.strptime("13:00", "%H:%M").time() < now.time() <= dt.strptime("15:00", "%H:%M").time():
-                    if self.display_override == "OFF":
-                        display_mode = "AUTO_OFF"
-            elif alarm_stat == "ON":
-                if dt.strptime("00:01", "%H:%M").time() <= now.time() < dt.strptime(self.alarm_time.time().strftime("%H:%M"), "%H:%M").time():
-                    if self.display_override == "OFF":
-                        display_mode = "AUTO_OFF"
-                if dt.strptime(self.alarm_time.time().strftime("%H:%M"), "%H:%M").time() <= now.time() < dt.strptime("07:30", "%H:%M").time():
-                    display_mode = "MANUAL_DIM"
+            self.debug_brightness_schedule.compile(
+                tuple(self.DEBUG_BRIGHTNESS_WINDOWS[name] for name in WINDOW_NAMES),
+                self.next_alarm_minute(),
+            )
+            mode = self.debug_brightness_schedule.lookup(now.hour * 60 + now.minute, now.weekday(), alarm_stat, self.display_override)
+            if mode is not None:
+                display_mode = mode
         return display_mode
 
     def display_alpha_message(self, message_type, alpha_message, display_mode):
@@ -715,10 +1218,7 @@ class AlarmClock:
         """
         if (display_mode == "MANUAL_OFF" or display_mode == "AUTO_OFF"):
             self.alpha_display.fill(0)
-            try:
-                self.alpha_display.show()
-            except Exception as e:
-                self.logger.error("alpha_display.show() error: %s", str(e))
+            self.show_display("alpha_display")
             # Reset cache so next message will display
             self.last_alpha_message = None
             self.last_alpha_brightness = None
@@ -731,74 +1231,43 @@ class AlarmClock:
             # Only update if value or brightness or type changed
             current_brightness = dim_level / 15.0
             if (alpha_message != self.last_alpha_message) or (current_brightness != self.last_alpha_brightness) or (message_type != self.last_alpha_type):
-                self.alpha_display.fill(0)
-                if message_type == "FLOAT":
-                    self.alpha_display.print(str(alpha_message))
-                elif message_type == "STR":
-                    self.alpha_display.print(alpha_message)
-                print(f"dim_level: {dim_level} display_mode: {display_mode}")
+                self.alpha_display.set_frame(self.alpha_glyphs.frame(str(alpha_message)))
+                self.logger.debug("dim_level: %s display_mode: %s", dim_level, display_mode)
                 self.alpha_display.brightness = current_brightness
-                try:
-                    self.alpha_display.show()
-                except Exception as e:
-                    self.logger.error("alpha_display.show() error: %s", str(e))
                 self.last_alpha_message = alpha_message
                 self.last_alpha_brightness = current_brightness
                 self.last_alpha_type = message_type
-            time.sleep(.01)
-        return
-
-    def display_num_message(self, num_message, display_mode, now):
-        """
-        Display a message on the numeric display, handling brightness and display mode.
-
-        Args:
-            num_message: The message to display (numeric).
-            display_mode (str): The current display mode.
-            now (datetime): The current datetime (for colon blink).
-        """
-        if (display_mode == "MANUAL_OFF" or display_mode == "AUTO_OFF"):
-            self.num_display.fill(0)
-            try:
-                self.num_display.show()
-            except Exception as e:
-                self.logger.error("num_display.show() error: %s", str(e))
-        elif display_mode == "AUTO_DIM" or display_mode == "MANUAL_DIM":
-            if display_mode == "AUTO_DIM":
-                dim_level = self.auto_dim_level
-            elif display_mode == "MANUAL_DIM":
-                dim_level = self.manual_dim_level
-            self.num_display.fill(0)
-            self.num_display.print(str(num_message))
-            self.num_display.colon = now.second % 2
-            self.num_display.brightness = dim_level / 15.0
-            try:
-                self.num_display.show()
-            except Exception as e:
-                self.logger.error("num_display.show() error: %s", str(e))
-        time.sleep(.01)
+            # Unchanged frames cost no bus traffic; a frame lost to a bus error is sent again
+            self.show_display("alpha_display")
         return
 
     def save_settings(self):
         """
-        Save the current settings to a JSON file for persistence.
+        Mark the current settings for saving. The settings store writes them to the JSON file
+        once they stop changing, or on shutdown.
         """
         settings = {k: getattr(self, k) for k in self.PERSISTED_SETTINGS}
         # Save alarm_time as string
         settings["alarm_time"] = self.alarm_time.strftime("%H:%M")
-        try:
-            with open(self.SETTINGS_FILE, "w") as f:
-                json.dump(settings, f)
-        except Exception as e:
-            self.logger.error("Failed to save settings: %s", str(e))
+        settings["alarms"] = self.alarms.to_list()
+        if self.display_wake_until is not None:
+            # A gesture wake is temporary: save the off state it returns to
+            settings["display_mode"] = self.display_wake_mode
+            settings["display_override"] = "OFF"
+        self.settings_store.save(settings)
 
     def load_settings(self):
         """
         Load settings from a JSON file, updating alarm and display state variables.
         """
+        entries = None
         try:
-            with open(self.SETTINGS_FILE, "r") as f:
-                settings = json.load(f)
+            settings = self.settings_store.load()
+            if settings is None:
+                self.load_alarms(entries)
+                return
+            entries = settings.get("alarms")
+            self.alarm_index = settings.get("alarm_index", self.alarm_index)
             self.alarm_hour = settings.get("alarm_hour", self.alarm_hour)
             self.alarm_minute = settings.get("alarm_minute", self.alarm_minute)
             self.period = settings.get("period", self.period)
@@ -809,6 +1278,9 @@ class AlarmClock:
             self.auto_dim = settings.get("auto_dim", self.auto_dim)
             self.display_mode = settings.get("display_mode", self.display_mode)
             self.display_override = settings.get("display_override", self.display_override)
+            self.ramp_curve = settings.get("ramp_curve", self.ramp_curve)
+            self.ramp_target = settings.get("ramp_target", self.ramp_target)
+            self.ramp_duration = settings.get("ramp_duration", self.ramp_duration)
             alarm_time_str = settings.get("alarm_time", None)
             if alarm_time_str:
                 # Parse alarm_time as HH:MM (24-hour format)
@@ -828,51 +1300,102 @@ class AlarmClock:
                 else:
                     self.alarm_hour = hour_24 - 12
                     self.period = "PM"
-        except FileNotFoundError:
-            pass
         except Exception as e:
             self.logger.error("Failed to load settings: %s", str(e))
+        self.load_alarms(entries)
+
+    def load_alarms(self, entries):
+        """
+        Build the alarm index from the "alarms" list of the settings file and select the saved menu alarm.
+        Without the list (settings from before multiple alarms) the single alarm fields become one daily alarm.
+
+        Args:
+            entries (list): Alarm dicts as written by Alarm.to_dict(), or None.
+        """
+        if entries is None:
+            entries = [{
+                "name": "A1",
+                "time": self.alarm_time.strftime("%H:%M"),
+                "track": self.alarm_track,
+                "volume": self.vol_level,
+                "enabled": self.alarm_stat == "ON",
+            }]
+        now = self.get_time()
+        for entry in entries:
+            try:
+                self.alarms.add(Alarm.from_dict(entry), now)
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error("Invalid alarm %s error: %s", entry, str(e))
+        self.select_alarm(min(self.alarm_index, max(len(self.alarms) - 1, 0)))
 
     def handle_gesture(self, now):
         """
-        Handle gestures from the APDS9960 sensor for display wake, alarm snooze, and alarm off when snoozed.
-        Only called when gesture sensor is enabled.
+        Handle gestures queued by the sampler thread for display wake, alarm snooze, and alarm off when snoozed.
+        Never blocks; gestures queued before the sensor was disabled are discarded.
         """
-        try:
-            gesture = self.apds.gesture()
-        except Exception as e:
-            self.logger.error("APDS9960 gesture() error: %s", str(e))
-            gesture = None
+        if not self.gesture_sampler.threaded:
+            self.gesture_sampler.poll()
+        for _timestamp, gesture in self.gesture_sampler.drain():
+            if self.gesture_sensor_enabled:
+                self.process_gesture(gesture)
+
+    def process_gesture(self, gesture):
+        """
+        Act on one gesture from the APDS9960.
+
+        Args:
+            gesture (int): Gesture code from the APDS9960.
+        """
+        if self.alarm_ringing == 1:
+            self.handle_ring_gesture(gesture)
+            return
         # 0x03 = left (right-to-left), 0x04 = right (left-to-right)
         if gesture in (0x03, 0x04):
-            # Wake display if off
-            if self.display_override == "OFF" and (self.display_mode == "AUTO_OFF" or self.display_mode == "MANUAL_OFF"):
-                self.loop_count = 0
-                self.display_mode = "AUTO_DIM"
-                self.display_override = "ON"
-                while self.loop_count <= 100:
-                    now = self.get_time()
-                    num_message = int(now.strftime("%I"))*100+int(now.strftime("%M"))
-                    self.display_num_message(num_message, self.display_mode, now)
-                    time.sleep(.03)
-                    self.loop_count += 1
-                # Restore previous off mode
-                if self.display_mode == "AUTO_DIM":
-                    self.display_mode = "AUTO_OFF"
-                else:
-                    self.display_mode = "MANUAL_OFF"
-                self.display_override = "OFF"
+            # Wake display if off, or keep it awake longer
+            if self.display_wake_until is not None or (
+                    self.display_override == "OFF" and (self.display_mode == "AUTO_OFF" or self.display_mode == "MANUAL_OFF")):
+                self.wake_display()
             # Turn off alarm if snoozed (sleep_state == "ON")
             if self.sleep_state == "ON":
-                print("Gesture detected: turning off snoozed alarm!")
-                self.alarm_ringing = 0
-                self.alarm_stat = "OFF"
-                self.sleep_state = "OFF"
+                self.logger.info("Gesture detected: turning off snoozed alarm!")
+                self.dismiss_alarm()
                 self.alpha_display.fill(0)
-                try:
-                    self.alpha_display.show()
-                except Exception as e:
-                    self.logger.error("alpha_display.show() error: %s", str(e))
+                self.show_display("alpha_display")
+
+    def wake_display(self):
+        """
+        Show the time at the auto dim level for display_wake_duration seconds. The normal display refresh
+        draws it; check_display_wake() fades it out and restores the off mode when the time is up.
+        A wake while the display is already awake, or fading out, starts the full duration again.
+        """
+        if self.display_wake_until is None:
+            self.display_wake_mode = self.display_mode
+            self.display_mode = "AUTO_DIM"
+            self.display_override = "ON"
+        if self.display_wake_fading:
+            self.animator.stop("num_display.brightness")
+            self.display_wake_fading = False
+        # Apply the auto dim level on the next refresh
+        self.last_num_brightness = None
+        self.display_wake_until = self.clock.monotonic() + self.display_wake_duration
+        self.display_wakes += 1
+
+    def check_display_wake(self):
+        """
+        Fade out a display woken by wake_display() once its deadline passes, and restore the off mode
+        when the fade is done.
+        """
+        if self.display_wake_until is None or self.clock.monotonic() < self.display_wake_until:
+            return
+        if not self.display_wake_fading:
+            self.display_wake_fading = True
+            self.display_wake_until = self.clock.monotonic() + self.display_wake_fade
+            self.fade_display("num_display", 0.0, self.display_wake_fade)
+            return
+        self.display_wake_until = None
+        self.display_wake_fading = False
+        self.display_mode = self.display_wake_mode
+        self.display_override = "OFF"
 
     def update_main_display(self, now):
         """
@@ -881,9 +1404,12 @@ class AlarmClock:
         Args:
             now (datetime): The current datetime.
         """
-        num_message = int(now.strftime("%I"))*100+int(now.strftime("%M"))
+        num_message = clock_number(now)
         # Determine current brightness
-        if self.display_mode == "AUTO_DIM":
+        if self.display_wake_fading:
+            # The wake fade animates the brightness
+            current_brightness = self.num_display.brightness
+        elif self.display_mode == "AUTO_DIM":
             current_brightness = self.auto_dim_level / 15.0
         elif self.display_mode == "MANUAL_DIM":
             current_brightness = self.manual_dim_level / 15.0
@@ -891,17 +1417,13 @@ class AlarmClock:
             current_brightness = self.num_display.brightness
         # Only update if value or brightness changed
         if (num_message != self.last_num_message) or (current_brightness != self.last_num_brightness):
-            self.num_display.fill(0)
-            self.num_display.print(str(num_message))
+            self.num_display.set_frame(self.num_glyphs.clock(now))
             self.num_display.brightness = current_brightness
             self.last_num_message = num_message
             self.last_num_brightness = current_brightness
         # Always update colon and show, for blink effect
         self.num_display.colon = now.second % 2
-        try:
-            self.num_display.show()
-        except Exception as e:
-            self.logger.error("num_display.show() error: %s", str(e))
+        self.show_display("num_display")
         self.update_alpha_display(now)
 
     def update_alpha_display(self, now):
@@ -912,26 +1434,33 @@ class AlarmClock:
             now (datetime): The current datetime.
         """
         if self.alarm_settings_state == 2:
+            alarm = self.selected_alarm()
             if self.alarm_set == 1:
-                alpha_message = self.alarm_hour*100 + self.alarm_minute
-                self.display_alpha_message("FLOAT", alpha_message, self.display_mode)
+                alpha_message = alarm.name if alarm else "NEW"
+                self.display_alpha_message("STR", alpha_message, self.display_mode)
             elif self.alarm_set == 2:
                 alpha_message = self.alarm_hour*100 + self.alarm_minute
                 self.display_alpha_message("FLOAT", alpha_message, self.display_mode)
             elif self.alarm_set == 3:
+                alpha_message = self.alarm_hour*100 + self.alarm_minute
+                self.display_alpha_message("FLOAT", alpha_message, self.display_mode)
+            elif self.alarm_set == 4:
                 alpha_message = self.period
                 self.display_alpha_message("STR", alpha_message, self.display_mode)
-            elif self.alarm_set == 4:
+            elif self.alarm_set == 5:
                 alpha_message = self.alarm_stat
                 self.display_alpha_message("STR", alpha_message, self.display_mode)
-            elif self.alarm_set == 5:
+            elif self.alarm_set == 6:
                 alpha_message = self.alarm_track
                 self.display_alpha_message("FLOAT", alpha_message, self.display_mode)
-            elif self.alarm_set == 6:
+            elif self.alarm_set == 7:
                 alpha_message = self.vol_level
                 self.display_alpha_message("FLOAT", alpha_message, self.display_mode)
                 if self.use_audio:
-                    self.mixer.music.set_volume(self.vol_level / 100.0)
+                    self.audio.set_volume(self.vol_level / 100.0)
+            elif self.alarm_set == 8:
+                alpha_message = alarm.days_label() if alarm else ""
+                self.display_alpha_message("STR", alpha_message, self.display_mode)
         elif self.display_settings_state == 2:
             if self.display_set == 1:
                 alpha_message = self.manual_dim_level
@@ -941,84 +1470,298 @@ class AlarmClock:
                 self.display_alpha_message("STR", alpha_message, self.display_mode)
         elif (self.alarm_settings_state == 1 and self.display_settings_state == 1):
             self.alpha_display.fill(0)
-            try:
-                self.alpha_display.show()
-            except Exception as e:
-                self.logger.error("alpha_display.show() error: %s", str(e))
+            self.show_display("alpha_display")
 
     def handle_display_off(self):
         """
         Turn off both the alphanumeric and numeric displays.
         """
         self.alpha_display.fill(0)
-        try:
-            self.alpha_display.show()
-        except Exception as e:
-            self.logger.error("alpha_display.show() error: %s", str(e))
+        self.show_display("alpha_display")
         self.num_display.fill(0)
-        try:
-            self.num_display.show()
-        except Exception as e:
-            self.logger.error("num_display.show() error: %s", str(e))
+        self.show_display("num_display")
 
     def main_loop_iteration(self):
         """
         Perform a single iteration of the main loop: update display, check alarm, and handle EDS wake.
         """
+        profiler = self.profiler
+        profiler.begin()
+        self.bus.begin_tick()
         now = self.get_time()
+        # A due alarm goes ahead of the brightness, gesture, control and display work of this pass
+        alarm_first = self.alarm_timer.expired()
+        if alarm_first:
+            self.check_alarm(now)
+            profiler.mark("alarm")
         if self.debug == "YES":
-            self.display_mode = self.debug_brightness(self.auto_dim, self.alarm_stat, self.display_mode, now)
+            self.display_mode = self.debug_brightness(self.auto_dim, self.alarm_status(), self.display_mode, now)
         else:
-            self.display_mode = self.brightness(self.auto_dim, self.alarm_stat, self.display_mode, now)
+            self.display_mode = self.brightness(self.auto_dim, self.alarm_status(), self.display_mode, now)
+        profiler.mark("brightness")
 
         # Enable gesture sensor only when needed
         gesture_needed = (
             self.display_mode in ("AUTO_DIM", "AUTO_OFF") or self.alarm_ringing == 1 or self.sleep_state == "ON"
         )
         self.set_gesture_sensor_state(gesture_needed)
-        if gesture_needed:
-            self.handle_gesture(now)
+        self.handle_gesture(now)
+        self.check_display_wake()
+        profiler.mark("gesture")
+        if self.control is not None:
+            self.poll_control()
+            profiler.mark("control")
 
         if self.display_mode != "MANUAL_OFF":
             self.update_main_display(now)
         elif (self.display_mode == "MANUAL_OFF" or self.display_mode == "AUTO_OFF"):
             self.handle_display_off()
-        if self.alarm_stat == "ON":
-            self.check_alarm(now)
+        profiler.mark("display")
+        if not alarm_first:
+            if self.alarms.armed() or self.ring_state != "IDLE":
+                self.check_alarm(now)
+            profiler.mark("alarm")
         self.poll_rotary_encoder()
+        profiler.mark("encoder")
         self.poll_arcade_buttons()
+        profiler.mark("buttons")
+        self.animator.tick()
+        self.bus.flush()
+        profiler.mark("flush")
+        self.settings_store.tick()
+        self.health.tick()
+        self.arm_alarm_timer()
+        self.log.tick()
+        self.report_bus_stats()
+        profiler.mark("housekeeping")
+        profiler.end()
+
+    def poll_control(self):
+        """
+        Handle the control API requests that arrived since the last pass, a bounded number per pass.
+        Whatever they changed is saved once and drawn by this pass's display refresh.
+        """
+        self.control.poll()
+        self.control_commands.finish()
 
-    def run(self):
+    def next_wake(self, now):
+        """
+        Return how long the main loop can sleep before anything can change, and what it is waiting for.
+
+        Candidates are the next colon toggle (also the minute rollover) while the display is on, the next
+        brightness window boundary while it is off, the next alarm or snooze, the ring, cooldown and display wake deadlines,
+        animation frames, the settings write, the inline gesture sampler, pending bus writes and the poll
+        interval of input boards that cannot signal and of the control API. An input interrupt or gesture ends
+        the sleep early.
+
+        Args:
+            now (datetime): The current datetime.
+        Returns:
+            tuple: (seconds, reason)
+        """
+        mono = self.clock.monotonic()
+        into_second = now.microsecond / 1e6
+        if self.display_mode != "MANUAL_OFF":
+            wakes = [(1.0 - into_second, "display")]
+        elif self.auto_dim == "ON":
+            schedule = self.debug_brightness_schedule if self.debug == "YES" else self.brightness_schedule
+            minutes = schedule.minutes_to_change(now.hour * 60 + now.minute, now.weekday(), self.alarm_status(), self.display_override)
+            wakes = [(minutes * 60 - now.second - into_second, "brightness")]
+        else:
+            wakes = [(self.max_sleep, "idle")]
+        fire = self.alarms.next_fire()
+        if fire is not None:
+            wakes.append(((fire - now).total_seconds(), "alarm"))
+        if self.ring_state == "RINGING":
+            wakes.append((self.input_interval, "ring"))
+        elif self.ring_state == "COOLDOWN":
+            wakes.append((self.snooze_cooldown_deadline - mono, "cooldown"))
+        if self.display_wake_until is not None:
+            wakes.append((self.display_wake_until - mono, "wake"))
+        for reason, deadline in (
+            ("animation", self.animator.next_deadline()),
+            ("settings", self.settings_store.next_deadline()),
+            ("gesture", self.gesture_sampler.next_deadline()),
+        ):
+            if deadline is not None:
+                wakes.append((deadline - mono, reason))
+        if self.bus.pending():
+            wakes.append((self.input_interval, "bus"))
+        if self.control is not None:
+            # Connected clients, and requests left over by the per-pass limit, are served at the fast input poll rate
+            wakes.append((self.input_interval if self.control.active() else self.idle_input_interval, "control"))
+        if self.input.polls("encoder") or self.input.polls("arcade"):
+            busy = self.alarm_settings_state == 2 or self.display_settings_state == 2 or self.alarm_ringing == 1
+            wakes.append((self.input_interval if busy else self.idle_input_interval, "input"))
+        wakes.append((self.last_bus_stats + self.bus_stats_interval - mono, "stats"))
+        delay, reason = min(wakes)
+        return min(max(delay, 0.0), self.max_sleep), reason
+
+    def request_i2c_dump(self, signum=None, frame=None):
+        """
+        Signal handler for SIGUSR2: dump the per-device I2C statistics on the next loop pass.
+        """
+        self.i2c_dump_requested = True
+
+    def dump_i2c_stats(self):
+        """
+        Print the per-device I2C statistics and write them to I2C_STATS_FILE.
+        """
+        self.logger.info("i2c devices:\n%s", self.i2c_stats.report())
+        try:
+            self.i2c_stats.write_stats(self.I2C_STATS_FILE, self.clock.time())
+        except Exception as e:
+            self.logger.error("Failed to write I2C stats: %s", str(e))
+
+    def report_bus_stats(self):
+        """
+        Print the I2C bus scheduler and display write statistics once every bus_stats_interval seconds,
+        and dump the per-device I2C statistics then or when SIGUSR2 asked for them.
+        """
+        if self.i2c_dump_requested:
+            self.i2c_dump_requested = False
+            self.dump_i2c_stats()
+        now = self.clock.monotonic()
+        if now - self.last_bus_stats >= self.bus_stats_interval:
+            self.last_bus_stats = now
+            self.dump_i2c_stats()
+            reports = [
+                ("i2c bus", self.bus.stats()),
+                ("num_display", self.num_display.stats()),
+                ("alpha_display", self.alpha_display.stats()),
+                ("glyphs", {"num_display": self.num_glyphs.stats(), "alpha_display": self.alpha_glyphs.stats()}),
+                ("settings", self.settings_store.stats()),
+                ("gesture sampler", self.gesture_sampler.stats()),
+                ("device health", self.health.stats()),
+                ("wakeups", self.wake_stats.summary()),
+                ("logging", self.log.stats()),
+            ]
+            if self.use_audio:
+                reports.append(("audio cache", self.audio.stats()))
+            reports.append(("alarm latency", {**self.alarm_latency.summary(), "timer": self.alarm_timer.stats()}))
+            if self.control is not None:
+                reports.append(("control api", self.control.stats()))
+            for name, stats in reports:
+                self.logger.info("%s: %s", name, stats, extra={"key": f"stats.{name}", "stats": stats})
+
+    def shutdown(self):
+        """
+        Blank both displays before the program exits.
+        """
+        self.alpha_display.fill(0)
+        self.show_display("alpha_display")
+        self.num_display.fill(0)
+        self.show_display("num_display")
+        self.bus.begin_tick()
+        self.bus.flush()
+        self.settings_store.flush()
+        if self.profiler.enabled:
+            self.logger.info("%s", self.profiler.report(), extra={"key": "profiler", "profile": self.profiler.summary()})
+        self.logger.info("wakeups: %s", self.wake_stats.summary(), extra={"key": "stats.wakeups"})
+        if self.alarm_latency.count:
+            self.logger.info("alarm latency: %s", self.alarm_latency.summary(), extra={"key": "stats.alarm latency"})
+        self.alarm_timer.stop()
+        self.gesture_sampler.stop()
+        self.input.close()
+        if self.control is not None:
+            self.control.close()
+        self.log.flush()
+
+    def run(self, duration=None):
         """
         Main loop for the alarm clock. Continuously updates display and checks alarm until interrupted.
+
+        Args:
+            duration (float): Stop after this many seconds of clock time, None to run until interrupted.
         """
+        end = None if duration is None else self.clock.monotonic() + duration
         try:
-            while True:
+            while end is None or self.clock.monotonic() < end:
                 self.main_loop_iteration()
-                time.sleep(0.02)
+                if self.wake_on_events:
+                    delay, reason = self.next_wake(self.get_time())
+                else:
+                    delay, reason = 0.02, "interval"
+                # An input interrupt or a queued gesture ends the sleep early
+                if self.input.wait(delay):
+                    reason = "input"
+                self.wake_stats.record(reason)
         except KeyboardInterrupt:
-            self.alpha_display.fill(0)
-            try:
-                self.alpha_display.show()
-            except Exception as e:
-                self.logger.error("alpha_display.show() error: %s", str(e))
-            self.num_display.fill(0)
-            try:
-                self.num_display.show()
-            except Exception as e:
-                self.logger.error("num_display.show() error: %s", str(e))
+            pass
         finally:
-            try:
-                self.alpha_display.fill(0)
-                self.alpha_display.show()
-            except Exception as e:
-                self.logger.error("alpha_display.show() error: %s", str(e))
-            try:
-                self.num_display.fill(0)
-                self.num_display.show()
-            except Exception as e:
-                self.logger.error("num_display.show() error: %s", str(e))
+            self.shutdown()
+
+    def run_async(self):
+        """
+        Event-driven alternative to run(). Input, display and alarm tasks only wake when they have work.
+        asyncio sleeps in real time, so this loop needs the system clock.
+        """
+        from async_runtime import AsyncRuntime
+        try:
+            asyncio.run(AsyncRuntime(self).run())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
 
 if __name__ == "__main__":
-    clock = AlarmClock()
-    clock.run()
+    parser = argparse.ArgumentParser(description="Raspberry Pi alarm clock")
+    parser.add_argument("--loop", choices=("poll", "async"), default="poll",
+                        help="main loop: 20 ms polling loop (default) or event-driven asyncio tasks")
+    parser.add_argument("--int-pin", action="append", default=[], metavar="SOURCE=PIN",
+                        help="BCM pin wired to the INT line of an input board (encoder, arcade or apds); may be repeated")
+    parser.add_argument("--sim", action="store_true",
+                        help="run headless on simulated displays, inputs, gesture sensor and a null mixer")
+    parser.add_argument("--sim-latency", action="store_true",
+                        help="with --sim, model the transaction time of a 100 kHz I2C bus")
+    parser.add_argument("--sim-script", metavar="FILE",
+                        help="with --sim, JSON list of timed input events ({\"at\": 2.0, \"action\": \"gesture\", \"value\": 4})")
+    parser.add_argument("--virtual-clock", action="store_true",
+                        help="run on virtual time that only advances when the loop sleeps (poll loop only)")
+    parser.add_argument("--clock-start", metavar="YYYY-MM-DDTHH:MM",
+                        help="with --virtual-clock, the virtual time to start at (default: now)")
+    parser.add_argument("--speed", type=float, default=0, metavar="N",
+                        help="with --virtual-clock, virtual seconds per real second (default 0: as fast as possible)")
+    parser.add_argument("--duration", type=float, metavar="SECONDS",
+                        help="stop after this many seconds of clock time")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each main loop phase; kill -USR1 <pid> prints a report")
+    parser.add_argument("--profile-interval", type=float, metavar="SECONDS",
+                        help="with --profile, also print a report every SECONDS")
+    parser.add_argument("--verbosity", choices=tuple(VERBOSITY), default="info",
+                        help="messages logged: quiet (warnings and errors), info (default) or debug; kill -HUP <pid> cycles it")
+    parser.add_argument("--control-socket", nargs="?", const=CONTROL_SOCKET, default="", metavar="PATH",
+                        help=f"Serve the JSON control API on this Unix socket (off by default, {CONTROL_SOCKET} without PATH)")
+    parser.add_argument("--loop-budget", type=float, default=15.0, metavar="MS",
+                        help="with --profile, flag loop passes longer than MS milliseconds (default 15)")
+    args = parser.parse_args()
+    if args.virtual_clock:
+        if args.loop == "async":
+            parser.error("--virtual-clock needs the poll loop")
+        start = dt.fromisoformat(args.clock_start) if args.clock_start else None
+        time_source = VirtualClock(start, args.speed)
+    else:
+        time_source = SystemClock()
+    int_pins = dict(AlarmClock.INPUT_INT_PINS)
+    for item in args.int_pin:
+        source, _, pin = item.partition("=")
+        if source not in INPUT_SOURCES or not pin.isdigit():
+            parser.error(f"invalid --int-pin {item!r}, expected one of {', '.join(INPUT_SOURCES)}=<BCM pin>")
+        int_pins[source] = int(pin)
+    if args.sim:
+        script = None
+        if args.sim_script:
+            with open(args.sim_script, "r") as f:
+                script = json.load(f)
+        hardware = create_hardware("sim", latency=args.sim_latency, script=script,
+                                   time_source=time_source.monotonic, sleep=time_source.sleep)
+    else:
+        hardware = create_hardware("pi")
+    profiler = LoopProfiler(args.profile, budget=args.loop_budget / 1000, report_interval=args.profile_interval,
+                            logger=logging.getLogger("aclock"))
+    clock = AlarmClock(int_pins=int_pins, hardware=hardware, clock=time_source, profiler=profiler, verbosity=args.verbosity,
+                       control_socket=args.control_socket)
+    if args.loop == "async":
+        clock.run_async()
+    else:
+        clock.run(args.duration)
@@ -0,0 +1,225 @@
+# alarm_timer.py
+# Precise alarm deadline for aclock.py.
+# The next alarm or snooze is armed as a monotonic deadline on a dedicated
+# timer thread. When it passes, the thread starts the alarm audio and wakes the
+# main loop, so the sound does not wait for the display, menu or animation work
+# of the pass that happens to be running. AlarmLatency records how long after
+# the scheduled minute each alarm became audible.
+
+import threading
+import time
+from collections import deque
+
+from profiler import percentile
+
+# Alarm-to-first-audio target: scheduled instant until the track is playing
+LATENCY_TARGET = 0.1
+
+
+class AlarmTimer:
+    """
+    AlarmTimer waits for the next alarm deadline on its own thread.
+
+    Features:
+        - Armed with a monotonic deadline, so wall clock steps (NTP, DST) do not move a deadline already armed
+        - The fire callback runs on the timer thread as soon as the deadline passes, whatever the main loop is doing
+        - claim() lets exactly one of the timer thread and the main loop start the audio of a firing
+        - Without start() (virtual time) nothing runs on a thread; the main loop checks expired() instead
+    """
+
+    def __init__(self, on_fire=None, time_source=time.monotonic, logger=None):
+        """
+        Initialize the timer.
+
+        Args:
+            on_fire (callable): Called on the timer thread with (key, payload) when an armed deadline passes.
+            time_source (callable): Returns the current monotonic time in seconds; must be time.monotonic when started.
+            logger: Logger used for errors raised by on_fire.
+        """
+        self.on_fire = on_fire
+        self.time_source = time_source
+        self.logger = logger
+        self._cond = threading.Condition()
+        self.deadline = None
+        self.key = None
+        self.payload = None
+        self._fired_key = None
+        # Keys of recent firings whose audio has been started, by either thread
+        self._claimed = deque(maxlen=8)
+        self._running = False
+        self._thread = None
+        self.arms = 0
+        self.fires = 0
+        self.errors = 0
+
+    def start(self):
+        """
+        Start the timer thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="alarm-timer", daemon=True)
+        self._thread.start()
+
+    @property
+    def threaded(self):
+        """
+        True once start() has been called.
+        """
+        return self._thread is not None
+
+    def stop(self):
+        """
+        Stop the timer thread and wait for it to exit.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def arm(self, deadline, key, payload=None):
+        """
+        Arm the timer, replacing any deadline armed before. Arming the same deadline and key again is a no-op.
+
+        Args:
+            deadline (float): Monotonic time at which the alarm is due.
+            key: Identifies the firing, e.g. the scheduled datetime; passed to on_fire and claim().
+            payload: Passed to on_fire, e.g. the Alarm.
+        """
+        with self._cond:
+            if deadline == self.deadline and key == self.key:
+                return
+            self.deadline = deadline
+            self.key = key
+            self.payload = payload
+            self.arms += 1
+            self._cond.notify()
+
+    def disarm(self):
+        """
+        Drop the armed deadline, if any.
+        """
+        with self._cond:
+            if self.deadline is not None:
+                self.deadline = None
+                self.key = None
+                self.payload = None
+                self._cond.notify()
+
+    def expired(self):
+        """
+        Return True if the armed deadline has passed.
+        """
+        deadline = self.deadline
+        return deadline is not None and self.time_source() >= deadline
+
+    def claim(self, key):
+        """
+        Return True for the first caller that claims a firing, False for every later one.
+
+        Args:
+            key: The key the firing was armed with.
+        """
+        with self._cond:
+            if key in self._claimed:
+                return False
+            self._claimed.append(key)
+            return True
+
+    def _run(self):
+        with self._cond:
+            while self._running:
+                if self.deadline is None or self.key == self._fired_key:
+                    self._cond.wait()
+                    continue
+                remaining = self.deadline - self.time_source()
+                if remaining > 0:
+                    # Condition.wait times out on the monotonic clock
+                    self._cond.wait(remaining)
+                    continue
+                key, payload = self.key, self.payload
+                # Fires once per arming; the thread waits again until the next deadline is armed
+                self._fired_key = key
+                self.fires += 1
+                self._cond.release()
+                try:
+                    if self.on_fire is not None:
+                        self.on_fire(key, payload)
+                except Exception as e:
+                    self.errors += 1
+                    if self.logger:
+                        self.logger.error("Alarm timer error: %s", str(e))
+                finally:
+                    self._cond.acquire()
+
+    def stats(self):
+        """
+        Return the timer counters.
+
+        Returns:
+            dict: Deadlines armed, fired on the timer thread, callback errors and whether the thread runs.
+        """
+        return {"arms": self.arms, "fires": self.fires, "errors": self.errors, "threaded": self.threaded}
+
+
+class AlarmLatency:
+    """
+    AlarmLatency keeps the alarm-to-first-audio latency of recent firings.
+
+    Features:
+        - One sample per firing: scheduled instant until the track was started
+        - p50/p99/max over the last window firings, and the count over the target
+        - Which thread started the audio: "timer" or "loop"
+    """
+
+    def __init__(self, target=LATENCY_TARGET, window=100):
+        """
+        Initialize the statistics.
+
+        Args:
+            target (float): Latency target in seconds.
+            window (int): Firings kept for the percentiles.
+        """
+        self.target = target
+        # Recorded on the timer thread, summarized on the main loop
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.over_target = 0
+        self.sources = {"timer": 0, "loop": 0}
+
+    def record(self, seconds, source):
+        """
+        Record the latency of one firing.
+
+        Args:
+            seconds (float): Scheduled instant until the audio started.
+            source (str): "timer" or "loop".
+        """
+        with self._lock:
+            self.samples.append(seconds)
+            self.count += 1
+            if seconds > self.target:
+                self.over_target += 1
+            self.sources[source] = self.sources.get(source, 0) + 1
+
+    def summary(self):
+        """
+        Return the latency statistics in milliseconds.
+
+        Returns:
+            dict: Firings, last, p50, p99 and max latency, target and firings over it, and start counts per source.
+        """
+        with self._lock:
+            ordered = sorted(self.samples)
+            last = self.samples[-1] if self.samples else 0.0
+        return {
+            "firings": self.count,
+            "last_ms": round(last * 1000, 1),
+            "p50_ms": round(percentile(ordered, 0.5) * 1000, 1),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1) if ordered else 0.0,
+            "target_ms": round(self.target * 1000, 1),
+            "over_target": self.over_target,
+            "sources": dict(self.sources),
+        }
@@ -0,0 +1,284 @@
+# alarms.py
+# Alarm definitions and the next-due index for aclock.py.
+# Each Alarm recurs on a weekday mask or fires once on a date, with its own
+# track and volume. AlarmSchedule keeps a min-heap keyed by the next fire
+# instant, so the loop only compares the current time against the head of the
+# heap; an alarm is re-indexed only when it fires or is edited.
+
+import datetime
+import heapq
+import itertools
+
+# Weekday mask bits, Monday first as in datetime.weekday()
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+EVERY_DAY = 0x7F
+WEEKDAYS_ONLY = 0x1F
+WEEKEND_ONLY = 0x60
+# Recurrence choices offered by the encoder menu: label (4 characters at most) and weekday mask;
+# "ONCE" turns the alarm into a one-shot on its next occurrence
+DAY_PRESETS = (("DAY", EVERY_DAY), ("WKDY", WEEKDAYS_ONLY), ("WKND", WEEKEND_ONLY), ("ONCE", None))
+
+
+class Alarm:
+    """
+    Alarm is one named alarm time with its recurrence, track and volume.
+    """
+
+    def __init__(self, name, hour, minute, days=EVERY_DAY, date=None, track=1, volume=65, enabled=True):
+        """
+        Initialize the alarm.
+
+        Args:
+            name (str): Short name shown on the alphanumeric display, e.g. "A1".
+            hour (int): 0 to 23.
+            minute (int): 0 to 59.
+            days (int): Weekday mask, bit 0 = Monday ... bit 6 = Sunday. Ignored when date is set.
+            date (datetime.date): Fire once on this date instead of recurring.
+            track (int): Alarm track number.
+            volume (int): Starting volume in percent.
+            enabled (bool): False keeps the alarm but never fires it.
+        """
+        self.name = name
+        self.hour = hour
+        self.minute = minute
+        self.days = days
+        self.date = date
+        self.track = track
+        self.volume = volume
+        self.enabled = enabled
+        # Bumped on every edit; heap entries with an older version are stale
+        self.version = 0
+
+    def next_fire(self, after):
+        """
+        Return the first fire instant strictly after the given datetime, or None if the alarm never fires again.
+
+        Args:
+            after (datetime): Local time to search from.
+        """
+        if not self.enabled:
+            return None
+        at = datetime.time(self.hour, self.minute)
+        if self.date is not None:
+            fire = datetime.datetime.combine(self.date, at)
+            return fire if fire > after else None
+        day = after.date()
+        for offset in range(8):
+            candidate = day + datetime.timedelta(days=offset)
+            if self.days >> candidate.weekday() & 1:
+                fire = datetime.datetime.combine(candidate, at)
+                if fire > after:
+                    return fire
+        return None
+
+    def days_label(self):
+        """
+        Return the DAY_PRESETS label of the recurrence, or "CUST" for any other weekday mask.
+        """
+        if self.date is not None:
+            return "ONCE"
+        for label, mask in DAY_PRESETS:
+            if mask == self.days:
+                return label
+        return "CUST"
+
+    def to_dict(self):
+        """
+        Return the alarm as a JSON serializable dict.
+        """
+        return {
+            "name": self.name,
+            "time": f"{self.hour:02d}:{self.minute:02d}",
+            "days": [WEEKDAYS[i] for i in range(7) if self.days >> i & 1],
+            "date": self.date.isoformat() if self.date is not None else None,
+            "track": self.track,
+            "volume": self.volume,
+            "enabled": self.enabled,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create an alarm from a dict written by to_dict().
+
+        Raises:
+            ValueError: If the time, a weekday or the date is malformed.
+        """
+        hour, minute = (int(part) for part in data["time"].split(":"))
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Invalid alarm time: {data['time']}")
+        days = 0
+        for day in data.get("days", WEEKDAYS):
+            days |= 1 << WEEKDAYS.index(day.upper())
+        date = data.get("date")
+        return cls(
+            data.get("name", "A1"), hour, minute, days,
+            datetime.date.fromisoformat(date) if date else None,
+            data.get("track", 1), data.get("volume", 65), data.get("enabled", True),
+        )
+
+
+class AlarmSchedule:
+    """
+    AlarmSchedule owns the alarms and indexes them by their next fire instant.
+
+    Features:
+        - Min-heap of (fire instant, alarm) entries; due() and next_fire() only look at the head
+        - Edits push a fresh entry and leave the old one to be discarded lazily when it reaches the head
+        - One pending snooze, indexed in the same heap
+        - revision counter that changes whenever the schedule changes
+    """
+
+    def __init__(self):
+        self.alarms = []
+        self._heap = []
+        self._sequence = itertools.count()
+        self._snooze_token = 0
+        self.snoozed = None
+        self.revision = 0
+
+    def __len__(self):
+        return len(self.alarms)
+
+    def _push(self, fire, alarm, kind, token):
+        heapq.heappush(self._heap, (fire, next(self._sequence), alarm, kind, token))
+
+    def _index(self, alarm, now):
+        alarm.version += 1
+        fire = alarm.next_fire(now)
+        if fire is not None:
+            self._push(fire, alarm, "alarm", alarm.version)
+        self.revision += 1
+        # Edits leave stale entries behind; rebuild once they outnumber the live ones
+        if len(self._heap) > 2 * len(self.alarms) + 16:
+            self.reindex(now)
+
+    def _stale(self, entry):
+        _fire, _seq, alarm, kind, token = entry
+        if kind == "snooze":
+            return token != self._snooze_token
+        # remove() bumps the version, so removed alarms fail the version check without scanning self.alarms
+        return token != alarm.version or not alarm.enabled
+
+    def _head(self):
+        heap = self._heap
+        while heap and self._stale(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def reindex(self, now):
+        """
+        Rebuild the heap for all alarms from now, dropping stale entries. Keeps a pending snooze.
+        """
+        snooze = [entry for entry in self._heap if entry[3] == "snooze" and not self._stale(entry)]
+        self._heap = []
+        for alarm in self.alarms:
+            fire = alarm.next_fire(now)
+            if fire is not None:
+                self._heap.append((fire, next(self._sequence), alarm, "alarm", alarm.version))
+        self._heap.extend(snooze)
+        heapq.heapify(self._heap)
+        self.revision += 1
+
+    def add(self, alarm, now):
+        """
+        Add an alarm and index its next fire instant. Returns the alarm.
+        """
+        self.alarms.append(alarm)
+        self._index(alarm, now)
+        return alarm
+
+    def remove(self, alarm):
+        """
+        Remove an alarm; its heap entries become stale.
+        """
+        self.alarms.remove(alarm)
+        alarm.version += 1
+        if self.snoozed is alarm:
+            self.cancel_snooze()
+        self.revision += 1
+
+    def update(self, alarm, now):
+        """
+        Re-index an alarm after any of its fields changed. An alarm that was removed stays unindexed.
+        """
+        if alarm in self.alarms:
+            self._index(alarm, now)
+
+    def next_fire(self):
+        """
+        Return the next fire instant of any alarm or the snooze, or None if nothing is scheduled.
+        """
+        head = self._head()
+        return head[0] if head else None
+
+    def next_due(self):
+        """
+        Return (fire instant, alarm) of the next alarm or snooze, or None if nothing is scheduled.
+        """
+        head = self._head()
+        return (head[0], head[2]) if head else None
+
+    def armed(self):
+        """
+        Return True if any alarm or a snooze is scheduled.
+        """
+        return self._head() is not None
+
+    def due(self, now):
+        """
+        Return the alarm that is due at now, or None. A due alarm is removed from the head and
+        re-indexed at its next occurrence after now; a due snooze is consumed.
+
+        Args:
+            now (datetime): The current local time.
+        """
+        head = self._head()
+        if head is None or head[0] > now:
+            return None
+        heapq.heappop(self._heap)
+        _fire, _seq, alarm, kind, _token = head
+        if kind == "snooze":
+            self.snoozed = None
+            self._snooze_token += 1
+            self.revision += 1
+        else:
+            fire = alarm.next_fire(now)
+            if fire is not None:
+                self._push(fire, alarm, "alarm", alarm.version)
+            self.revision += 1
+        return alarm
+
+    def snooze(self, alarm, until):
+        """
+        Schedule alarm to ring again at until, replacing any pending snooze.
+        """
+        self._snooze_token += 1
+        self.snoozed = alarm
+        self._push(until, alarm, "snooze", self._snooze_token)
+        self.revision += 1
+
+    def cancel_snooze(self):
+        """
+        Drop the pending snooze, if any.
+        """
+        if self.snoozed is not None:
+            self._snooze_token += 1
+            self.snoozed = None
+            self.revision += 1
+
+    def new_name(self):
+        """
+        Return the first unused name of the form A1, A2, ...
+        """
+        names = {alarm.name for alarm in self.alarms}
+        for number in itertools.count(1):
+            name = f"A{number}"
+            if name not in names:
+                return name
+
+    def to_list(self):
+        """
+        Return all alarms as JSON serializable dicts.
+        """
+        return [alarm.to_dict() for alarm in self.alarms]
@@ -0,0 +1,141 @@
+# animation.py
+# Timer-driven animation engine for aclock.py.
+# Keyframed fades (arcade LED duty cycle, display brightness) are scheduled against
+# time.monotonic() and advanced one frame per main loop tick, so they never block
+# input handling. When the loop runs late, intermediate frames are dropped and the
+# value for the current time is written instead.
+
+import time
+
+
+class Animation:
+    """
+    Animation holds the keyframes of one fade and the setter that applies its value.
+    """
+
+    def __init__(self, setter, keyframes, start):
+        """
+        Initialize the animation.
+
+        Args:
+            setter (callable): Called with each new frame value.
+            keyframes (list): (seconds from start, value) pairs in time order.
+            start (float): time.monotonic() at which the animation starts.
+        """
+        self.setter = setter
+        self.keyframes = keyframes
+        self.start = start
+        self.end = start + keyframes[-1][0]
+        self.last_value = None
+        self.last_frame = None
+
+    def value_at(self, now):
+        """
+        Return the linearly interpolated value at the given time.
+        """
+        elapsed = now - self.start
+        previous_time, previous_value = self.keyframes[0]
+        if elapsed <= previous_time:
+            return previous_value
+        for frame_time, value in self.keyframes[1:]:
+            if elapsed < frame_time:
+                fraction = (elapsed - previous_time) / (frame_time - previous_time)
+                return previous_value + (value - previous_value) * fraction
+            previous_time, previous_value = frame_time, value
+        return previous_value
+
+
+class Animator:
+    """
+    Animator runs keyed animations, at most one per key, advancing each by one frame per tick.
+
+    Features:
+        - One setter call per animation per frame, and none when the value did not change
+        - Frame dropping when ticks arrive late, counted in dropped_frames
+        - next_deadline() for callers that sleep until the next frame is due
+    """
+
+    def __init__(self, frame_interval=0.02, time_source=time.monotonic):
+        """
+        Initialize the animator.
+
+        Args:
+            frame_interval (float): Target seconds between frames.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        self.frame_interval = frame_interval
+        self.time_source = time_source
+        self._animations = {}
+        self.frames = 0
+        self.dropped_frames = 0
+
+    def start(self, key, setter, keyframes):
+        """
+        Start an animation, replacing any animation already running under the same key.
+        The first frame is written on the next tick.
+
+        Args:
+            key (str): Identifies what is being animated, e.g. "led0".
+            setter (callable): Called with each new frame value.
+            keyframes (list): (seconds from start, value) pairs in time order.
+        """
+        self._animations[key] = Animation(setter, keyframes, self.time_source())
+
+    def stop(self, key):
+        """
+        Stop the animation running under key, leaving its last written value in place.
+        """
+        self._animations.pop(key, None)
+
+    def is_running(self, key):
+        """
+        Return True if an animation is running under key.
+        """
+        return key in self._animations
+
+    def active(self):
+        """
+        Return True if any animation is running.
+        """
+        return bool(self._animations)
+
+    def next_deadline(self):
+        """
+        Return the monotonic time the next frame is due, or None when nothing is running.
+        """
+        if not self._animations:
+            return None
+        deadline = None
+        for animation in self._animations.values():
+            due = animation.start if animation.last_frame is None else animation.last_frame + self.frame_interval
+            if deadline is None or due < deadline:
+                deadline = due
+        return deadline
+
+    def tick(self):
+        """
+        Write the current frame of every running animation whose frame is due, and remove finished ones.
+        """
+        if not self._animations:
+            return
+        now = self.time_source()
+        finished = []
+        for key, animation in self._animations.items():
+            if animation.last_frame is not None:
+                # Same sum as next_deadline(), so a loop that sleeps until then always gets the frame
+                if now < animation.last_frame + self.frame_interval and now < animation.end:
+                    continue
+                late = now - animation.last_frame
+                missed = int(late / self.frame_interval) - 1
+                if missed > 0:
+                    self.dropped_frames += missed
+            value = animation.value_at(now)
+            if value != animation.last_value:
+                animation.setter(value)
+                animation.last_value = value
+                self.frames += 1
+            animation.last_frame = now
+            if now >= animation.end:
+                finished.append(key)
+        for key in finished:
+            del self._animations[key]
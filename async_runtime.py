@@ -0,0 +1,209 @@
+# async_runtime.py
+# Event-driven asyncio runtime for aclock.py, selected with "--loop async".
+# Input polling, display refresh and the alarm deadline run as separate tasks
+# that sleep until they have work instead of the 20 ms busy poll in AlarmClock.run.
+
+import asyncio
+
+
+class AsyncRuntime:
+    """
+    AsyncRuntime drives an AlarmClock with asyncio tasks instead of a fixed 20 ms loop.
+
+    Tasks:
+        - Input: polls the encoder, arcade buttons and gesture sensor, faster while a menu is open or the alarm rings.
+          With an interrupt driven input backend it sleeps until a board signals.
+        - Display: refreshes brightness, displays and the alarm check on each second boundary or when input changed state
+        - Alarm: sleeps until the next alarm instant and then wakes the display task; the alarm timer thread of the
+          clock starts the audio at that instant on its own
+    """
+
+    def __init__(self, clock, input_interval=0.02, idle_input_interval=0.1, interrupt_timeout=1.0):
+        """
+        Initialize the runtime.
+
+        Args:
+            clock (AlarmClock): The clock to drive.
+            input_interval (float): Seconds between input polls while a menu is open, the alarm rings or the gesture sensor is needed.
+            idle_input_interval (float): Seconds between input polls otherwise.
+            interrupt_timeout (float): Longest wait for an input interrupt before polling anyway.
+        """
+        self.clock = clock
+        self.input_interval = input_interval
+        self.idle_input_interval = idle_input_interval
+        self.interrupt_timeout = interrupt_timeout
+        self.input_event = None
+        self.refresh = None
+        self.alarm_changed = None
+        self.wakeups = {"input": 0, "display": 0, "alarm": 0}
+
+    def alarm_state(self):
+        """
+        Return a snapshot of the settings that decide when the alarm is due.
+        """
+        c = self.clock
+        return (c.alarms.revision, c.alarm_stat, c.alarm_time, c.period)
+
+    def ui_state(self):
+        """
+        Return a snapshot of the state shown on the displays, used to detect changes made by input.
+        """
+        c = self.clock
+        return (
+            c.alarm_settings_state, c.display_settings_state, c.alarm_set, c.display_set,
+            c.alarm_hour, c.alarm_minute, c.alarm_track, c.vol_level,
+            c.manual_dim_level, c.display_override, c.display_mode, c.alarm_ringing, c.sleep_state,
+        ) + self.alarm_state()
+
+    def gesture_needed(self):
+        """
+        Return True if the gesture sensor should be read, using the same rule as main_loop_iteration.
+        """
+        c = self.clock
+        return c.display_mode in ("AUTO_DIM", "AUTO_OFF") or c.alarm_ringing == 1 or c.sleep_state == "ON"
+
+    def next_input_interval(self):
+        """
+        Return the number of seconds until the next input poll.
+        """
+        c = self.clock
+        if c.animator.active():
+            return c.animator.frame_interval
+        if c.control is not None and c.control.active():
+            return self.input_interval
+        if c.input.interrupt_driven and c.alarm_ringing == 0:
+            return self.interrupt_timeout
+        busy = (
+            c.alarm_settings_state == 2 or c.display_settings_state == 2
+            or c.alarm_ringing == 1 or self.gesture_needed()
+        )
+        return self.input_interval if busy else self.idle_input_interval
+
+    def next_alarm_delay(self, now):
+        """
+        Return the number of seconds until the next alarm or snooze is due, or None when nothing is scheduled.
+        """
+        fire = self.clock.alarms.next_fire()
+        if fire is None:
+            return None
+        return max((fire - now).total_seconds(), 0.0)
+
+    async def input_task(self):
+        """
+        Poll input devices and wake the display task whenever input changed what is shown.
+        """
+        c = self.clock
+        while True:
+            self.wakeups["input"] += 1
+            before = self.ui_state()
+            alarm_before = self.alarm_state()
+            c.bus.begin_tick()
+            gesture_needed = self.gesture_needed()
+            c.set_gesture_sensor_state(gesture_needed)
+            c.handle_gesture(c.get_time())
+            c.check_display_wake()
+            if c.control is not None:
+                c.poll_control()
+            c.poll_rotary_encoder()
+            c.poll_arcade_buttons()
+            c.animator.tick()
+            c.bus.flush()
+            c.settings_store.tick()
+            c.health.tick()
+            c.log.tick()
+            if self.ui_state() != before:
+                self.refresh.set()
+            if self.alarm_state() != alarm_before:
+                self.alarm_changed.set()
+            interval = self.next_input_interval()
+            if c.input.interrupt_driven:
+                try:
+                    await asyncio.wait_for(self.input_event.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.input_event.clear()
+            else:
+                await asyncio.sleep(interval)
+
+    async def display_task(self):
+        """
+        Refresh brightness and displays on each second boundary (colon blink) or when woken by input or the alarm task.
+        """
+        c = self.clock
+        while True:
+            self.wakeups["display"] += 1
+            self.refresh.clear()
+            alarm_before = self.alarm_state()
+            c.bus.begin_tick()
+            now = c.get_time()
+            # A due alarm goes ahead of the display work; its audio was started by the alarm timer thread
+            alarm_first = c.alarm_timer.expired()
+            if alarm_first:
+                c.check_alarm(now)
+            if c.debug == "YES":
+                c.display_mode = c.debug_brightness(c.auto_dim, c.alarm_status(), c.display_mode, now)
+            else:
+                c.display_mode = c.brightness(c.auto_dim, c.alarm_status(), c.display_mode, now)
+            if c.display_mode != "MANUAL_OFF":
+                c.update_main_display(now)
+            elif (c.display_mode == "MANUAL_OFF" or c.display_mode == "AUTO_OFF"):
+                c.handle_display_off()
+            if not alarm_first and (c.alarms.armed() or c.ring_state != "IDLE"):
+                c.check_alarm(now)
+            c.bus.flush()
+            c.arm_alarm_timer()
+            c.report_bus_stats()
+            if self.alarm_state() != alarm_before:
+                self.alarm_changed.set()
+            # Sleep until the next second boundary unless woken earlier
+            now = c.get_time()
+            delay = 1.0 - now.microsecond / 1_000_000
+            try:
+                await asyncio.wait_for(self.refresh.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def alarm_task(self):
+        """
+        Sleep until the alarm deadline, then wake the display task so the alarm starts on time.
+        Alarm setting changes wake this task early to recompute the deadline.
+        """
+        c = self.clock
+        while True:
+            self.wakeups["alarm"] += 1
+            self.alarm_changed.clear()
+            delay = self.next_alarm_delay(c.get_time())
+            if delay is not None and delay <= 0:
+                # Due now; the display task runs check_alarm on its next pass
+                self.refresh.set()
+                delay = None
+            timeout = 60.0 if delay is None else min(delay, 60.0)
+            try:
+                await asyncio.wait_for(self.alarm_changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        """
+        Start all tasks and run until one of them fails or the runtime is cancelled.
+        """
+        self.refresh = asyncio.Event()
+        self.alarm_changed = asyncio.Event()
+        self.input_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self.clock.input.add_listener(lambda: loop.call_soon_threadsafe(self.input_event.set))
+        if self.clock.control is not None:
+            # The epoll selector of the control API becomes readable when a client connects or sends a request
+            loop.add_reader(self.clock.control.selector.fileno(), self.input_event.set)
+        tasks = [
+            asyncio.create_task(self.input_task()),
+            asyncio.create_task(self.display_task()),
+            asyncio.create_task(self.alarm_task()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.clock.control is not None:
+                loop.remove_reader(self.clock.control.selector.fileno())
@@ -0,0 +1,197 @@
+# audio_cache.py
+# In-memory cache of decoded alarm tracks for aclock.py.
+# Tracks are decoded to PCM once with pygame.mixer.Sound and kept under a byte
+# budget with LRU eviction, so the alarm loops a track with no reload gap and
+# no SD card reads while it rings. The mixer can be created lazily, so pygame
+# is only imported once a track is needed.
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class AudioCache:
+    """
+    AudioCache decodes alarm tracks once and plays them from memory.
+
+    Features:
+        - Decode at startup (preload, safe to run on a background thread) or on first use
+        - Mixer created on first use when given as a factory
+        - Configurable byte budget with least recently used eviction
+        - Seamless looping with loops=-1 on a mixer channel
+        - Counters for hits, misses, evictions and per-track decode time
+    """
+
+    def __init__(self, mixer, tracks, budget_bytes=32 * 1024 * 1024, logger=None):
+        """
+        Initialize the cache.
+
+        Args:
+            mixer: An initialized pygame.mixer module, or a callable returning one that is called on first use.
+            tracks (dict): Track number to audio file path.
+            budget_bytes (int): Most decoded PCM bytes to keep in memory.
+            logger: Logger used for decode and playback errors.
+        """
+        self._mixer_factory = mixer if callable(mixer) else None
+        self.mixer = None if callable(mixer) else mixer
+        # Guards the mixer, the cache and the playing channel against the preload and alarm timer threads.
+        # Never held while a track is decoded, so a decode does not hold up playback on another thread.
+        self._lock = threading.RLock()
+        self.tracks = tracks
+        self.budget_bytes = budget_bytes
+        self.logger = logger
+        self._sounds = OrderedDict()  # track -> (Sound, size in bytes), least recently used first
+        self.bytes_used = 0
+        self.channel = None
+        self.playing_track = None
+        self.playing_sound = None
+        # play() calls in progress; busy() counts them as playing
+        self._starting = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.decode_times = {}
+
+    def preload(self):
+        """
+        Decode every track up front, stopping once the budget is full.
+        """
+        for track in self.tracks:
+            with self._lock:
+                if track in self._sounds:
+                    continue
+            sound, size = self._decode(track)
+            with self._lock:
+                if track in self._sounds:
+                    continue
+                if self.bytes_used + size > self.budget_bytes:
+                    break
+                self._store(track, sound, size)
+
+    def get_mixer(self):
+        """
+        Return the mixer, creating it with the factory on first use.
+        """
+        with self._lock:
+            if self.mixer is None:
+                self.mixer = self._mixer_factory()
+            return self.mixer
+
+    def get(self, track):
+        """
+        Return the decoded Sound for a track, decoding it on a miss.
+
+        Args:
+            track (int): Track number.
+        """
+        with self._lock:
+            entry = self._sounds.get(track)
+            if entry is not None:
+                self.hits += 1
+                self._sounds.move_to_end(track)
+                return entry[0]
+            self.misses += 1
+        sound, size = self._decode(track)
+        with self._lock:
+            entry = self._sounds.get(track)
+            if entry is not None:
+                # Decoded by another thread meanwhile
+                return entry[0]
+            self._store(track, sound, size)
+        return sound
+
+    def _decode(self, track):
+        mixer = self.get_mixer()
+        start = time.perf_counter()
+        sound = mixer.Sound(self.tracks[track])
+        self.decode_times[track] = time.perf_counter() - start
+        frequency, size_format, channels = mixer.get_init()
+        size = int(sound.get_length() * frequency) * channels * (abs(size_format) // 8)
+        return sound, size
+
+    def _store(self, track, sound, size):
+        if size > self.budget_bytes:
+            # Too big to cache; it is played once from the decoded copy and dropped
+            return
+        while self._sounds and self.bytes_used + size > self.budget_bytes:
+            victim = next(iter(self._sounds))
+            if victim == self.playing_track and len(self._sounds) == 1:
+                break
+            if victim == self.playing_track:
+                self._sounds.move_to_end(victim)
+                continue
+            _sound, victim_size = self._sounds.pop(victim)
+            self.bytes_used -= victim_size
+            self.evictions += 1
+        self._sounds[track] = (sound, size)
+        self.bytes_used += size
+
+    def play(self, track, volume, loops=-1):
+        """
+        Start a track from memory, stopping whatever the cache was playing.
+
+        Args:
+            track (int): Track number.
+            volume (float): 0.0 to 1.0.
+            loops (int): -1 to loop until stopped, 0 to play once.
+        """
+        # busy() reports a track being started as playing, also while it is decoded on a miss
+        with self._lock:
+            self._starting += 1
+        try:
+            sound = self.get(track)
+            with self._lock:
+                self.stop()
+                # Volume first, so the track never starts louder than asked
+                sound.set_volume(volume)
+                self.channel = sound.play(loops=loops)
+                self.playing_sound = sound
+                self.playing_track = track
+        except Exception as e:
+            if self.logger:
+                self.logger.error("Audio play error: %s", str(e))
+        finally:
+            with self._lock:
+                self._starting -= 1
+
+    def set_volume(self, volume):
+        """
+        Set the volume of the playing track, 0.0 to 1.0.
+        """
+        with self._lock:
+            if self.playing_sound is not None:
+                self.playing_sound.set_volume(volume)
+
+    def busy(self):
+        """
+        Return True if a track started by the cache is still playing.
+        """
+        with self._lock:
+            return bool(self._starting) or (self.channel is not None and self.channel.get_busy())
+
+    def stop(self):
+        """
+        Stop the playing track, if any.
+        """
+        with self._lock:
+            if self.channel is not None:
+                self.channel.stop()
+            self.channel = None
+            self.playing_track = None
+            self.playing_sound = None
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Hits, misses, evictions, cached tracks, bytes used and decode times in milliseconds.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "tracks": len(self._sounds),
+            "bytes_used": self.bytes_used,
+            "decode_ms": {track: round(seconds * 1000, 1) for track, seconds in self.decode_times.items()},
+        }
@@ -0,0 +1,533 @@
+# benchmark.py
+# Benchmarks for the aclock.py hot paths.
+# Runs AlarmClock on the simulated hardware and a virtual clock, so it needs no
+# Pi and no Adafruit libraries. For each benchmark it reports CPU time, memory
+# allocated and I2C transactions and bytes per iteration, can save the results
+# as a JSON baseline and flags regressions against a saved baseline.
+#
+#   python benchmark.py --save baseline.json
+#   python benchmark.py --compare baseline.json --threshold 0.2
+#   python benchmark.py --startup --startup-budget 500
+#   python benchmark.py --faults
+#   python benchmark.py --alarm-latency
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from alarms import Alarm, EVERY_DAY, WEEKEND_ONLY
+from clock import SystemClock, VirtualClock
+from hardware import create_hardware
+from sim_hardware import FAULT_ADDRESSES
+
+# Virtual start times that put the default brightness schedule in each display mode;
+# AUTO_OFF also needs the display override turned off
+MODE_START_TIMES = {
+    "MANUAL_DIM": datetime.datetime(2026, 1, 5, 12, 0, 0),
+    "AUTO_DIM": datetime.datetime(2026, 1, 5, 22, 30, 0),
+    "AUTO_OFF": datetime.datetime(2026, 1, 5, 3, 0, 0),
+}
+# Seconds of virtual time between main loop passes, as in AlarmClock.run() with wake_on_events off
+LOOP_INTERVAL = 0.02
+# Metrics compared against a baseline, and the smallest change worth reporting for each
+METRIC_FLOORS = {
+    "cpu_us": 2.0,
+    "alloc_peak_bytes": 64,
+    "alloc_net_bytes": 64,
+    "i2c_transactions": 0.05,
+    "i2c_bytes": 0.5,
+    "bus_time_us": 5.0,
+}
+# Most milliseconds from process start to the time on the numeric display
+STARTUP_BUDGET_MS = 500
+# Run in a fresh interpreter by check_startup(), with the simulator modelling the I2C transaction time
+STARTUP_SCRIPT = """
+import json, sys
+sys.path.insert(0, {path!r})
+import aclock
+from hardware import create_hardware
+from sim_hardware import FAULT_ADDRESSES
+clock = aclock.AlarmClock(hardware=create_hardware("sim", latency=True))
+clock.startup.wait(10)
+clock.shutdown()
+print(json.dumps(clock.startup.summary()))
+"""
+
+# Seconds each injected device fault lasts in check_faults(); the "bus" fault lasts until bus recovery
+FAULT_SECONDS = 2.0
+# Most seconds of virtual time check_faults() waits for a device to recover
+FAULT_TIMEOUT = 60.0
+# Alarms fired by check_alarm_latency(), and the seconds each display refresh is stalled meanwhile
+LATENCY_FIRINGS = 10
+LATENCY_DISPLAY_STALL = 0.25
+
+
+def make_clock(start, latency=False):
+    """
+    Return an AlarmClock on simulated hardware and a virtual clock starting at start, with settings in the current directory.
+
+    Args:
+        start (datetime): Virtual wall time to start at.
+        latency (bool): Model the 100 kHz I2C transaction time, which advances virtual time.
+    """
+    import aclock
+    vclock = VirtualClock(start)
+    hardware = create_hardware("sim", latency=latency, time_source=vclock.monotonic, sleep=vclock.sleep)
+    clock = aclock.AlarmClock(hardware=hardware, clock=vclock)
+    return clock
+
+
+def loop_benchmark(mode):
+    """
+    Return a benchmark of main_loop_iteration() in the given display mode.
+    """
+    def setup(latency):
+        clock = make_clock(MODE_START_TIMES[mode], latency)
+        if mode == "AUTO_OFF":
+            clock.display_override = "OFF"
+
+        def step():
+            clock.main_loop_iteration()
+            clock.clock.sleep(LOOP_INTERVAL)
+        step()
+        if clock.display_mode != mode:
+            raise RuntimeError(f"expected display mode {mode}, got {clock.display_mode}")
+        return clock, step
+    return setup
+
+
+def brightness_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+
+    def step():
+        # A minute per call, so every window boundary of the day is crossed
+        clock.clock.advance(60)
+        clock.display_mode = clock.brightness(clock.auto_dim, clock.alarm_status(), clock.display_mode, clock.get_time())
+    return clock, step
+
+
+def main_display_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+
+    def step():
+        clock.bus.begin_tick()
+        clock.update_main_display(clock.get_time())
+        clock.bus.flush()
+        clock.clock.sleep(LOOP_INTERVAL)
+    return clock, step
+
+
+def alpha_display_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+    # Alarm menu open on the hour/minute step, the alpha display's busiest state
+    clock.alarm_settings_state = 2
+    clock.alarm_set = 2
+
+    def step():
+        clock.bus.begin_tick()
+        clock.update_alpha_display(clock.get_time())
+        clock.bus.flush()
+        clock.clock.sleep(LOOP_INTERVAL)
+    return clock, step
+
+
+def encoder_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+
+    def step():
+        clock.bus.begin_tick()
+        clock.poll_rotary_encoder()
+        clock.bus.flush()
+        clock.clock.sleep(LOOP_INTERVAL)
+    return clock, step
+
+
+def alarm_cycle_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+    # A few hundred other alarms in the index, none due during the benchmark
+    for minute in range(300):
+        clock.alarms.add(Alarm(f"X{minute}", 3 + minute // 60, minute % 60, WEEKEND_ONLY), clock.get_time())
+    alarm = clock.alarms.add(Alarm("B", 0, 0, EVERY_DAY, enabled=False), clock.get_time())
+
+    def step():
+        # Alarm at the next minute, reached one second from now, snoozed by a hand wave five seconds
+        # into the ring, then the cooldown runs out and the snooze is dismissed
+        now = clock.get_time()
+        fire = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        clock.clock.advance((fire - now).total_seconds() - 1)
+        alarm.hour, alarm.minute, alarm.enabled = fire.hour, fire.minute, True
+        clock.alarms.update(alarm, clock.get_time())
+        clock.hardware.wave(0x04, 6.0)
+        deadline = clock.clock.monotonic() + 60
+        while clock.clock.monotonic() < deadline:
+            clock.main_loop_iteration()
+            clock.clock.sleep(LOOP_INTERVAL)
+            if clock.ring_state == "IDLE" and clock.sleep_state == "ON":
+                break
+        else:
+            raise RuntimeError("alarm ring-and-snooze cycle did not complete")
+        clock.dismiss_alarm()
+        alarm.enabled = False
+        clock.alarms.update(alarm, clock.get_time())
+    return clock, step
+
+
+def idle_minute_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["MANUAL_DIM"], latency)
+
+    def step():
+        # A minute with nothing to do, sleeping until next_wake() as AlarmClock.run() does
+        end = clock.clock.monotonic() + 60
+        while clock.clock.monotonic() < end:
+            clock.main_loop_iteration()
+            delay, _reason = clock.next_wake(clock.get_time())
+            clock.input.wait(delay)
+    return clock, step
+
+
+def display_wake_benchmark(latency):
+    clock = make_clock(MODE_START_TIMES["AUTO_OFF"], latency)
+    clock.display_override = "OFF"
+
+    def step():
+        # A hand wave while the display is off; the loop keeps running through the wake and the fade out
+        wakes = clock.display_wakes
+        clock.hardware.wave(0x04, 0.5)
+        deadline = clock.clock.monotonic() + 30
+        while clock.clock.monotonic() < deadline:
+            start = clock.clock.monotonic()
+            clock.main_loop_iteration()
+            if clock.clock.monotonic() - start > 0.1:
+                raise RuntimeError("display wake blocked the main loop")
+            if clock.display_wakes > wakes and clock.display_wake_until is None:
+                break
+            delay, _reason = clock.next_wake(clock.get_time())
+            clock.input.wait(delay)
+        else:
+            raise RuntimeError("display wake did not end")
+    return clock, step
+
+
+# name -> (setup(latency) returning (clock, step), default iterations)
+BENCHMARKS = {
+    "loop_manual_dim": (loop_benchmark("MANUAL_DIM"), 2000),
+    "loop_auto_dim": (loop_benchmark("AUTO_DIM"), 2000),
+    "loop_auto_off": (loop_benchmark("AUTO_OFF"), 2000),
+    "brightness": (brightness_benchmark, 5000),
+    "update_main_display": (main_display_benchmark, 2000),
+    "update_alpha_display": (alpha_display_benchmark, 2000),
+    "poll_rotary_encoder": (encoder_benchmark, 5000),
+    "alarm_ring_snooze_cycle": (alarm_cycle_benchmark, 5),
+    "idle_minute": (idle_minute_benchmark, 20),
+    "display_wake": (display_wake_benchmark, 20),
+}
+
+
+def run_benchmark(setup, iterations, latency=False, warmup=10):
+    """
+    Run one benchmark and return its per-iteration metrics.
+
+    CPU time is measured in a plain run. Allocations are measured in a second run under tracemalloc:
+    alloc_peak_bytes is the average peak of memory allocated within one iteration, alloc_net_bytes the
+    memory still held per iteration afterwards.
+
+    Args:
+        setup (callable): Returns (clock, step) for a fresh AlarmClock.
+        iterations (int): Iterations to measure.
+        latency (bool): Model the I2C transaction time.
+        warmup (int): Iterations run before measuring.
+    """
+    clock, step = setup(latency)
+    bus = clock.hardware.bus
+    for _ in range(warmup):
+        step()
+    transactions, nbytes, bus_time = bus.transactions, bus.bytes, bus.bus_time
+    start = time.process_time()
+    for _ in range(iterations):
+        step()
+    cpu = time.process_time() - start
+    transactions = bus.transactions - transactions
+    nbytes = bus.bytes - nbytes
+    bus_time = bus.bus_time - bus_time
+
+    tracemalloc.start()
+    try:
+        first = tracemalloc.get_traced_memory()[0]
+        peak_total = 0
+        for _ in range(iterations):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            step()
+            peak_total += tracemalloc.get_traced_memory()[1] - before
+        net = tracemalloc.get_traced_memory()[0] - first
+    finally:
+        tracemalloc.stop()
+    clock.shutdown()
+    return {
+        "iterations": iterations,
+        "cpu_us": round(cpu / iterations * 1e6, 2),
+        "alloc_peak_bytes": round(peak_total / iterations, 1),
+        "alloc_net_bytes": round(net / iterations, 1),
+        "i2c_transactions": round(transactions / iterations, 3),
+        "i2c_bytes": round(nbytes / iterations, 2),
+        "bus_time_us": round(bus_time / iterations * 1e6, 1),
+    }
+
+
+def check_startup(runs=3):
+    """
+    Start AlarmClock in fresh processes on the simulated hardware and return the startup timeline of the
+    run with the slowest first frame. Must be called from a scratch directory, as settings are written there.
+
+    Args:
+        runs (int): Processes to start.
+    Returns:
+        dict: StartupTimeline.summary() of the slowest run.
+    """
+    script = STARTUP_SCRIPT.format(path=os.path.dirname(os.path.abspath(__file__)))
+    worst = None
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+        summary = json.loads(output.strip().splitlines()[-1])
+        if worst is None or summary["milestones"]["first_frame"] > worst["milestones"]["first_frame"]:
+            worst = summary
+    return worst
+
+
+def check_faults(fault_seconds=FAULT_SECONDS, timeout=FAULT_TIMEOUT):
+    """
+    Inject an I2C fault on each simulated device in turn and measure how long it takes to be back in service.
+    The clock runs on virtual time in AUTO_DIM mode with the alarm menu open and the encoder turned once a
+    second, so every device has traffic. Must be called from a scratch directory.
+
+    Args:
+        fault_seconds (float): Length of each device fault.
+        timeout (float): Seconds of virtual time to wait for the recovery.
+    Returns:
+        dict: Per FAULT_ADDRESSES name: outage_s (first failed access until back in service), lag_s (end of
+            the fault until back in service; for "bus", start of the fault), errors, error lines logged and
+            bus recoveries.
+    """
+    results = {}
+    for device in FAULT_ADDRESSES:
+        clock = make_clock(MODE_START_TIMES["AUTO_DIM"])
+        clock.alarm_settings_state = 2
+        clock.alarm_set = 2
+        for second in range(int(timeout)):
+            clock.hardware.turn_encoder(1, second + 0.5)
+        clock.hardware.fail_device(device, None if device == "bus" else fault_seconds, delay=1.0)
+        fault_end = clock.clock.monotonic() + 1.0 + (0.0 if device == "bus" else fault_seconds)
+        health = clock.health
+        deadline = clock.clock.monotonic() + timeout
+        while clock.clock.monotonic() < deadline:
+            clock.main_loop_iteration()
+            tripped = [breaker for breaker in health.breakers.values() if breaker.trips]
+            if tripped and not health.failing():
+                break
+            delay, _reason = clock.next_wake(clock.get_time())
+            clock.input.wait(delay)
+        else:
+            raise RuntimeError(f"{device} did not recover within {timeout:g} s")
+        lag = clock.clock.monotonic() - fault_end
+        clock.shutdown()
+        results[device] = {
+            "outage_s": round(max(breaker.recovery_times[-1] for breaker in tripped), 3),
+            "lag_s": round(lag, 3),
+            "errors": health.errors,
+            "logged": sum(breaker.logged for breaker in health.breakers.values()),
+            "bus_recoveries": health.bus_recoveries,
+        }
+    return results
+
+
+class ShiftedClock(SystemClock):
+    """
+    SystemClock whose wall time is moved by offset, so a minute boundary can be put a moment ahead.
+    Monotonic time and sleeps stay real.
+    """
+
+    def __init__(self):
+        self.offset = datetime.timedelta(0)
+
+    def now(self):
+        return datetime.datetime.now() + self.offset
+
+
+def check_alarm_latency(firings=LATENCY_FIRINGS, stall=LATENCY_DISPLAY_STALL, lead=0.3, timeout=5.0):
+    """
+    Fire alarms in real time on the simulated hardware and return the alarm-to-first-audio latency.
+    Each display refresh is stalled for stall seconds, standing in for a slow cosmetic pass, so an alarm
+    that waited for the main loop would be late by up to that much. Must be called from a scratch directory.
+
+    Args:
+        firings (int): Alarms to fire.
+        stall (float): Seconds added to every update_main_display() call.
+        lead (float): Seconds between arming an alarm and its scheduled minute.
+        timeout (float): Most seconds to wait for one alarm to become audible.
+    Returns:
+        dict: AlarmLatency.summary() of the firings.
+    """
+    import aclock
+    wall = ShiftedClock()
+    clock = aclock.AlarmClock(hardware=create_hardware("sim", latency=True), clock=wall)
+    clock.startup.wait(10)
+    update_main_display = clock.update_main_display
+
+    def stalled_update(now):
+        update_main_display(now)
+        time.sleep(stall)
+    clock.update_main_display = stalled_update
+    try:
+        for firing in range(firings):
+            # Put the wall clock lead seconds before a fresh minute and schedule a one-shot alarm on it
+            fire = datetime.datetime(2026, 1, 5, 7, 0) + datetime.timedelta(minutes=firing)
+            wall.offset = fire - datetime.timedelta(seconds=lead) - datetime.datetime.now()
+            clock.alarms.add(Alarm(f"L{firing}", fire.hour, fire.minute, date=fire.date()), clock.get_time())
+            deadline = time.monotonic() + timeout
+            while clock.alarm_latency.count <= firing or clock.ring_state != "RINGING":
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"alarm {firing} not audible within {timeout:g} s")
+                clock.main_loop_iteration()
+                delay, _reason = clock.next_wake(clock.get_time())
+                clock.input.wait(delay)
+            clock.dismiss_alarm()
+            clock.main_loop_iteration()
+    finally:
+        clock.shutdown()
+    return clock.alarm_latency.summary()
+
+
+def compare(results, baseline, threshold):
+    """
+    Return the regressions of results against a baseline.
+
+    A metric regresses when it grew by more than threshold (a fraction) and by more than its METRIC_FLOORS entry.
+
+    Returns:
+        list: (benchmark, metric, baseline value, new value) tuples.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        for metric, floor in METRIC_FLOORS.items():
+            if metric not in old:
+                continue
+            if metrics[metric] > old[metric] * (1 + threshold) and metrics[metric] - old[metric] > floor:
+                regressions.append((name, metric, old[metric], metrics[metric]))
+    return regressions
+
+
+def print_table(results):
+    columns = ("cpu_us", "alloc_peak_bytes", "alloc_net_bytes", "i2c_transactions", "i2c_bytes", "bus_time_us")
+    print(f"{'benchmark':26}" + "".join(f"{column:>18}" for column in columns))
+    for name, metrics in results.items():
+        print(f"{name:26}" + "".join(f"{metrics[column]:>18}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the aclock.py hot paths on simulated hardware")
+    parser.add_argument("names", nargs="*", metavar="BENCHMARK", help=f"benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, help="iterations per benchmark instead of each benchmark's default")
+    parser.add_argument("--latency", action="store_true", help="model the 100 kHz I2C transaction time")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a JSON baseline and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed growth per metric as a fraction (default 0.2)")
+    parser.add_argument("--startup", action="store_true",
+                        help="start aclock.py in fresh processes and exit 1 if the first frame misses the startup budget")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS",
+                        help=f"milliseconds from process start to the first frame (default {STARTUP_BUDGET_MS})")
+    parser.add_argument("--faults", action="store_true",
+                        help="inject an I2C fault on each simulated device and report how long it takes to recover")
+    parser.add_argument("--alarm-latency", action="store_true",
+                        help="fire alarms in real time behind a stalled display and exit 1 if the p99 audio latency misses the target")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    names = args.names or ([] if args.startup or args.faults or args.alarm_latency else list(BENCHMARKS))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    results = {}
+    startup = None
+    faults = None
+    alarm_latency = None
+    cwd = os.getcwd()
+    # AlarmClock reads and writes settings.json and its log in the working directory
+    with tempfile.TemporaryDirectory() as workdir, open(os.devnull, "w") as devnull:
+        os.chdir(workdir)
+        try:
+            if args.startup:
+                startup = check_startup()
+            if args.faults:
+                with contextlib.redirect_stdout(devnull):
+                    faults = check_faults()
+            if args.alarm_latency:
+                with contextlib.redirect_stdout(devnull):
+                    alarm_latency = check_alarm_latency()
+            for name in names:
+                setup, iterations = BENCHMARKS[name]
+                with contextlib.redirect_stdout(devnull):
+                    results[name] = run_benchmark(setup, args.iterations or iterations, args.latency)
+        finally:
+            os.chdir(cwd)
+
+    status = 0
+    if startup is not None:
+        first_frame = startup["milestones"]["first_frame"]
+        for step in startup["steps"]:
+            where = "background" if step["background"] else "foreground"
+            print(f"{step['step']:16}{step['start_ms']:>10} ms{step['duration_ms']:>10} ms  {where}")
+        print(f"first frame {first_frame} ms after process start, budget {args.startup_budget:g} ms")
+        if first_frame > args.startup_budget:
+            print("REGRESSION startup first_frame over budget")
+            status = 1
+    if faults is not None:
+        columns = ("outage_s", "lag_s", "errors", "logged", "bus_recoveries")
+        print(f"{'fault':16}" + "".join(f"{column:>16}" for column in columns))
+        for device, metrics in faults.items():
+            print(f"{device:16}" + "".join(f"{metrics[column]:>16}" for column in columns))
+    if alarm_latency is not None:
+        print(f"alarm latency over {alarm_latency['firings']} firings: p50 {alarm_latency['p50_ms']} ms, p99 {alarm_latency['p99_ms']} ms, "
+              f"max {alarm_latency['max_ms']} ms, started by {alarm_latency['sources']}")
+        if alarm_latency["p99_ms"] > alarm_latency["target_ms"]:
+            print(f"REGRESSION alarm latency p99 over the {alarm_latency['target_ms']:g} ms target")
+            status = 1
+    if not results:
+        return status
+    print_table(results)
+    if save_path:
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "latency": args.latency,
+            "results": results,
+        }
+        with open(save_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {save_path}")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old} -> {new}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# brightness_schedule.py
+# Compiled minute-of-day table for the display mode rules in AlarmClock.brightness().
+# The time windows are parsed once and expanded into 1440 entries, so looking up
+# the display mode is a list index instead of a series of strptime() calls.
+
+MINUTES_PER_DAY = 1440
+WINDOW_NAMES = (
+    "manual_dim_start", "manual_dim_end", "auto_dim_start",
+    "auto_dim_end", "auto_off_start", "auto_off_end",
+)
+# Start of the "display off until the alarm" window used when the alarm is on
+ALARM_OFF_START = 1  # 00:01
+
+
+def minute_of_day(hhmm):
+    """
+    Convert an "HH:MM" string to minutes since midnight.
+    """
+    hour, minute = hhmm.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+class BrightnessSchedule:
+    """
+    BrightnessSchedule compiles the brightness time windows into per-minute display mode tables.
+
+    A table entry is the display mode for any instant inside that minute, or None where no window
+    applies and the current mode is kept. Tables are built lazily per weekday, alarm status and
+    display override, and thrown away only when a window or the alarm time changes.
+
+    Comparisons are made at minute resolution: "start < now" and "start <= now" agree for every
+    instant after hh:mm:00.000000, which is all dt.now() ever returns in practice.
+    """
+
+    def __init__(self, windows, weekday_windows=None):
+        """
+        Initialize the schedule.
+
+        Args:
+            windows (dict): "HH:MM" strings keyed by the names in WINDOW_NAMES.
+            weekday_windows (dict): Weekday (0 = Monday) to a dict of windows that replace the defaults on that day.
+        """
+        self._windows = None
+        self._alarm_minute = None
+        self.weekday_windows = dict(weekday_windows or {})
+        self._tables = {}
+        self._changes = {}
+        self.compiles = 0
+        self.compile(tuple(windows[name] for name in WINDOW_NAMES), 0)
+
+    def compile(self, windows, alarm_minute):
+        """
+        Drop the compiled tables if the windows or alarm time differ from the last call.
+
+        Args:
+            windows (tuple): "HH:MM" strings in WINDOW_NAMES order.
+            alarm_minute (int): Alarm time as minutes since midnight.
+        Returns:
+            bool: True if the tables were invalidated.
+        """
+        if windows == self._windows and alarm_minute == self._alarm_minute:
+            return False
+        self._windows = windows
+        self._alarm_minute = alarm_minute
+        self._tables = {}
+        self._changes = {}
+        return True
+
+    def set_weekday_windows(self, weekday, windows):
+        """
+        Replace the windows used on one weekday, or restore the defaults when windows is None.
+
+        Args:
+            weekday (int): 0 = Monday ... 6 = Sunday.
+            windows (dict): Window names to "HH:MM" strings, may be partial.
+        """
+        if windows:
+            self.weekday_windows[weekday] = dict(windows)
+        else:
+            self.weekday_windows.pop(weekday, None)
+        self._tables = {}
+        self._changes = {}
+
+    def lookup(self, minute, weekday, alarm_stat, display_override):
+        """
+        Return the display mode for a minute of the day, or None to keep the current mode.
+
+        Args:
+            minute (int): Minutes since midnight.
+            weekday (int): 0 = Monday ... 6 = Sunday.
+            alarm_stat (str): Alarm status ("ON"/"OFF").
+            display_override (str): Display override ("ON"/"OFF").
+        """
+        return self._table(weekday, alarm_stat, display_override)[minute]
+
+    def minutes_to_change(self, minute, weekday, alarm_stat, display_override):
+        """
+        Return the number of minutes from the start of minute until the table entry differs from
+        lookup(minute, ...), or until midnight if it stays the same for the rest of the day.
+
+        Args:
+            minute (int): Minutes since midnight.
+            weekday (int): 0 = Monday ... 6 = Sunday.
+            alarm_stat (str): Alarm status ("ON"/"OFF").
+            display_override (str): Display override ("ON"/"OFF").
+        """
+        day = weekday if weekday in self.weekday_windows else None
+        key = (day, alarm_stat, display_override)
+        changes = self._changes.get(key)
+        if changes is None:
+            table = self._table(weekday, alarm_stat, display_override)
+            # Walk backwards: each entry is the first later minute with a different mode
+            changes = [MINUTES_PER_DAY] * MINUTES_PER_DAY
+            for m in range(MINUTES_PER_DAY - 2, -1, -1):
+                changes[m] = m + 1 if table[m + 1] != table[m] else changes[m + 1]
+            self._changes[key] = changes
+        return changes[minute] - minute
+
+    def _table(self, weekday, alarm_stat, display_override):
+        day = weekday if weekday in self.weekday_windows else None
+        key = (day, alarm_stat, display_override)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._build(day, alarm_stat, display_override)
+            self._tables[key] = table
+        return table
+
+    def _build(self, day, alarm_stat, display_override):
+        self.compiles += 1
+        windows = dict(zip(WINDOW_NAMES, self._windows))
+        if day is not None:
+            windows.update(self.weekday_windows[day])
+        ms, me, ds, de, os_, oe = (minute_of_day(windows[name]) for name in WINDOW_NAMES)
+        alarm = self._alarm_minute
+        off = display_override == "OFF"
+        table = [None] * MINUTES_PER_DAY
+        for m in range(MINUTES_PER_DAY):
+            mode = None
+            if ms <= m < me:
+                mode = "MANUAL_DIM"
+            elif ds <= m < de:
+                mode = "AUTO_DIM"
+            if alarm_stat == "OFF":
+                if os_ <= m < oe and off:
+                    mode = "AUTO_OFF"
+            elif alarm_stat == "ON":
+                if ALARM_OFF_START <= m < alarm and off:
+                    mode = "AUTO_OFF"
+                if alarm <= m < ms:
+                    mode = "MANUAL_DIM"
+            table[m] = mode
+        return table
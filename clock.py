@@ -0,0 +1,101 @@
+# clock.py
+# Time sources for aclock.py.
+# Every part of the clock reads the wall time, the monotonic time and sleeps
+# through one clock object. SystemClock is the real time; VirtualClock only
+# moves when something sleeps, so a full day of main loop passes runs in
+# seconds.
+
+import threading
+import time
+import datetime
+from datetime import datetime as dt
+
+
+class SystemClock:
+    """
+    SystemClock reads the real time and sleeps for real.
+    """
+    realtime = True
+
+    def now(self):
+        """
+        Return the current local datetime.
+        """
+        return dt.now()
+
+    def monotonic(self):
+        """
+        Return seconds from a monotonic clock.
+        """
+        return time.monotonic()
+
+    def time(self):
+        """
+        Return seconds since the epoch.
+        """
+        return time.time()
+
+    def sleep(self, seconds):
+        """
+        Block for the given number of seconds.
+        """
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    VirtualClock keeps simulated time that only advances when sleep() or advance() is called.
+
+    Features:
+        - Starts at any datetime, e.g. just before an alarm or a brightness boundary
+        - speed=0 runs as fast as possible; speed=N also sleeps for real 1/N of every virtual sleep
+        - Safe to share between threads; every sleep advances the same timeline
+    """
+    realtime = False
+
+    def __init__(self, start=None, speed=0):
+        """
+        Initialize the clock.
+
+        Args:
+            start (datetime): Virtual wall time at creation. Defaults to the real current time.
+            speed (float): Virtual seconds per real second, or 0 to not wait at all.
+        """
+        self.start = dt.now() if start is None else start
+        self.speed = speed
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def now(self):
+        """
+        Return the virtual local datetime.
+        """
+        return self.start + datetime.timedelta(seconds=self._elapsed)
+
+    def monotonic(self):
+        """
+        Return virtual seconds since the clock was created.
+        """
+        return self._elapsed
+
+    def time(self):
+        """
+        Return virtual seconds since the epoch.
+        """
+        return self.start.timestamp() + self._elapsed
+
+    def advance(self, seconds):
+        """
+        Move virtual time forward without waiting.
+        """
+        if seconds > 0:
+            with self._lock:
+                self._elapsed += seconds
+
+    def sleep(self, seconds):
+        """
+        Advance virtual time by the given number of seconds, waiting for real only when speed is set.
+        """
+        if self.speed and seconds > 0:
+            time.sleep(seconds / self.speed)
+        self.advance(seconds)
@@ -0,0 +1,470 @@
+# control_api.py
+# Local JSON control API for aclock.py.
+# A non-blocking Unix domain socket server that the main loop polls once per
+# pass. Each request is one line of JSON and gets one line of JSON back.
+# Requests read the clock state, edit the alarms, set brightness and the display
+# override, and snooze or dismiss a ringing alarm. A batch applies many changes
+# at once: all of them are checked first, then applied with a single settings
+# write and a single display refresh. Every poll handles a bounded number of
+# requests, so a busy client cannot stall the clock face.
+#
+#   echo '{"id": 1, "cmd": "get_state"}' | socat - UNIX-CONNECT:aclock.sock
+
+import datetime
+import json
+import os
+import selectors
+import socket
+import stat
+import time
+
+from alarms import Alarm
+
+CONTROL_SOCKET = "aclock.sock"
+# Longest request line; a client that sends more without a newline is disconnected
+MAX_LINE_BYTES = 64 * 1024
+DIM_LEVELS = range(16)
+
+
+class _Client:
+    # Per-connection buffers: bytes received but not handled yet, and bytes waiting to be sent
+
+    def __init__(self):
+        self.inbox = b""
+        self.outbox = b""
+        self.eof = False
+
+
+class ControlServer:
+    """
+    ControlServer accepts clients on a Unix domain socket and answers newline-delimited JSON requests.
+
+    Features:
+        - Non-blocking sockets on a selector that poll() checks without waiting
+        - At most max_requests requests and budget seconds of handling per poll(); the rest waits for the next pass
+        - Responses that do not fit the socket buffer are queued and sent as the client reads them
+        - Counters for clients, requests, errors and deferred requests
+    """
+
+    def __init__(self, handler, path=CONTROL_SOCKET, logger=None, max_clients=8, max_requests=8, budget=0.005,
+                 time_source=time.monotonic):
+        """
+        Create the socket and start listening.
+
+        Args:
+            handler (callable): Called with each decoded request dict and returns the response dict.
+            path (str): Socket path. A stale socket file left by an earlier run is replaced.
+            logger: Logger used for client errors.
+            max_clients (int): Connections accepted at once; more are closed right away.
+            max_requests (int): Requests handled per poll().
+            budget (float): Seconds of request handling per poll(), checked between requests.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        self.handler = handler
+        self.path = path
+        self.logger = logger
+        self.max_clients = max_clients
+        self.max_requests = max_requests
+        self.budget = budget
+        self.time_source = time_source
+        try:
+            if stat.S_ISSOCK(os.stat(path).st_mode):
+                os.unlink(path)
+        except FileNotFoundError:
+            pass
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Created owner and group only, so no other user can connect between bind() and chmod()
+        umask = os.umask(0o117)
+        try:
+            self.sock.bind(path)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o660)
+        self.sock.listen(max_clients)
+        self.sock.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        # socket -> _Client
+        self.clients = {}
+        self.accepted = 0
+        self.requests = 0
+        self.errors = 0
+        self.deferred = 0
+
+    def backlog(self):
+        """
+        Return True if complete requests are waiting for the next poll().
+        """
+        return any(b"\n" in client.inbox for client in self.clients.values())
+
+    def active(self):
+        """
+        Return True while any client is connected.
+        """
+        return bool(self.clients)
+
+    def poll(self):
+        """
+        Accept clients, read what they sent and handle complete requests, one per client in turn,
+        without blocking.
+
+        Returns:
+            int: Requests handled.
+        """
+        for key, events in self.selector.select(0):
+            sock = key.fileobj
+            if sock is self.sock:
+                self._accept()
+                continue
+            if events & selectors.EVENT_WRITE:
+                self._send(sock)
+            if events & selectors.EVENT_READ and sock in self.clients:
+                self._receive(sock)
+        handled = 0
+        deadline = self.time_source() + self.budget
+        pending = True
+        while pending:
+            pending = False
+            for sock, client in list(self.clients.items()):
+                if b"\n" not in client.inbox:
+                    continue
+                if handled >= self.max_requests or self.time_source() >= deadline:
+                    self.deferred += 1
+                    return handled
+                pending = True
+                line, _, client.inbox = client.inbox.partition(b"\n")
+                if line.strip():
+                    client.outbox += json.dumps(self._handle(line), default=str).encode() + b"\n"
+                    handled += 1
+                    self._send(sock)
+        return handled
+
+    def _accept(self):
+        try:
+            sock, _address = self.sock.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        if len(self.clients) >= self.max_clients:
+            sock.close()
+            return
+        sock.setblocking(False)
+        self.clients[sock] = _Client()
+        self.selector.register(sock, selectors.EVENT_READ)
+        self.accepted += 1
+
+    def _receive(self, sock):
+        client = self.clients[sock]
+        try:
+            data = sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._close(sock, e)
+            return
+        if not data:
+            # The client is done sending; answer what it sent, then close
+            client.eof = True
+            self._update(sock, client)
+            return
+        client.inbox += data
+        if len(client.inbox) > MAX_LINE_BYTES and b"\n" not in client.inbox:
+            self._close(sock, "request line too long")
+
+    def _handle(self, line):
+        self.requests += 1
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            self.errors += 1
+            return {"id": None, "ok": False, "error": "Request is not a JSON object"}
+        try:
+            response = self.handler(request)
+        except ValueError as e:
+            # A bad request: the client gets the reason, nothing was changed
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            if self.logger:
+                self.logger.error("Control API %s error: %s", request.get("cmd"), str(e), extra={"key": "control"})
+            response = {"ok": False, "error": str(e)}
+        if not response.get("ok"):
+            self.errors += 1
+        response["id"] = request.get("id")
+        return response
+
+    def _send(self, sock):
+        client = self.clients.get(sock)
+        if client is None:
+            return
+        if client.outbox:
+            try:
+                sent = sock.send(client.outbox)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError as e:
+                self._close(sock, e)
+                return
+            client.outbox = client.outbox[sent:]
+        self._update(sock, client)
+
+    def _update(self, sock, client):
+        if client.eof and not client.outbox and b"\n" not in client.inbox:
+            self._close(sock)
+            return
+        events = (0 if client.eof else selectors.EVENT_READ) | (selectors.EVENT_WRITE if client.outbox else 0)
+        if not events:
+            # Half closed with requests still queued for the next poll
+            events = selectors.EVENT_WRITE
+        if self.selector.get_key(sock).events != events:
+            self.selector.modify(sock, events)
+
+    def _close(self, sock, error=None):
+        if error is not None and self.logger:
+            self.logger.warning("Control API client closed: %s", str(error), extra={"key": "control"})
+        self.clients.pop(sock, None)
+        self.selector.unregister(sock)
+        sock.close()
+
+    def close(self):
+        """
+        Disconnect the clients, stop listening and remove the socket file.
+        """
+        for sock in list(self.clients):
+            self._close(sock)
+        self.selector.unregister(self.sock)
+        self.sock.close()
+        self.selector.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        """
+        Return the server counters.
+
+        Returns:
+            dict: Connected and accepted clients, requests, failed requests and polls that left requests for the next pass.
+        """
+        return {
+            "clients": len(self.clients),
+            "accepted": self.accepted,
+            "requests": self.requests,
+            "errors": self.errors,
+            "deferred": self.deferred,
+        }
+
+
+class ClockControl:
+    """
+    ClockControl runs control API commands against an AlarmClock.
+
+    Commands ("cmd" of the request, the other keys are its arguments):
+        - get_state: time, display settings, ring state and the alarms
+        - list_alarms: the alarms, as Alarm.to_dict()
+        - set_alarm: {"alarm": {...}} adds an alarm, or replaces the one with the same name
+        - remove_alarm: {"name": ...}
+        - set_brightness: any of {"manual_dim_level": 0-15, "auto_dim_level": 0-15, "auto_dim": "ON"/"OFF"}
+        - set_override: {"override": "ON"/"OFF"}
+        - snooze: {"minutes": 5} while the alarm rings
+        - dismiss: stops a ringing or snoozed alarm
+        - batch: {"commands": [...]} checks every command, then applies all of them or none
+
+    Every command is checked completely before it changes anything. Changes are saved and shown once per
+    poll (see finish()), however many requests made them.
+    """
+    MUTATING = ("set_alarm", "remove_alarm", "set_brightness", "set_override", "snooze", "dismiss")
+
+    def __init__(self, clock):
+        """
+        Initialize the commands.
+
+        Args:
+            clock (AlarmClock): The clock the commands act on.
+        """
+        self.clock = clock
+        self.changed = False
+
+    def __call__(self, request):
+        cmd = request.get("cmd")
+        if cmd == "get_state":
+            return {"ok": True, "result": self.state()}
+        if cmd == "list_alarms":
+            return {"ok": True, "result": self.clock.alarms.to_list()}
+        if cmd == "batch":
+            commands = request.get("commands")
+            if not isinstance(commands, list):
+                raise ValueError("batch needs a list of commands")
+            actions = [self.check(command) for command in commands]
+        else:
+            actions = [self.check(request)]
+        try:
+            for action in actions:
+                action()
+        finally:
+            # Save and show whatever was applied, even if a later action failed
+            self.changed = True
+        return {"ok": True, "result": {"applied": len(actions)}}
+
+    def check(self, request):
+        """
+        Validate one mutating command and return a callable that applies it.
+
+        Raises:
+            ValueError: If the command is unknown or an argument is invalid.
+        """
+        cmd = request.get("cmd") if isinstance(request, dict) else None
+        if cmd not in self.MUTATING:
+            raise ValueError(f"Unknown command: {cmd}")
+        return getattr(self, f"_check_{cmd}")(request)
+
+    def _check_set_alarm(self, request):
+        data = request.get("alarm")
+        if not isinstance(data, dict):
+            raise ValueError("set_alarm needs an alarm object")
+        try:
+            alarm = Alarm.from_dict(data)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"Invalid alarm: {e}")
+        if alarm.track not in self.clock.alarm_tracks:
+            raise ValueError(f"Unknown track: {alarm.track}")
+        if not isinstance(alarm.volume, int) or isinstance(alarm.volume, bool) or not 0 <= alarm.volume <= 100:
+            raise ValueError(f"Invalid volume: {alarm.volume}")
+        if not isinstance(alarm.enabled, bool):
+            raise ValueError(f"Invalid enabled: {alarm.enabled}")
+        named = "name" in data
+
+        def apply():
+            clock = self.clock
+            now = clock.get_time()
+            existing = next((a for a in clock.alarms.alarms if a.name == alarm.name), None) if named else None
+            if existing is None:
+                if not named:
+                    alarm.name = clock.alarms.new_name()
+                clock.alarms.add(alarm, now)
+            else:
+                # Edited in place, so a ringing or snoozed alarm keeps its identity
+                for field in ("hour", "minute", "days", "date", "track", "volume", "enabled"):
+                    setattr(existing, field, getattr(alarm, field))
+                clock.alarms.update(existing, now)
+            clock.select_alarm(min(clock.alarm_index, len(clock.alarms)))
+        return apply
+
+    def _check_remove_alarm(self, request):
+        name = request.get("name")
+        alarm = next((a for a in self.clock.alarms.alarms if a.name == name), None)
+        if alarm is None:
+            raise ValueError(f"No alarm named {name}")
+
+        def apply():
+            clock = self.clock
+            if alarm in clock.alarms.alarms:
+                clock.alarms.remove(alarm)
+            clock.select_alarm(min(clock.alarm_index, len(clock.alarms)))
+        return apply
+
+    def _check_set_brightness(self, request):
+        changes = {}
+        for field in ("manual_dim_level", "auto_dim_level"):
+            if field in request:
+                if request[field] not in DIM_LEVELS or isinstance(request[field], bool):
+                    raise ValueError(f"{field} must be 0 to 15")
+                changes[field] = request[field]
+        if "auto_dim" in request:
+            if request["auto_dim"] not in ("ON", "OFF"):
+                raise ValueError("auto_dim must be ON or OFF")
+            changes["auto_dim"] = request["auto_dim"]
+        if not changes:
+            raise ValueError("set_brightness needs manual_dim_level, auto_dim_level or auto_dim")
+
+        def apply():
+            for field, value in changes.items():
+                setattr(self.clock, field, value)
+        return apply
+
+    def _check_set_override(self, request):
+        override = request.get("override")
+        if override not in ("ON", "OFF"):
+            raise ValueError("override must be ON or OFF")
+
+        def apply():
+            clock = self.clock
+            clock.display_override = override
+            # As with the menu toggle, an explicit override ends a gesture wake
+            clock.display_wake_until = None
+            # As with the encoder, turning the display on brings it back from an off mode
+            if override == "ON" and clock.alarm_ringing == 0 and clock.display_mode in ("MANUAL_OFF", "AUTO_OFF"):
+                clock.display_mode = "ON"
+        return apply
+
+    def _check_snooze(self, request):
+        minutes = request.get("minutes", 5)
+        if not isinstance(minutes, (int, float)) or isinstance(minutes, bool) or not 0 < minutes <= 60:
+            raise ValueError("minutes must be more than 0 and at most 60")
+        if self.clock.ring_state != "RINGING":
+            raise ValueError("No alarm is ringing")
+
+        def apply():
+            clock = self.clock
+            if clock.ring_state == "RINGING":
+                clock.snooze_alarm(minutes)
+                clock.stop_ring(cooldown=True)
+        return apply
+
+    def _check_dismiss(self, request):
+        clock = self.clock
+        if clock.ring_state != "RINGING" and clock.sleep_state != "ON":
+            raise ValueError("No alarm is ringing or snoozed")
+
+        def apply():
+            ringing = clock.ring_state == "RINGING"
+            clock.dismiss_alarm()
+            if ringing:
+                clock.stop_ring()
+        return apply
+
+    def state(self):
+        """
+        Return the clock state reported by get_state.
+        """
+        clock = self.clock
+        fire = clock.alarms.next_fire()
+        snoozed = clock.alarms.snoozed
+        return {
+            "time": clock.get_time().isoformat(timespec="seconds"),
+            "display": {
+                "mode": clock.display_mode,
+                "override": clock.display_override,
+                "manual_dim_level": clock.manual_dim_level,
+                "auto_dim_level": clock.auto_dim_level,
+                "auto_dim": clock.auto_dim,
+            },
+            "alarm": {
+                "ring_state": clock.ring_state,
+                "ringing": clock.ringing_alarm.name if clock.ring_state == "RINGING" else None,
+                "snoozed": snoozed.name if snoozed is not None else None,
+                "next_fire": fire.isoformat(timespec="seconds") if isinstance(fire, datetime.datetime) else None,
+            },
+            "alarms": clock.alarms.to_list(),
+        }
+
+    def finish(self):
+        """
+        Save the settings and redraw the displays once if any command since the last call changed something.
+
+        Returns:
+            bool: True if something changed.
+        """
+        if not self.changed:
+            return False
+        self.changed = False
+        clock = self.clock
+        clock.save_settings()
+        # The display phase of this pass draws everything again
+        clock.last_num_message = None
+        clock.last_num_brightness = None
+        clock.last_alpha_message = None
+        clock.last_alpha_brightness = None
+        clock.last_alpha_type = None
+        return True
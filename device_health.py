@@ -0,0 +1,336 @@
+# device_health.py
+# Per-device circuit breakers for the I2C peripherals of aclock.py.
+# A device that keeps failing is skipped for an exponentially growing backoff
+# instead of being retried and logged on every loop pass. Errors are logged at
+# most once per interval per device, with a count of the ones held back. A
+# device that answers again is re-initialized, and when several devices fail
+# at once the bus itself is recovered.
+
+import threading
+import time
+from collections import deque
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    CircuitBreaker tracks the health of one device.
+
+    Closed: calls go through; failure_threshold consecutive failures open it.
+    Open: calls are skipped until the backoff expires, then one probe call is let through (half open).
+    Half open: other calls are skipped while the probe runs; a success closes it, a failure opens it
+    again with twice the backoff.
+    """
+
+    def __init__(self, name, failure_threshold=3, base_backoff=0.5, max_backoff=10.0, probe_timeout=5.0):
+        """
+        Initialize the breaker, closed.
+
+        Args:
+            name (str): Device name.
+            failure_threshold (int): Consecutive failures that open the breaker.
+            base_backoff (float): Seconds skipped after the breaker first opens.
+            max_backoff (float): Longest backoff in seconds.
+            probe_timeout (float): Seconds after which a probe that never reported back no longer blocks the next one.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.probe_timeout = probe_timeout
+        self.state = CLOSED
+        self.failures = 0  # consecutive
+        self.backoff = 0.0
+        self.retry_at = 0.0
+        self.probe_started = None
+        self.first_failure = None
+        self.last_error = None
+        self.errors = 0
+        self.skipped = 0
+        self.trips = 0
+        self.recoveries = 0
+        self.recovery_times = deque(maxlen=32)
+        # Rate limited logging
+        self.last_logged = None
+        self.suppressed = 0
+        self.logged = 0
+
+    def allow(self, now):
+        """
+        Return True if a call may go to the device now. An open breaker whose backoff expired
+        lets one probe call through; the caller must report it with record_success() or record_failure().
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if now < self.retry_at:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+        elif now - self.probe_started < self.probe_timeout:
+            # A probe is already in flight
+            self.skipped += 1
+            return False
+        self.probe_started = now
+        return True
+
+    def record_failure(self, now, error):
+        """
+        Count a failed call.
+
+        Returns:
+            bool: True if the breaker opened (again) because of it.
+        """
+        self.errors += 1
+        self.last_error = str(error)
+        self.probe_started = None
+        if self.failures == 0 and self.state == CLOSED:
+            self.first_failure = now
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == CLOSED:
+                self.trips += 1
+            self.backoff = min(self.base_backoff if self.backoff == 0.0 else self.backoff * 2, self.max_backoff)
+            self.retry_at = now + self.backoff
+            self.state = OPEN
+            return True
+        return False
+
+    def record_success(self, now):
+        """
+        Count a successful call.
+
+        Returns:
+            float: Seconds from the first failure to now if this call ended an outage (the breaker was
+                half open), None otherwise.
+        """
+        self.failures = 0
+        if self.state == CLOSED:
+            return None
+        self.probe_started = None
+        downtime = now - self.first_failure
+        self.state = CLOSED
+        self.backoff = 0.0
+        self.first_failure = None
+        self.recoveries += 1
+        self.recovery_times.append(downtime)
+        return downtime
+
+    def as_dict(self):
+        times = self.recovery_times
+        return {
+            "state": self.state,
+            "errors": self.errors,
+            "logged": self.logged,
+            "skipped": self.skipped,
+            "trips": self.trips,
+            "recoveries": self.recoveries,
+            "recovery_last_s": round(times[-1], 3) if times else None,
+            "recovery_max_s": round(max(times), 3) if times else None,
+            "last_error": self.last_error,
+        }
+
+
+class DeviceHealth:
+    """
+    DeviceHealth runs device accesses through one CircuitBreaker per device.
+
+    Features:
+        - call() returns a default instead of raising, and skips devices whose breaker is open
+        - At most one error line per device per log_interval; held back errors are counted in the next line
+        - Re-initialization callbacks run once a failed device answers again
+        - Bus recovery callback when bus_fault_devices or more breakers are open at the same time
+        - Recovery time (first failure to back in service) per device
+    """
+
+    def __init__(self, logger=None, failure_threshold=3, base_backoff=0.5, max_backoff=10.0, log_interval=60.0,
+                 bus_recovery=None, bus_fault_devices=2, time_source=time.monotonic):
+        """
+        Initialize the health layer.
+
+        Args:
+            logger: Logger used for device errors.
+            failure_threshold (int): Consecutive failures that open a breaker.
+            base_backoff (float): Seconds a device is skipped after its breaker first opens; doubles on every failed probe.
+            max_backoff (float): Longest backoff in seconds.
+            log_interval (float): Seconds between error lines for one device.
+            bus_recovery (callable): Recovers the bus, e.g. by reopening the I2C adapter. None to never try.
+            bus_fault_devices (int): Open breakers at once that are treated as a bus fault.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        self.logger = logger
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.log_interval = log_interval
+        self.bus_recovery = bus_recovery
+        self.bus_fault_devices = bus_fault_devices
+        self.time_source = time_source
+        self.breakers = {}
+        self._reinit = {}
+        # The gesture sampler thread uses the same health layer as the main loop
+        self._lock = threading.RLock()
+        self._bus_backoff = 0.0
+        self._bus_retry_at = 0.0
+        self.bus_recoveries = 0
+        self.errors = 0
+
+    def breaker(self, name):
+        """
+        Return the CircuitBreaker of a device, created on first use.
+        """
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.setdefault(
+                    name, CircuitBreaker(name, self.failure_threshold, self.base_backoff, self.max_backoff))
+        return breaker
+
+    def register(self, name, reinit=None):
+        """
+        Create the breaker of a device and set the callback that restores its state once it answers again.
+
+        Args:
+            name (str): Device name, as passed to call().
+            reinit (callable): Re-initializes the device. Errors count as a failed call.
+        """
+        self.breaker(name)
+        self._reinit[name] = reinit
+
+    def allow(self, name):
+        """
+        Return True if the device may be accessed now, False while its breaker is open or another
+        thread's probe call is in flight.
+        """
+        breaker = self.breaker(name)
+        with self._lock:
+            return breaker.allow(self.time_source())
+
+    def call(self, name, fn, default=None, label=None):
+        """
+        Run a device access through the device's breaker.
+
+        Args:
+            name (str): Device name.
+            fn (callable): Performs the access and returns its value.
+            default: Returned when the access is skipped or fails.
+            label (str): Name used when logging errors, defaults to the device name.
+        Returns:
+            The value returned by fn, or default.
+        """
+        if not self.allow(name):
+            return default
+        return self.run(name, fn, default, label)
+
+    def run(self, name, fn, default=None, label=None):
+        """
+        Run a device access that allow() already let through. See call(). When the access ends an
+        outage, the device is re-initialized and default is returned.
+        """
+        breaker = self.breaker(name)
+        try:
+            result = fn()
+        except Exception as e:
+            self._failure(breaker, label or name, e)
+            return default
+        if breaker.state == CLOSED:
+            breaker.failures = 0
+            return result
+        # The probe call went through: restore the device before it is used again
+        reinit = self._reinit.get(name)
+        if reinit is not None:
+            try:
+                reinit()
+            except Exception as e:
+                self._failure(breaker, f"{name} re-init", e)
+                return default
+        with self._lock:
+            downtime = breaker.record_success(self.time_source())
+        if downtime is not None and self.logger:
+            self.logger.info("%s recovered after %.2f s (%d errors so far)", name, downtime, breaker.errors,
+                             extra={"key": f"health.{name}", "device": name, "downtime_s": round(downtime, 3)})
+        if reinit is not None:
+            # The probe ran before the re-init, so what it read may no longer match the device
+            return default
+        return result
+
+    def _failure(self, breaker, label, error):
+        with self._lock:
+            now = self.time_source()
+            self.errors += 1
+            opened = breaker.record_failure(now, error)
+            if breaker.last_logged is None or now - breaker.last_logged >= self.log_interval:
+                self._log(breaker, label, error, now)
+            else:
+                breaker.suppressed += 1
+            if opened:
+                self._check_bus(now)
+
+    def _log(self, breaker, label, error, now):
+        breaker.last_logged = now
+        breaker.logged += 1
+        if self.logger:
+            held_back = f", {breaker.suppressed} more since the last report" if breaker.suppressed else ""
+            retry = f", retrying in {breaker.backoff:g} s" if breaker.state == OPEN else ""
+            self.logger.error("%s error: %s (%s%s%s)", label, str(error), breaker.state, retry, held_back,
+                              extra={"key": f"health.{breaker.name}", "device": breaker.name})
+        breaker.suppressed = 0
+
+    def _check_bus(self, now):
+        # Several devices failing together points at the bus (a device holding SDA low), not at one device
+        if self.bus_recovery is None or now < self._bus_retry_at:
+            return
+        failing = [breaker for breaker in list(self.breakers.values()) if breaker.state != CLOSED]
+        if len(failing) < self.bus_fault_devices:
+            return
+        self._bus_backoff = min(self.base_backoff if self._bus_backoff == 0.0 else self._bus_backoff * 2,
+                                self.max_backoff)
+        self._bus_retry_at = now + self._bus_backoff
+        self.bus_recoveries += 1
+        try:
+            self.bus_recovery()
+        except Exception as e:
+            if self.logger:
+                self.logger.error("I2C bus recovery error: %s", str(e))
+            return
+        if self.logger:
+            self.logger.warning("I2C bus recovery with %d devices failing: %s", len(failing),
+                                ", ".join(breaker.name for breaker in failing), extra={"key": "health.bus"})
+        # Probe every failing device right away instead of waiting out its backoff
+        for breaker in failing:
+            breaker.retry_at = now
+
+    def tick(self):
+        """
+        Log the errors held back for devices whose log interval has passed. Called once per loop pass.
+        """
+        now = self.time_source()
+        for breaker in list(self.breakers.values()):
+            if breaker.suppressed and now - breaker.last_logged >= self.log_interval:
+                with self._lock:
+                    self._log(breaker, breaker.name, breaker.last_error, now)
+        if self._bus_backoff and not self.failing():
+            self._bus_backoff = 0.0
+
+    def failing(self):
+        """
+        Return the names of the devices whose breaker is not closed.
+        """
+        return [name for name, breaker in list(self.breakers.items()) if breaker.state != CLOSED]
+
+    def stats(self):
+        """
+        Return the health of every device.
+
+        Returns:
+            dict: Per-device breaker state and counters, total errors and bus recoveries.
+        """
+        return {
+            "devices": {name: breaker.as_dict() for name, breaker in sorted(self.breakers.items())},
+            "errors": self.errors,
+            "bus_recoveries": self.bus_recoveries,
+        }
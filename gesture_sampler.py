@@ -0,0 +1,258 @@
+# gesture_sampler.py
+# Background sampler thread that owns the APDS9960 gesture sensor.
+# It reads gestures at a rate that adapts to what the clock needs and pushes
+# timestamped events into a ring buffer the main loop drains without blocking.
+
+import threading
+import time
+
+from i2c_bus import PRIORITY_GESTURE
+
+# Sampler modes, set by the main loop
+GESTURE_OFF = "off"
+GESTURE_SLOW = "slow"
+GESTURE_FAST = "fast"
+
+
+class GestureRingBuffer:
+    """
+    Fixed size single-producer single-consumer ring buffer.
+
+    Only the sampler thread advances the head and only the main loop advances the tail, and each
+    index update is a single attribute store, so neither side takes a lock. A full buffer drops the
+    new event and counts it.
+    """
+
+    def __init__(self, size=16):
+        """
+        Initialize the buffer.
+
+        Args:
+            size (int): Number of events held before new ones are dropped.
+        """
+        self._items = [None] * size
+        self._size = size
+        self._head = 0  # total events written
+        self._tail = 0  # total events read
+        self.dropped = 0
+
+    def push(self, item):
+        """
+        Add an event. Called from the sampler thread only.
+
+        Returns:
+            bool: False if the buffer was full and the event was dropped.
+        """
+        head = self._head
+        if head - self._tail >= self._size:
+            self.dropped += 1
+            return False
+        self._items[head % self._size] = item
+        self._head = head + 1
+        return True
+
+    def drain(self):
+        """
+        Remove and return all buffered events, oldest first. Called from the main loop only.
+        """
+        tail = self._tail
+        head = self._head
+        if tail == head:
+            return []
+        items = [self._items[i % self._size] for i in range(tail, head)]
+        self._tail = head
+        return items
+
+
+class GestureSampler:
+    """
+    GestureSampler runs a daemon thread that owns the APDS9960.
+
+    Features:
+        - Off, slow and fast sample rates chosen by the main loop with set_mode()
+        - Switches to the fast rate for a while when proximity is high, since a hand is close
+        - Enables and disables the sensor on the sampler thread, so the main loop never touches it
+        - Optional interrupt gating through the input backend's "apds" source
+        - Counters for samples, gestures, dropped gestures and errors
+    """
+
+    def __init__(self, apds, bus, input_backend=None, logger=None, fast_interval=0.01, slow_interval=0.05,
+                 proximity_threshold=5, proximity_hold=2.0, buffer_size=16, time_source=time.monotonic):
+        """
+        Initialize the sampler. Call start() to begin sampling.
+
+        Args:
+            apds: The APDS9960 instance, or None until attach() is called.
+            bus (I2CBusScheduler): Bus scheduler used to account the sensor reads.
+            input_backend: Input backend; with an APDS9960 INT pin the sensor is only read after it signaled.
+                Its notify() is called for every gesture.
+            logger: Logger used for sensor errors.
+            fast_interval (float): Seconds between reads while the alarm rings or a hand is near.
+            slow_interval (float): Seconds between reads otherwise.
+            proximity_threshold (int): Proximity count that switches to the fast rate.
+            proximity_hold (float): Seconds to stay at the fast rate after proximity was high.
+            buffer_size (int): Gesture events held before new ones are dropped.
+            time_source (callable): Returns the current monotonic time in seconds; timestamps the events.
+        """
+        self.apds = apds
+        self.bus = bus
+        self.input = input_backend
+        self.logger = logger
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.proximity_threshold = proximity_threshold
+        self.proximity_hold = proximity_hold
+        self.time_source = time_source
+        self.events = GestureRingBuffer(buffer_size)
+        self.mode = GESTURE_OFF
+        self._enabled = None
+        self._fast_until = 0.0
+        self._next_poll = 0.0
+        self._polled_mode = None
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.samples = 0
+        self.gestures = 0
+        self.errors = 0
+
+    def start(self):
+        """
+        Start the sampler thread.
+        """
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="gesture-sampler", daemon=True)
+        self._thread.start()
+
+    @property
+    def threaded(self):
+        """
+        True once start() has been called.
+        """
+        return self._thread is not None
+
+    def stop(self):
+        """
+        Stop the sampler thread and wait for it to exit.
+        """
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def attach(self, apds):
+        """
+        Set the sensor once it has been initialized, e.g. by a startup thread, or again after it was
+        re-initialized. Sampling starts on the next step with the sensor state applied again.
+        """
+        self.apds = apds
+        self._enabled = None
+        self._wake.set()
+
+    def set_mode(self, mode):
+        """
+        Set the sample rate: GESTURE_OFF, GESTURE_SLOW or GESTURE_FAST. Wakes the thread on a change.
+        """
+        if mode != self.mode:
+            self.mode = mode
+            self._wake.set()
+
+    def drain(self):
+        """
+        Return the buffered (monotonic time, gesture) events without blocking.
+        """
+        return self.events.drain()
+
+    def next_deadline(self):
+        """
+        Return the monotonic time poll() next needs to run, or None when sampling on the thread or off.
+        """
+        if self.threaded or self.mode == GESTURE_OFF:
+            return None
+        if self.mode != self._polled_mode:
+            return self.time_source()
+        return self._next_poll
+
+    def _set_sensor(self, enable):
+        def write():
+            self.apds.enable_proximity = enable
+            self.apds.enable_gesture = enable
+        try:
+            self.bus.read("apds", write)
+        except Exception as e:
+            self.errors += 1
+            if self.logger:
+                self.logger.error("APDS9960 sensor state error: %s", str(e))
+
+    def poll(self):
+        """
+        Run the sampler inline from the main loop instead of on its thread, for example under a virtual clock.
+        Samples only when the next read is due or the mode changed.
+        """
+        now = self.time_source()
+        if self.mode == self._polled_mode and now < self._next_poll:
+            return
+        self._polled_mode = self.mode
+        interval = self._step()
+        self._next_poll = now + (interval or 0.0)
+
+    def _run(self):
+        while self._running:
+            # None while off: sleep until set_mode() or stop()
+            self._wake.wait(self._step())
+            self._wake.clear()
+
+    def _step(self):
+        # Apply the sensor state for the current mode and take one sample.
+        # Returns the seconds until the next sample, None while off.
+        mode = self.mode
+        if self.apds is None:
+            # Not initialized yet; attach() wakes the thread
+            return None
+        want = mode != GESTURE_OFF
+        if want != self._enabled:
+            self._set_sensor(want)
+            self._enabled = want
+        if not want:
+            return None
+        now = self.time_source()
+        if self.input is None or self.input.take("apds"):
+            self._sample(mode, now)
+        fast = mode == GESTURE_FAST or now < self._fast_until
+        return self.fast_interval if fast else self.slow_interval
+
+    def _sample(self, mode, now):
+        self.samples += 1
+        try:
+            # Gesture priority: skipped while the main loop's tick has used up its bus budget
+            if mode == GESTURE_SLOW and now >= self._fast_until:
+                proximity = self.bus.read("apds", lambda: self.apds.proximity, PRIORITY_GESTURE, default=0)
+                if proximity >= self.proximity_threshold:
+                    self._fast_until = now + self.proximity_hold
+            gesture = self.bus.read("apds", self.apds.gesture, PRIORITY_GESTURE, default=0)
+        except Exception as e:
+            self.errors += 1
+            if self.logger:
+                self.logger.error("APDS9960 gesture() error: %s", str(e))
+            return
+        if gesture:
+            self.gestures += 1
+            self.events.push((self.time_source(), gesture))
+            if self.input is not None:
+                # Wake the main loop if it is sleeping until its next deadline
+                self.input.notify()
+
+    def stats(self):
+        """
+        Return the sampler counters.
+
+        Returns:
+            dict: Mode, samples, gestures, dropped gestures and errors.
+        """
+        return {
+            "mode": self.mode,
+            "samples": self.samples,
+            "gestures": self.gestures,
+            "dropped": self.events.dropped,
+            "errors": self.errors,
+        }
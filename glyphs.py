@@ -0,0 +1,136 @@
+# glyphs.py
+# Precomputed display RAM images for the HT16K33 displays of aclock.py.
+# Every text the clock face shows is rendered once through the display driver
+# and kept as the 16 raw bytes the chip needs. A tick then copies the image into
+# the display buffer (ShadowDisplay.set_frame) instead of formatting the time and
+# mapping it to segments character by character; the colon and brightness are
+# applied on top of the image.
+
+import copy
+import threading
+
+from shadow_display import DISPLAY_RAM_BYTES
+
+# Minutes in twelve hours: the numeric display shows 1:00 to 12:59
+CLOCK_MINUTES = 720
+# Fixed texts of the alphanumeric display: ring and alarm states, AM/PM and the menu values 0-99
+ALPHA_TEXTS = ("RING", "ON", "OFF", "AM", "PM") + tuple(str(number) for number in range(100))
+
+
+def clock_number(now):
+    """
+    Return the twelve-hour time as the number the numeric display shows, e.g. 1205 for 12:05.
+
+    Args:
+        now (datetime): The current datetime.
+    """
+    return (now.hour % 12 or 12) * 100 + now.minute
+
+
+class GlyphTable:
+    """
+    GlyphTable holds the display RAM images of the texts one display shows.
+
+    Features:
+        - Images are rendered with the display's own driver, so they match print() exactly on the
+          Pi and in the simulator
+        - Rendering uses a copy of the driver with its own buffer: no bus traffic, and the live buffer
+          is never touched, so preload() can run on a startup thread
+        - clock() looks up the time by minute index, without formatting a string
+        - Texts that are not preloaded are rendered on first use and kept, up to max_entries
+    """
+
+    def __init__(self, display, max_entries=2048):
+        """
+        Initialize the table.
+
+        Args:
+            display: The Seg7x4 or Seg14x4 driver (not the ShadowDisplay wrapper).
+            max_entries (int): Most text images kept; later ones are rendered on every use.
+        """
+        self._scratch = copy.copy(display)
+        self._scratch._buffer = bytearray(len(display._buffer))
+        self._scratch._auto_write = False
+        self.max_entries = max_entries
+        self._frames = {}
+        # Indexed by (hour % 12) * 60 + minute
+        self._clock = [None] * CLOCK_MINUTES
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def _render(self, text):
+        with self._lock:
+            scratch = self._scratch
+            scratch.fill(0)
+            scratch.print(text)
+            self.renders += 1
+            return bytes(scratch._buffer[1:DISPLAY_RAM_BYTES + 1])
+
+    def frame(self, text):
+        """
+        Return the display RAM image of a text.
+
+        Args:
+            text (str): The text, as it would be passed to print().
+        Returns:
+            bytes: The 16 bytes of display RAM.
+        """
+        frame = self._frames.get(text)
+        if frame is not None:
+            self.hits += 1
+            return frame
+        frame = self._render(text)
+        if len(self._frames) < self.max_entries:
+            self._frames[text] = frame
+        return frame
+
+    def clock(self, now):
+        """
+        Return the display RAM image of the twelve-hour time of now, without the colon.
+
+        Args:
+            now (datetime): The current datetime.
+        Returns:
+            bytes: The 16 bytes of display RAM.
+        """
+        index = (now.hour % 12) * 60 + now.minute
+        frame = self._clock[index]
+        if frame is not None:
+            self.hits += 1
+            return frame
+        frame = self._clock[index] = self._render(str(clock_number(now)))
+        return frame
+
+    def preload(self, texts):
+        """
+        Render texts ahead of use.
+
+        Args:
+            texts (iterable): Texts to render.
+        """
+        for text in texts:
+            if text not in self._frames and len(self._frames) < self.max_entries:
+                self._frames[text] = self._render(text)
+
+    def preload_clock(self):
+        """
+        Render all 720 twelve-hour times ahead of use.
+        """
+        for index in range(CLOCK_MINUTES):
+            if self._clock[index] is None:
+                hour, minute = divmod(index, 60)
+                self._clock[index] = self._render(str((hour or 12) * 100 + minute))
+
+    def stats(self):
+        """
+        Return the table counters.
+
+        Returns:
+            dict: Images kept, renders through the driver and lookups served from the table.
+        """
+        return {
+            "frames": len(self._frames) + sum(frame is not None for frame in self._clock),
+            "renders": self.renders,
+            "hits": self.hits,
+        }
@@ -0,0 +1,130 @@
+# hardware.py
+# Device layer for aclock.py.
+# AlarmClock creates every device through a hardware backend, so the same code
+# runs on the Raspberry Pi (PiHardware) or headless on any Linux box
+# (sim_hardware.SimHardware). Driver imports are deferred to the backend
+# methods, so the simulator does not need Blinka, the Adafruit drivers or pygame.
+
+import time
+
+HARDWARE_BACKENDS = ("pi", "sim")
+
+
+class PiHardware:
+    """
+    PiHardware creates the real devices: Blinka I2C, HT16K33 displays, Seesaw boards, APDS9960 and pygame.mixer.
+    """
+    name = "pi"
+
+    def i2c(self):
+        """
+        Return the I2C bus on the Raspberry Pi SCL/SDA pins.
+        """
+        import board
+        import busio
+        return busio.I2C(board.SCL, board.SDA)
+
+    def recover_bus(self, i2c, timeout=0.5):
+        """
+        Close and reopen the I2C adapter in place, so every device keeps its reference to the bus object.
+        The lock is taken first so no other thread is mid-transaction; init() replaces it with a new one.
+
+        Args:
+            i2c: The bus returned by i2c().
+            timeout (float): Seconds to wait for the lock.
+
+        Raises:
+            TimeoutError: If the lock is still held after timeout; the bus is left as it was.
+        """
+        import board
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while not i2c.try_lock():
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"I2C bus lock still held after {timeout:g} s")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        i2c.init(board.SCL, board.SDA, 100000)
+
+    def seg14x4(self, i2c, address=0x70, auto_write=True):
+        """
+        Return a 14 segment x 4 character alphanumeric display.
+        """
+        from adafruit_ht16k33.segments import Seg14x4
+        return Seg14x4(i2c, address=address, auto_write=auto_write)
+
+    def seg7x4(self, i2c, address=0x70, auto_write=True):
+        """
+        Return a 7 segment x 4 digit numeric display.
+        """
+        from adafruit_ht16k33.segments import Seg7x4
+        return Seg7x4(i2c, address=address, auto_write=auto_write)
+
+    def seesaw(self, i2c, address):
+        """
+        Return a Seesaw board (rotary encoder or arcade buttons).
+        """
+        from adafruit_seesaw.seesaw import Seesaw
+        return Seesaw(i2c, addr=address)
+
+    def rotary_encoder(self, seesaw):
+        """
+        Return the incremental encoder of a Seesaw rotary encoder board.
+        """
+        from adafruit_seesaw import rotaryio
+        return rotaryio.IncrementalEncoder(seesaw)
+
+    def digital_io(self, seesaw, pin):
+        """
+        Return a Seesaw pin as a DigitalIO with its power-on configuration.
+        """
+        from adafruit_seesaw.digitalio import DigitalIO
+        return DigitalIO(seesaw, pin)
+
+    def button(self, seesaw, pin):
+        """
+        Return a Seesaw pin configured as a pulled up input; value is False while pressed.
+        """
+        import digitalio
+        button = self.digital_io(seesaw, pin)
+        button.direction = digitalio.Direction.INPUT
+        button.pull = digitalio.Pull.UP
+        return button
+
+    def pwm_out(self, seesaw, pin):
+        """
+        Return a Seesaw PWM output.
+        """
+        from adafruit_seesaw.pwmout import PWMOut
+        return PWMOut(seesaw, pin)
+
+    def gesture_sensor(self, i2c):
+        """
+        Return the APDS9960 proximity and gesture sensor.
+        """
+        from adafruit_apds9960.apds9960 import APDS9960
+        return APDS9960(i2c)
+
+    def mixer(self):
+        """
+        Return the initialized pygame.mixer module.
+        """
+        import pygame
+        pygame.mixer.init()
+        return pygame.mixer
+
+
+def create_hardware(name="pi", **options):
+    """
+    Return the hardware backend with the given name.
+
+    Args:
+        name (str): One of HARDWARE_BACKENDS.
+        **options: Passed to the simulator, e.g. latency=True or script=[...].
+    """
+    if name == "sim":
+        from sim_hardware import SimHardware
+        return SimHardware(**options)
+    if name != "pi":
+        raise ValueError(f"Unknown hardware backend: {name}")
+    return PiHardware()
@@ -0,0 +1,212 @@
+# i2c_bus.py
+# Central scheduler for all traffic on the shared I2C bus used by aclock.py.
+# Reads run immediately, writes are queued per device, coalesced within a
+# tick and flushed highest priority first. The gesture sampler thread reads
+# through the same scheduler, so every entry point holds one lock.
+
+import threading
+import time
+
+# Lower number runs first
+PRIORITY_ALARM = 0
+PRIORITY_INPUT = 1
+PRIORITY_GESTURE = 2
+PRIORITY_DISPLAY = 3
+
+
+class I2CBusScheduler:
+    """
+    I2CBusScheduler owns the busio.I2C object and schedules all device traffic on it.
+
+    Features:
+        - Immediate reads for input polls, optionally skipped when the tick budget is spent
+        - Queued writes keyed per device, with redundant writes in one tick coalesced
+        - Priority ordered flush so alarm and input traffic goes ahead of cosmetic refreshes
+        - Transactions/sec and queue latency statistics
+        - Optional DeviceHealth: devices with an open circuit breaker are skipped, and errors return the default
+        - Thread safe: reads, submits and flushes hold one lock, so the counters, the tick budget and the
+          breakers see one transaction at a time, and a flush runs to the end before a read from another
+          thread (the gesture sampler) gets the bus
+    """
+
+    def __init__(self, i2c, logger=None, tick_budget=None, stats_window=5.0, time_source=time.monotonic, health=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            i2c: The busio.I2C object shared by every device.
+            logger: Logger used for errors raised by queued writes.
+            tick_budget (float): Seconds of bus time per tick before low priority work is deferred, None for no limit.
+            stats_window (float): Seconds over which transactions/sec is averaged.
+            time_source (callable): Returns the current monotonic time in seconds.
+            health (DeviceHealth): Circuit breakers keyed by the device names passed to read() and submit().
+        """
+        self.i2c = i2c
+        self.health = health
+        self.logger = logger
+        self.tick_budget = tick_budget
+        self.stats_window = stats_window
+        self.time_source = time_source
+        # Reentrant: a device re-init run by the health layer may submit or read again
+        self._lock = threading.RLock()
+        # (device, key) -> [priority, sequence, queued_at, fn, label]
+        self._pending = {}
+        self._sequence = 0
+        self._tick_start = self.time_source()
+        # True from begin_tick() to the end of flush(): the window the tick budget applies to
+        self._tick_active = False
+        self.transactions = 0
+        self.coalesced = 0
+        self.deferred = 0
+        self.skipped_reads = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self.latency_max = 0.0
+        self._window_start = self._tick_start
+        self._window_transactions = 0
+        self.transactions_per_sec = 0.0
+
+    def begin_tick(self):
+        """
+        Mark the start of a main loop tick; the tick budget is measured from here.
+        """
+        self._tick_start = self.time_source()
+        self._tick_active = True
+
+    def budget_spent(self):
+        """
+        Return True if the bus time budget for the current tick has been used up.
+        """
+        return self.tick_budget is not None and self.time_source() - self._tick_start > self.tick_budget
+
+    def read(self, device, fn, priority=PRIORITY_INPUT, default=None):
+        """
+        Run a read against a device right away and return its result.
+        Reads at gesture priority or lower are skipped once the budget of the tick in progress is spent;
+        between ticks (the main loop asleep) they always run.
+
+        Args:
+            device (str): Name of the device being read.
+            fn (callable): Performs the read and returns the value.
+            priority (int): One of the PRIORITY_* constants.
+            default: Value returned when the read is skipped, or when it fails and a health layer is set.
+        Returns:
+            The value returned by fn, or default if the read was skipped.
+        """
+        with self._lock:
+            if priority >= PRIORITY_GESTURE and self._tick_active and self.budget_spent():
+                self.skipped_reads += 1
+                return default
+            health = self.health
+            if health is None:
+                self._count_transaction()
+                return fn()
+            if not health.allow(device):
+                return default
+            self._count_transaction()
+            return health.run(device, fn, default)
+
+    def submit(self, device, fn, priority=PRIORITY_DISPLAY, key="show", label=None):
+        """
+        Queue a write for the next flush. A write already pending for the same device and key
+        is replaced, so only the last state of the tick goes out on the bus.
+
+        Args:
+            device (str): Name of the device being written.
+            fn (callable): Performs the write.
+            priority (int): One of the PRIORITY_* constants.
+            key (str): Identifies which part of the device the write targets.
+            label (str): Name used when logging errors, defaults to "<device>.<key>()".
+        """
+        slot = (device, key)
+        with self._lock:
+            entry = self._pending.get(slot)
+            if entry is not None:
+                self.coalesced += 1
+                entry[0] = min(entry[0], priority)
+                entry[3] = fn
+                entry[4] = label
+                return
+            self._sequence += 1
+            self._pending[slot] = [priority, self._sequence, self.time_source(), fn, label]
+
+    def flush(self):
+        """
+        Run queued writes in priority order. Once the tick budget is spent, writes below input
+        priority stay queued for the next flush.
+
+        Returns:
+            int: The number of writes performed.
+        """
+        with self._lock:
+            try:
+                return self._flush() if self._pending else 0
+            finally:
+                self._tick_active = False
+
+    def _flush(self):
+        done = 0
+        jobs = sorted(self._pending.items(), key=lambda item: (item[1][0], item[1][1]))
+        for slot, (priority, _sequence, queued_at, fn, label) in jobs:
+            if done and priority > PRIORITY_INPUT and self.budget_spent():
+                self.deferred += 1
+                continue
+            del self._pending[slot]
+            if self.health is not None and not self.health.allow(slot[0]):
+                # The device is backing off; the write is dropped and its state resent once the device is back
+                continue
+            latency = self.time_source() - queued_at
+            self._latency_total += latency
+            self._latency_count += 1
+            if latency > self.latency_max:
+                self.latency_max = latency
+            self._count_transaction()
+            if self.health is not None:
+                self.health.run(slot[0], fn, label=label or f"{slot[0]}.{slot[1]}()")
+                done += 1
+                continue
+            try:
+                fn()
+            except Exception as e:
+                self.errors += 1
+                if self.logger:
+                    self.logger.error("%s error: %s", label or f"{slot[0]}.{slot[1]}()", str(e))
+            done += 1
+        return done
+
+    def pending(self):
+        """
+        Return the number of writes waiting for a flush.
+        """
+        return len(self._pending)
+
+    def _count_transaction(self):
+        self.transactions += 1
+        self._window_transactions += 1
+        now = self.time_source()
+        elapsed = now - self._window_start
+        if elapsed >= self.stats_window:
+            self.transactions_per_sec = self._window_transactions / elapsed
+            self._window_start = now
+            self._window_transactions = 0
+
+    def stats(self):
+        """
+        Return a snapshot of the scheduler statistics.
+
+        Returns:
+            dict: Transaction counts, rate, coalescing and queue latency figures.
+        """
+        avg_latency = self._latency_total / self._latency_count if self._latency_count else 0.0
+        return {
+            "transactions": self.transactions,
+            "transactions_per_sec": round(self.transactions_per_sec, 1),
+            "coalesced": self.coalesced,
+            "deferred": self.deferred,
+            "skipped_reads": self.skipped_reads,
+            "errors": self.errors if self.health is None else self.health.errors,
+            "pending": len(self._pending),
+            "queue_latency_avg_ms": round(avg_latency * 1000, 2),
+            "queue_latency_max_ms": round(self.latency_max * 1000, 2),
+        }
@@ -0,0 +1,195 @@
+# i2c_instrument.py
+# Instrumentation wrapper for the busio.I2C object used by aclock.py.
+# Every transaction is counted per device address with its bytes, latency
+# (as a histogram), retries and exceptions, so it is visible which device
+# uses the bus budget. Stats can be written to a JSON file or dumped on demand.
+
+import errno
+import json
+import os
+import time
+
+# Devices on the clock's bus
+DEVICE_NAMES = {
+    0x70: "alpha_display",
+    0x72: "num_display",
+    0x36: "encoder",
+    0x39: "apds",
+    0x3A: "arcade",
+}
+# Upper bounds of the latency histogram buckets in microseconds; the last bucket is open ended
+LATENCY_BUCKETS_US = (100, 200, 500, 1000, 2000, 5000, 10000)
+# OSError numbers worth retrying: a NAK (Remote I/O error) or a bus glitch
+RETRY_ERRNOS = (errno.EREMOTEIO, errno.EIO, errno.ETIMEDOUT)
+
+
+class DeviceStats:
+    """
+    DeviceStats holds the transaction counters of one I2C address.
+    """
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.retries = 0
+        self.errors = 0
+        self.last_error = None
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
+
+    def record(self, latency):
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        micros = latency * 1e6
+        for i, bound in enumerate(LATENCY_BUCKETS_US):
+            if micros <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def as_dict(self):
+        transactions = sum(self.histogram)
+        labels = [f"<={bound}us" for bound in LATENCY_BUCKETS_US] + [f">{LATENCY_BUCKETS_US[-1]}us"]
+        return {
+            "reads": self.reads,
+            "writes": self.writes,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "retries": self.retries,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency_avg_us": round(self.latency_total / transactions * 1e6, 1) if transactions else 0.0,
+            "latency_max_us": round(self.latency_max * 1e6, 1),
+            "latency_histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+class InstrumentedI2C:
+    """
+    InstrumentedI2C wraps a busio.I2C (or the simulator's bus) and records every transaction per device address.
+
+    Features:
+        - Read and write counts and bytes per address
+        - Latency histogram, average and maximum per address
+        - Retries of transient OSErrors (NAK, EIO, timeout) and counts of the errors that were raised
+        - write_stats() for a periodic JSON stats file and report() for an on-demand dump
+
+    Everything it does not instrument (try_lock, unlock, scan, ...) is passed through to the wrapped bus.
+    """
+
+    def __init__(self, i2c, retries=1, time_source=time.monotonic):
+        """
+        Initialize the wrapper.
+
+        Args:
+            i2c: The bus to wrap.
+            retries (int): Extra attempts for a transaction that failed with a transient OSError.
+            time_source (callable): Returns the current monotonic time in seconds; times each transaction.
+        """
+        self.i2c = i2c
+        self.retries = retries
+        self.time_source = time_source
+        self.devices = {}
+
+    def __getattr__(self, name):
+        return getattr(self.i2c, name)
+
+    def _device(self, address):
+        stats = self.devices.get(address)
+        if stats is None:
+            stats = self.devices[address] = DeviceStats()
+        return stats
+
+    def _transact(self, address, fn, nwrite, nread):
+        stats = self._device(address)
+        attempt = 0
+        while True:
+            start = self.time_source()
+            try:
+                result = fn()
+            except OSError as e:
+                stats.record(self.time_source() - start)
+                if attempt < self.retries and e.errno in RETRY_ERRNOS:
+                    attempt += 1
+                    stats.retries += 1
+                    continue
+                stats.errors += 1
+                stats.last_error = str(e)
+                raise
+            except Exception as e:
+                stats.record(self.time_source() - start)
+                stats.errors += 1
+                stats.last_error = str(e)
+                raise
+            stats.record(self.time_source() - start)
+            if nwrite:
+                stats.writes += 1
+                stats.bytes_written += nwrite
+            if nread:
+                stats.reads += 1
+                stats.bytes_read += nread
+            return result
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        nwrite = (len(buffer) if end is None else end) - start
+        return self._transact(address, lambda: self.i2c.writeto(address, buffer, start=start, end=end), nwrite, 0)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        nread = (len(buffer) if end is None else end) - start
+        return self._transact(address, lambda: self.i2c.readfrom_into(address, buffer, start=start, end=end),
+                              0, nread)
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0,
+                              in_end=None):
+        nwrite = (len(out_buffer) if out_end is None else out_end) - out_start
+        nread = (len(in_buffer) if in_end is None else in_end) - in_start
+
+        def transfer():
+            return self.i2c.writeto_then_readfrom(address, out_buffer, in_buffer, out_start=out_start,
+                                                  out_end=out_end, in_start=in_start, in_end=in_end)
+        return self._transact(address, transfer, nwrite, nread)
+
+    def stats(self):
+        """
+        Return the counters of every address seen so far.
+
+        Returns:
+            dict: "0x70 alpha_display" style keys to that device's counters and latency histogram.
+        """
+        return {
+            f"0x{address:02x} {DEVICE_NAMES.get(address, 'unknown')}": stats.as_dict()
+            for address, stats in sorted(self.devices.items())
+        }
+
+    def report(self):
+        """
+        Return a one line per device summary for printing.
+        """
+        lines = []
+        for address, stats in sorted(self.devices.items()):
+            summary = stats.as_dict()
+            lines.append(
+                f"0x{address:02x} {DEVICE_NAMES.get(address, 'unknown'):13} "
+                f"reads: {summary['reads']} writes: {summary['writes']} "
+                f"bytes r/w: {summary['bytes_read']}/{summary['bytes_written']} "
+                f"latency avg/max: {summary['latency_avg_us']}/{summary['latency_max_us']} us "
+                f"retries: {summary['retries']} errors: {summary['errors']}"
+            )
+        return "\n".join(lines)
+
+    def write_stats(self, path, timestamp=None):
+        """
+        Write the counters to a JSON file, replacing it atomically.
+
+        Args:
+            path (str): Path of the stats file.
+            timestamp (float): Seconds since the epoch recorded in the file. Defaults to time.time().
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"time": time.time() if timestamp is None else timestamp, "devices": self.stats()}, f, indent=2)
+        os.replace(tmp_path, path)
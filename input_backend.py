@@ -0,0 +1,250 @@
+# input_backend.py
+# Input backends for aclock.py.
+# PollingInput reads every input device on every pass (the original behaviour).
+# InterruptInput arms the seesaw encoder/GPIO interrupts and the APDS9960 proximity
+# interrupt, waits on their INT lines and only lets the clock read a device after
+# it has signaled. Sources without an INT pin, or whose device cannot be armed,
+# fall back to polling.
+
+import threading
+
+# Input sources and the seesaw pins that raise interrupts on them
+INPUT_SOURCES = ("encoder", "arcade", "apds")
+ENCODER_BUTTON_PIN = 24
+ARCADE_BUTTON_PINS = (18, 19)
+
+
+class PollingInput:
+    """
+    PollingInput reports every source as pending, so the clock reads all devices on every pass.
+    """
+    interrupt_driven = False
+
+    def __init__(self, sleep=None):
+        """
+        Initialize the backend.
+
+        Args:
+            sleep (callable): Used to wait out the poll interval, e.g. a virtual clock's sleep.
+                None waits in real time, ending early when notify() is called.
+        """
+        self.sleep = sleep
+        self._event = threading.Event()
+
+    def arm(self, clock, sources=INPUT_SOURCES):
+        """
+        Nothing to arm when polling.
+        """
+
+    def take(self, source):
+        """
+        Return True if the clock should read the given source. Always True when polling.
+        """
+        return True
+
+    def polls(self, source):
+        """
+        Return True if the source has to be read on a timer because it cannot signal. Always True when polling.
+        """
+        return True
+
+    def wait(self, timeout):
+        """
+        Sleep for the poll interval, or until notify() is called.
+
+        Returns:
+            bool: True if notify() ended the wait.
+        """
+        if self.sleep is None:
+            signaled = self._event.wait(timeout)
+        else:
+            signaled = self._event.is_set()
+            if not signaled:
+                self.sleep(timeout)
+        self._event.clear()
+        return signaled
+
+    def notify(self):
+        """
+        End the current or next wait() early. Safe to call from any thread.
+        """
+        self._event.set()
+
+    def add_listener(self, callback):
+        """
+        Polling never signals, so listeners are not called.
+        """
+
+    def close(self):
+        """
+        Nothing to release when polling.
+        """
+
+
+class InterruptInput:
+    """
+    InterruptInput waits on the INT lines of the input boards and only marks a source pending after it signaled.
+
+    Features:
+        - Seesaw encoder and GPIO interrupts for the rotary encoder and its button
+        - Seesaw GPIO interrupts for the arcade buttons
+        - APDS9960 proximity interrupt to gate gesture reads
+        - Polling fallback for any source without an INT pin or whose device could not be armed
+    """
+    interrupt_driven = True
+
+    def __init__(self, int_pins, logger=None, proximity_threshold=5, proximity_persistence=4):
+        """
+        Configure the Raspberry Pi GPIO pins wired to the INT outputs.
+
+        Args:
+            int_pins (dict): Source name ("encoder", "arcade", "apds") to BCM pin number. Sources without a pin are polled.
+            logger: Logger used for interrupt setup errors.
+            proximity_threshold (int): APDS9960 proximity count that raises the interrupt.
+            proximity_persistence (int): Consecutive proximity cycles above the threshold before the interrupt fires.
+        """
+        import RPi.GPIO as GPIO
+        self.GPIO = GPIO
+        self.logger = logger
+        self.proximity_threshold = proximity_threshold
+        self.proximity_persistence = proximity_persistence
+        self.int_pins = {source: pin for source, pin in int_pins.items() if pin is not None}
+        # Every source starts pending so the clock reads its initial state once
+        self._flags = {source: True for source in self.int_pins}
+        self._clear = {}
+        # Sources with an INT pin whose device could not be armed
+        self._polled = set()
+        self._listeners = []
+        self._event = threading.Event()
+        self.interrupts = {source: 0 for source in self.int_pins}
+        GPIO.setmode(GPIO.BCM)
+        for source, pin in self.int_pins.items():
+            # INT outputs are open drain and active low
+            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(pin, GPIO.FALLING, callback=lambda channel, source=source: self._signal(source))
+
+    def _signal(self, source):
+        # Runs on the GPIO callback thread
+        self._flags[source] = True
+        self.interrupts[source] += 1
+        self._event.set()
+        for callback in self._listeners:
+            callback()
+
+    def arm(self, clock, sources=INPUT_SOURCES):
+        """
+        Enable the interrupt outputs on the devices of the given AlarmClock and register how each one is cleared.
+
+        Args:
+            clock (AlarmClock): The clock whose devices should raise interrupts.
+            sources (tuple): Sources to arm, so a device that is initialized later can be armed on its own.
+                A source whose device cannot be armed is polled instead.
+        """
+        for source in sources:
+            if source not in self.int_pins:
+                continue
+            try:
+                self._arm_source(clock, source)
+                self._polled.discard(source)
+            except Exception as e:
+                # Poll this source until a later arm() succeeds; the others keep their interrupts
+                self._polled.add(source)
+                self._clear.pop(source, None)
+                if self.logger:
+                    self.logger.error("%s interrupt setup error, polling instead: %s", source, str(e))
+
+    def _arm_source(self, clock, source):
+        bus = clock.bus
+        if source == "encoder":
+            clock.encoder_seesaw.enable_encoder_interrupt()
+            clock.encoder_seesaw.set_GPIO_interrupts(1 << ENCODER_BUTTON_PIN, True)
+            self._clear["encoder"] = lambda: bus.read("encoder", clock.encoder_seesaw.get_GPIO_interrupt_flag)
+        elif source == "arcade":
+            pins = 0
+            for pin in ARCADE_BUTTON_PINS:
+                pins |= 1 << pin
+            clock.arcade.set_GPIO_interrupts(pins, True)
+            self._clear["arcade"] = lambda: bus.read("arcade", clock.arcade.get_GPIO_interrupt_flag)
+        elif source == "apds":
+            clock.apds.proximity_interrupt_threshold = (0, self.proximity_threshold, self.proximity_persistence)
+            clock.apds.enable_proximity_interrupt = True
+            self._clear["apds"] = lambda: bus.read("apds", clock.apds.clear_interrupt)
+
+    def take(self, source):
+        """
+        Return True if the clock should read the given source, clearing its pending flag and the device interrupt.
+        Sources without an INT pin are always read. A line still held low counts as pending, so a missed edge is not lost.
+
+        Args:
+            source (str): One of INPUT_SOURCES.
+        """
+        pin = self.int_pins.get(source)
+        if pin is None or source in self._polled:
+            return True
+        if not self._flags[source] and self.GPIO.input(pin):
+            return False
+        self._flags[source] = False
+        clear = self._clear.get(source)
+        if clear:
+            try:
+                clear()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error("%s interrupt clear error: %s", source, str(e))
+        return True
+
+    def polls(self, source):
+        """
+        Return True if the source has no INT pin, or its device could not be armed, and has to be read on a timer.
+        """
+        return source not in self.int_pins or source in self._polled
+
+    def wait(self, timeout):
+        """
+        Block until any input signals, notify() is called or the timeout passes.
+
+        Returns:
+            bool: True if an input signaled.
+        """
+        signaled = self._event.wait(timeout)
+        self._event.clear()
+        return signaled
+
+    def notify(self):
+        """
+        End the current or next wait() early. Safe to call from any thread.
+        """
+        self._event.set()
+
+    def add_listener(self, callback):
+        """
+        Register a callable run on the GPIO callback thread whenever any input signals.
+        """
+        self._listeners.append(callback)
+
+    def close(self):
+        """
+        Release the GPIO pins.
+        """
+        for pin in self.int_pins.values():
+            self.GPIO.remove_event_detect(pin)
+        self.GPIO.cleanup(list(self.int_pins.values()))
+
+
+def create_input_backend(int_pins=None, logger=None, sleep=None):
+    """
+    Return an InterruptInput if any INT pin is configured, otherwise a PollingInput.
+    Falls back to polling if the GPIO library is unavailable.
+
+    Args:
+        int_pins (dict): Source name to BCM pin number, or None.
+        logger: Logger used for setup errors.
+        sleep (callable): Used by the polling backend to wait out the poll interval, None to wait in real time.
+    """
+    if int_pins and any(pin is not None for pin in int_pins.values()):
+        try:
+            return InterruptInput(int_pins, logger)
+        except Exception as e:
+            if logger:
+                logger.error("Interrupt input unavailable, polling instead: %s", str(e))
+    return PollingInput(sleep)
@@ -0,0 +1,290 @@
+# log_pipeline.py
+# Logging for aclock.py that stays off the main loop.
+# The loop's logger only puts records on a bounded queue; a background
+# QueueListener formats them and writes them to the console and, as JSON
+# lines, to a size-rotated log file. Records are rate limited per message key
+# before they are queued, and the verbosity can be changed while running.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+LOG_FILE = "aclock.log"
+# Verbosity names accepted by LogPipeline.set_verbosity(), quietest first
+VERBOSITY = {"quiet": logging.WARNING, "info": logging.INFO, "debug": logging.DEBUG}
+# Attributes every LogRecord has; anything else on a record came from extra={...} and is a structured field
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+# One pipeline per logger name, so every AlarmClock in a process shares the listener thread
+_pipelines = {}
+
+
+def record_key(record):
+    """
+    Return the rate limiting key of a record: its "key" field, or the unformatted message.
+    """
+    return getattr(record, "key", None) or record.msg
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    RateLimitFilter lets at most burst records per key through in each interval and drops the rest.
+
+    The first record of a key that passes after some were dropped carries the number dropped in its
+    "suppressed" field. Runs on the logging thread before the record is queued, so dropped records cost
+    no queue slot and no formatting.
+    """
+
+    def __init__(self, interval=10.0, burst=20, time_source=time.monotonic):
+        """
+        Initialize the filter.
+
+        Args:
+            interval (float): Length of a rate limiting window in seconds.
+            burst (int): Records per key let through in one window.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.time_source = time_source
+        # key -> [window start, records passed, records dropped]
+        self._windows = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record):
+        key = record_key(record)
+        now = self.time_source()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            self.dropped += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object: time, level, logger, key, message and any extra fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "key": str(record_key(record)),
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and name != "key":
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    Formats a record as its message, with the level for warnings and errors and the number of
+    similar records dropped by the rate limit.
+    """
+
+    def format(self, record):
+        text = super().format(record)
+        if record.levelno >= logging.WARNING:
+            text = f"{record.levelname} {text}"
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class _StdoutHandler(logging.StreamHandler):
+    # Looks up sys.stdout for every record like print() does, so a redirected stdout is honoured
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Never blocks: a full queue drops the record and counts it
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The listener formats the record; the caller only pays for the enqueue
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """
+    LogPipeline attaches a non-blocking queue handler to a logger and writes its records on a background thread.
+
+    Features:
+        - The logging call only filters and enqueues; formatting and file and console writes run on the listener thread
+        - Bounded queue: when the writer falls behind, records are dropped and counted instead of blocking the loop
+        - Per-key rate limiting (RateLimitFilter) before the enqueue
+        - JSON lines with the extra={...} fields of each record in a size-rotated file, plain messages on the console
+        - Verbosity ("quiet", "info", "debug") switchable at run time; a signal handler only requests the
+          switch (request_cycle) and the main loop applies it (tick), so no lock is taken in signal context
+    """
+
+    def __init__(self, logger, path=LOG_FILE, verbosity="info", console=True, max_bytes=1024 * 1024, backup_count=3,
+                 queue_size=1000, rate_interval=10.0, rate_burst=20):
+        """
+        Attach the pipeline to a logger and start the writer thread.
+
+        Args:
+            logger (logging.Logger): Logger whose records the pipeline handles; it stops propagating to the root logger.
+            path (str): Log file, None for console only.
+            verbosity (str): One of VERBOSITY.
+            console (bool): Also write the messages to stdout.
+            max_bytes (int): Size at which the log file is rotated.
+            backup_count (int): Rotated files kept.
+            queue_size (int): Records queued before new ones are dropped.
+            rate_interval (float): Rate limiting window in seconds.
+            rate_burst (int): Records per message key let through in one window.
+        """
+        self.logger = logger
+        self.queue = queue.Queue(queue_size)
+        self.handler = _QueueHandler(self.queue)
+        self.rate_limit = RateLimitFilter(rate_interval, rate_burst)
+        self.handler.addFilter(self.rate_limit)
+        self.handlers = []
+        if path:
+            file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                                delay=True)
+            file_handler.setFormatter(JsonFormatter())
+            self.handlers.append(file_handler)
+        if console:
+            console_handler = _StdoutHandler()
+            console_handler.setFormatter(ConsoleFormatter("%(message)s"))
+            self.handlers.append(console_handler)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers)
+        self.verbosity = None
+        self.cycle_requested = False
+        self.set_verbosity(verbosity)
+        logger.addHandler(self.handler)
+        logger.propagate = False
+        self.listener.start()
+        self._stopped = False
+        atexit.register(self.stop)
+
+    def set_verbosity(self, verbosity):
+        """
+        Set the lowest level that is logged.
+
+        Args:
+            verbosity (str): One of VERBOSITY.
+        """
+        if verbosity not in VERBOSITY:
+            raise ValueError(f"Unknown verbosity: {verbosity}")
+        self.verbosity = verbosity
+        self.logger.setLevel(VERBOSITY[verbosity])
+
+    def cycle_verbosity(self):
+        """
+        Switch to the next verbosity, quiet -> info -> debug -> quiet, and log the change.
+        """
+        names = list(VERBOSITY)
+        self.set_verbosity(names[(names.index(self.verbosity) + 1) % len(names)])
+        self.logger.warning("Log verbosity %s", self.verbosity)
+
+    def request_cycle(self, signum=None, frame=None):
+        """
+        Signal handler: ask for cycle_verbosity() on the next tick(). Only sets a flag, because the handler
+        can interrupt the main thread while it holds the rate limit or queue lock.
+        """
+        self.cycle_requested = True
+
+    def tick(self):
+        """
+        Apply a verbosity cycle requested by request_cycle(). Called from the main loop.
+        """
+        if self.cycle_requested:
+            self.cycle_requested = False
+            self.cycle_verbosity()
+
+    def flush(self, timeout=1.0):
+        """
+        Wait until the writer thread has handled every queued record, or timeout seconds.
+
+        Returns:
+            bool: True if the queue was drained.
+        """
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for handler in self.handlers:
+            handler.flush()
+        return not self.queue.unfinished_tasks
+
+    def stop(self):
+        """
+        Write the queued records, stop the writer thread and detach from the logger.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        self.listener.stop()
+        self.logger.removeHandler(self.handler)
+        for handler in self.handlers:
+            handler.close()
+        _pipelines.pop(self.logger.name, None)
+
+    def stats(self):
+        """
+        Return the pipeline counters.
+
+        Returns:
+            dict: Verbosity, records queued, records dropped by the rate limit and by a full queue, and queue depth.
+        """
+        return {
+            "verbosity": self.verbosity,
+            "enqueued": self.handler.enqueued,
+            "rate_limited": self.rate_limit.dropped,
+            "queue_full": self.handler.dropped,
+            "queued": self.queue.qsize(),
+        }
+
+
+def setup_logging(logger, **options):
+    """
+    Return the LogPipeline of a logger, creating it on first use.
+
+    Args:
+        logger (logging.Logger): The logger.
+        **options: Passed to LogPipeline when it is created.
+    """
+    pipeline = _pipelines.get(logger.name)
+    if pipeline is None:
+        pipeline = _pipelines[logger.name] = LogPipeline(logger, **options)
+    return pipeline
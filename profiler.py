@@ -0,0 +1,234 @@
+# profiler.py
+# Per-phase profiler for the aclock.py main loop.
+# main_loop_iteration() marks the end of each phase; the profiler keeps a
+# rolling window of phase durations, loop start intervals and over-budget
+# iterations and logs a percentile report on request or at an interval.
+# When disabled, begin/mark/end are bound to a no-op.
+# WakeStats counts how often the loop wakes and why, and how much of the time
+# the process spends idle.
+
+import logging
+import math
+import time
+from collections import deque
+
+# Number of slowest recent iterations kept with their phase breakdown
+SLOW_ITERATIONS_KEPT = 5
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return the nearest-rank percentile of an already sorted list, or 0.0 if it is empty.
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        fraction (float): 0.5 for p50, 0.99 for p99.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+class LoopProfiler:
+    """
+    LoopProfiler times the phases of each main loop pass.
+
+    Features:
+        - Rolling p50/p95/p99/max per phase and for the whole pass over the last window passes
+        - Loop jitter: spread of the intervals between pass starts
+        - Passes longer than the budget are counted and the slowest recent ones kept with their breakdown
+        - Report on request (SIGUSR1 in aclock.py) or every report_interval seconds
+
+    Durations are real elapsed time from time.perf_counter, also when the clock runs on virtual time.
+    """
+
+    def __init__(self, enabled=False, window=1000, budget=0.015, report_interval=None, time_source=time.perf_counter,
+                 logger=None):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled (bool): False makes begin(), mark() and end() no-ops.
+            window (int): Number of recent passes the percentiles are computed over.
+            budget (float): Seconds a pass may take before it is flagged.
+            report_interval (float): Seconds between automatic reports, None for reports on request only.
+            time_source (callable): Returns the current time in seconds.
+            logger (logging.Logger): Logger the reports go to. Defaults to the "aclock" logger, whose queue
+                pipeline writes them on its own thread.
+        """
+        self.enabled = enabled
+        self.logger = logging.getLogger("aclock") if logger is None else logger
+        self.window = window
+        self.budget = budget
+        self.report_interval = report_interval
+        self.time_source = time_source
+        self.phases = {}
+        self.totals = deque(maxlen=window)
+        self.intervals = deque(maxlen=window)
+        self.iterations = 0
+        self.over_budget = 0
+        self.slow_iterations = deque(maxlen=SLOW_ITERATIONS_KEPT)
+        self.report_requested = False
+        self._start = None
+        self._last_mark = None
+        self._current = []
+        self._last_report = time_source()
+        if not enabled:
+            self.begin = self.mark = self.end = self._noop
+
+    def _noop(self, *args):
+        pass
+
+    def request_report(self, signum=None, frame=None):
+        """
+        Ask for a report at the end of the current pass. Usable as a signal handler.
+        """
+        self.report_requested = True
+
+    def begin(self):
+        """
+        Mark the start of a loop pass.
+        """
+        now = self.time_source()
+        if self._start is not None:
+            self.intervals.append(now - self._start)
+        self._start = now
+        self._last_mark = now
+        self._current = []
+
+    def mark(self, phase):
+        """
+        Mark the end of a phase; its duration runs from the previous mark or begin().
+
+        Args:
+            phase (str): Name of the phase that just finished.
+        """
+        now = self.time_source()
+        duration = now - self._last_mark
+        self._last_mark = now
+        samples = self.phases.get(phase)
+        if samples is None:
+            samples = self.phases[phase] = deque(maxlen=self.window)
+        samples.append(duration)
+        self._current.append((phase, duration))
+
+    def end(self):
+        """
+        Mark the end of a loop pass, flag it if it ran over budget and log a report if one is due.
+        """
+        now = self.time_source()
+        total = now - self._start
+        self.totals.append(total)
+        self.iterations += 1
+        if total > self.budget:
+            self.over_budget += 1
+            self.slow_iterations.append((total, self._current))
+        due = self.report_interval is not None and now - self._last_report >= self.report_interval
+        if self.report_requested or due:
+            self.report_requested = False
+            self._last_report = now
+            self.logger.info("%s", self.report(), extra={"key": "profiler", "profile": self.summary()})
+
+    def summary(self):
+        """
+        Return the profile as a dict.
+
+        Returns:
+            dict: Per-phase and total p50/p95/p99/max in milliseconds, loop interval jitter, and budget counters.
+        """
+        def stats(samples):
+            ordered = sorted(samples)
+            return {
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+            }
+        intervals = list(self.intervals)
+        jitter = 0.0
+        if len(intervals) > 1:
+            mean = sum(intervals) / len(intervals)
+            jitter = math.sqrt(sum((value - mean) ** 2 for value in intervals) / len(intervals))
+        return {
+            "iterations": self.iterations,
+            "over_budget": self.over_budget,
+            "budget_ms": round(self.budget * 1000, 3),
+            "total": stats(self.totals),
+            "phases": {phase: stats(samples) for phase, samples in self.phases.items()},
+            "interval": stats(intervals),
+            "jitter_ms": round(jitter * 1000, 3),
+        }
+
+    def report(self):
+        """
+        Return the profile as printable text.
+        """
+        summary = self.summary()
+        lines = [
+            f"loop profile: {summary['iterations']} passes, {summary['over_budget']} over the "
+            f"{summary['budget_ms']} ms budget, jitter {summary['jitter_ms']} ms"
+        ]
+        rows = [("total", summary["total"]), ("interval", summary["interval"])] + list(summary["phases"].items())
+        lines.append(f"  {'phase':12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, row in rows:
+            lines.append(f"  {name:12}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+        for total, phases in self.slow_iterations:
+            breakdown = ", ".join(f"{phase} {duration * 1000:.2f}" for phase, duration in phases)
+            lines.append(f"  slow pass {total * 1000:.2f} ms: {breakdown}")
+        return "\n".join(lines)
+
+
+class WakeStats:
+    """
+    WakeStats counts main loop wakeups by the deadline that ended each sleep.
+
+    Features:
+        - Wakeups in total, per second and per reason ("display", "alarm", "input", ...)
+        - CPU time used as a percentage of elapsed time, and the idle remainder
+
+    Elapsed time comes from time_source; on a virtual clock the CPU and idle percentages are not meaningful.
+    """
+
+    def __init__(self, time_source=time.monotonic, cpu_time=time.process_time):
+        """
+        Initialize the counters.
+
+        Args:
+            time_source (callable): Returns the current monotonic time in seconds.
+            cpu_time (callable): Returns the CPU time used by the process in seconds.
+        """
+        self.time_source = time_source
+        self.cpu_time = cpu_time
+        self.wakeups = 0
+        self.reasons = {}
+        self._start = time_source()
+        self._start_cpu = cpu_time()
+
+    def record(self, reason):
+        """
+        Count one wakeup.
+
+        Args:
+            reason (str): The deadline the loop slept until.
+        """
+        self.wakeups += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    def summary(self):
+        """
+        Return the counters as a dict.
+
+        Returns:
+            dict: Wakeups, wakeups per second, wakeups per reason, CPU and idle percentages.
+        """
+        elapsed = self.time_source() - self._start
+        cpu = self.cpu_time() - self._start_cpu
+        cpu_pct = min(cpu / elapsed * 100, 100.0) if elapsed > 0 else 0.0
+        return {
+            "wakeups": self.wakeups,
+            "wakeups_per_sec": round(self.wakeups / elapsed, 2) if elapsed > 0 else 0.0,
+            "reasons": dict(sorted(self.reasons.items(), key=lambda item: -item[1])),
+            "cpu_pct": round(cpu_pct, 2),
+            "idle_pct": round(100.0 - cpu_pct, 2),
+        }
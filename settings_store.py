@@ -0,0 +1,149 @@
+# settings_store.py
+# Write-behind persistence for settings.json.
+# save() only records the new settings; they are written after a quiet period
+# (or on shutdown) with an atomic temp file + fsync + rename, and not written
+# at all when the content matches what is already on disk.
+
+import json
+import os
+import time
+
+
+class SettingsStore:
+    """
+    SettingsStore debounces and atomically writes the persisted AlarmClock settings.
+
+    Features:
+        - Settings marked dirty by save() are flushed after quiet_period seconds without changes
+        - Atomic writes: temp file, fsync, rename, so a power cut never leaves a truncated file
+        - Writes skipped when the serialized settings match the file contents
+        - Counters for saves, flushes and flushes avoided
+    """
+
+    def __init__(self, path, logger=None, quiet_period=2.0, time_source=time.monotonic):
+        """
+        Initialize the store.
+
+        Args:
+            path (str): Path of the settings file.
+            logger: Logger used for load and save errors.
+            quiet_period (float): Seconds without changes before dirty settings are written.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        self.path = path
+        self.logger = logger
+        self.quiet_period = quiet_period
+        self.time_source = time_source
+        self._pending = None
+        self._last_change = None
+        self._last_written = None
+        self.saves = 0
+        self.flushes = 0
+
+    @property
+    def flushes_avoided(self):
+        """
+        Number of save() calls that did not result in a file write.
+        """
+        return self.saves - self.flushes
+
+    def load(self):
+        """
+        Read the settings file.
+
+        Returns:
+            dict: The stored settings, or None if the file does not exist.
+        Raises:
+            ValueError: If the file is not valid JSON.
+        """
+        try:
+            with open(self.path, "r") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return None
+        settings = json.loads(content)
+        self._last_written = json.dumps(settings)
+        return settings
+
+    def save(self, settings):
+        """
+        Mark settings dirty. They are written by tick() once no further change arrives for quiet_period seconds.
+
+        Args:
+            settings (dict): The complete settings to persist.
+        """
+        self._pending = dict(settings)
+        self._last_change = self.time_source()
+        self.saves += 1
+
+    def dirty(self):
+        """
+        Return True if there are settings waiting to be written.
+        """
+        return self._pending is not None
+
+    def next_deadline(self):
+        """
+        Return the monotonic time at which dirty settings will be written, or None if nothing is pending.
+        """
+        if self._pending is None:
+            return None
+        return self._last_change + self.quiet_period
+
+    def tick(self):
+        """
+        Write dirty settings if the quiet period has passed. Call once per loop pass.
+        """
+        if self._pending is not None and self.time_source() - self._last_change >= self.quiet_period:
+            self.flush()
+
+    def flush(self):
+        """
+        Write dirty settings now, for example on shutdown.
+
+        Returns:
+            bool: True if the file was written.
+        """
+        if self._pending is None:
+            return False
+        content = json.dumps(self._pending)
+        self._pending = None
+        if content == self._last_written:
+            return False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._fsync_directory()
+        except Exception as e:
+            if self.logger:
+                self.logger.error("Failed to save settings: %s", str(e))
+            return False
+        self._last_written = content
+        self.flushes += 1
+        return True
+
+    def _fsync_directory(self):
+        # Make the rename itself durable; not supported on every platform
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def stats(self):
+        """
+        Return the save counters.
+
+        Returns:
+            dict: Saves, flushes and flushes avoided.
+        """
+        return {"saves": self.saves, "flushes": self.flushes, "flushes_avoided": self.flushes_avoided}
@@ -0,0 +1,163 @@
+# shadow_display.py
+# Shadow framebuffer for the HT16K33 based Seg7x4/Seg14x4 displays.
+# Keeps a copy of what the chip currently shows and only sends the display RAM
+# bytes that changed, skipping the write entirely when nothing changed.
+
+# Bytes in one full show(): register address plus 16 bytes of display RAM
+FULL_FRAME_BYTES = 17
+DISPLAY_RAM_BYTES = 16
+# HT16K33 commands: system oscillator on, and display on without blinking
+HT16K33_OSCILLATOR_ON = 0x21
+HT16K33_DISPLAY_ON = 0x81
+
+
+class ShadowDisplay:
+    """
+    ShadowDisplay wraps a Seg7x4 or Seg14x4 created with auto_write=False.
+
+    Features:
+        - show() writes only the changed address range of display RAM, or nothing at all
+        - Brightness commands are sent with the next show(), and only when the level changes
+        - set_frame() loads a precomputed display RAM image (see glyphs.GlyphTable) instead of fill() and print()
+        - reinit() restarts a chip that lost its state and resends the frame and brightness
+        - Counters for writes, skipped writes, bytes written and bytes saved
+
+    Everything else (fill, print, colon, ...) is passed through to the wrapped display.
+    """
+
+    def __init__(self, display):
+        """
+        Initialize the wrapper.
+
+        Args:
+            display: A Seg7x4 or Seg14x4 instance with auto_write=False.
+        """
+        self.display = display
+        # None until the first show(), the chip RAM contents are unknown at power up
+        self._shadow = None
+        self._brightness_sent = None
+        self._brightness_level = None
+        self.writes = 0
+        self.skipped_writes = 0
+        self.bytes_written = 0
+        self.bytes_saved = 0
+
+    def __getattr__(self, name):
+        return getattr(self.display, name)
+
+    @property
+    def colon(self):
+        return self.display.colon
+
+    @colon.setter
+    def colon(self, value):
+        self.display.colon = value
+
+    @property
+    def brightness(self):
+        return self.display.brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        # Deferred to show(), so the command goes out with the frame through the bus scheduler
+        self.display._brightness = value
+        # HT16K33 only has 16 levels, show() skips the command if the level would not change
+        self._brightness_level = min(round(15 * value), 15)
+
+    def set_frame(self, frame):
+        """
+        Replace the display buffer with a display RAM image. The colon and brightness can be set on top
+        of it before show().
+
+        Args:
+            frame (bytes): The 16 bytes of display RAM.
+        """
+        self.display._buffer[1:DISPLAY_RAM_BYTES + 1] = frame
+
+    def invalidate(self):
+        """
+        Forget what the chip shows, so the next show() sends the whole frame.
+        """
+        self._shadow = None
+        self._brightness_sent = None
+
+    def reinit(self):
+        """
+        Turn the oscillator and display back on after the chip lost power or state. The next show()
+        sends the whole frame and the brightness.
+        """
+        self.display._write_cmd(HT16K33_OSCILLATOR_ON)
+        self.display._write_cmd(HT16K33_DISPLAY_ON)
+        self.invalidate()
+
+    def show(self):
+        """
+        Send a changed brightness level and the display RAM bytes that differ from what the chip currently shows.
+        """
+        level = self._brightness_level
+        if level is not None and level != self._brightness_sent:
+            try:
+                self.display.brightness = self.display._brightness
+            except Exception:
+                # Resend the frame too, so the next show() is a real write that shows whether the chip is back
+                self._shadow = None
+                raise
+            self._brightness_sent = level
+        buffer = self.display._buffer
+        shadow = self._shadow
+        if shadow is None:
+            first, last = 0, DISPLAY_RAM_BYTES - 1
+        else:
+            first = 0
+            while first < DISPLAY_RAM_BYTES and buffer[first + 1] == shadow[first]:
+                first += 1
+            if first == DISPLAY_RAM_BYTES:
+                self.skipped_writes += 1
+                self.bytes_saved += FULL_FRAME_BYTES
+                return
+            last = DISPLAY_RAM_BYTES - 1
+            while buffer[last + 1] == shadow[last]:
+                last -= 1
+        self.write_range(first, last)
+
+    def write_range(self, first, last):
+        """
+        Write display RAM addresses first..last from the display buffer in one transaction.
+        The HT16K33 address pointer auto increments, so the payload is the start address followed by the data.
+
+        Args:
+            first (int): First display RAM address to write.
+            last (int): Last display RAM address to write.
+        """
+        buffer = self.display._buffer
+        payload = bytearray(last - first + 2)
+        payload[0] = first
+        payload[1:] = buffer[first + 1:last + 2]
+        device = self.display.i2c_device[0]
+        try:
+            with device:
+                device.write(payload)
+        except Exception:
+            # The chip may hold a partial frame now
+            self._shadow = None
+            raise
+        if self._shadow is None:
+            self._shadow = bytearray(DISPLAY_RAM_BYTES)
+        self._shadow[first:last + 1] = buffer[first + 1:last + 2]
+        self.writes += 1
+        self.bytes_written += len(payload)
+        self.bytes_saved += FULL_FRAME_BYTES - len(payload)
+
+    def stats(self):
+        """
+        Return the write counters.
+
+        Returns:
+            dict: Writes, skipped writes, bytes written and bytes saved compared to full frame writes.
+        """
+        return {
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+            "bytes_written": self.bytes_written,
+            "bytes_saved": self.bytes_saved,
+        }
@@ -0,0 +1,824 @@
+# sim_hardware.py
+# Simulated hardware backend for aclock.py.
+# Stands in for the Blinka I2C bus, HT16K33 displays, Seesaw encoder and arcade
+# boards, APDS9960 and pygame.mixer so AlarmClock runs headless on any Linux
+# box. Displays record every frame that reaches the chip, inputs are driven by
+# a script of timed events, and the bus can model the transaction time of a
+# 100 kHz I2C bus. Faults can be injected per device or for the whole bus.
+
+import bisect
+import errno
+import itertools
+import threading
+import time
+from collections import deque
+
+I2C_FREQUENCY = 100000
+# Each byte on the wire is 8 data bits plus ACK
+BITS_PER_BYTE = 9
+# Input script actions accepted by SimHardware.script()
+SCRIPT_ACTIONS = ("encoder", "encoder_button", "button", "gesture", "proximity", "fault")
+# Device names accepted by SimHardware.fail_device(); "bus" fails every address, like a device holding SDA low
+FAULT_ADDRESSES = {
+    "alpha_display": 0x70,
+    "num_display": 0x72,
+    "encoder": 0x36,
+    "apds": 0x39,
+    "arcade": 0x3A,
+    "bus": None,
+}
+
+# 7 segment patterns for the characters the clock prints
+SEG7_CHARS = {
+    "0": 0x3F, "1": 0x06, "2": 0x5B, "3": 0x4F, "4": 0x66,
+    "5": 0x6D, "6": 0x7D, "7": 0x07, "8": 0x7F, "9": 0x6F,
+    "A": 0x77, "B": 0x7C, "C": 0x39, "D": 0x5E, "E": 0x79, "F": 0x71,
+    "-": 0x40, " ": 0x00,
+}
+SEG7_DECODE = {pattern: char for char, pattern in SEG7_CHARS.items()}
+
+
+class SimI2C:
+    """
+    SimI2C stands in for busio.I2C and routes transactions to simulated chips.
+
+    Features:
+        - try_lock()/unlock() like busio.I2C, so drivers can share it between threads
+        - Per-address transaction and byte counters
+        - Optional latency model: each transaction sleeps for its time on a 100 kHz bus
+        - Fault injection: transactions to a device, or to every device, fail with a Remote I/O error
+    """
+
+    def __init__(self, latency=False, frequency=I2C_FREQUENCY, sleep=time.sleep, time_source=time.monotonic):
+        """
+        Initialize the bus.
+
+        Args:
+            latency (bool): Sleep for the modeled wire time of every transaction.
+            frequency (int): Modeled bus clock in Hz.
+            sleep (callable): Used to wait out the modeled wire time.
+            time_source (callable): Times injected faults.
+        """
+        self.latency = latency
+        self.frequency = frequency
+        self.sleep = sleep
+        self.time_source = time_source
+        # [start, end or None, address or None, reset]
+        self.faults = []
+        self.failed_transactions = 0
+        self.recoveries = 0
+        self._lock = threading.Lock()
+        self.chips = {}
+        self.transactions = 0
+        self.bytes = 0
+        self.bus_time = 0.0
+        self.per_address = {}
+
+    def attach(self, address, chip):
+        """
+        Attach a simulated chip that receives the writes sent to address. Returns the chip.
+        """
+        self.chips[address] = chip
+        return chip
+
+    def try_lock(self):
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self):
+        self._lock.release()
+
+    def scan(self):
+        return sorted(self.chips)
+
+    def deinit(self):
+        pass
+
+    def inject_fault(self, address=None, duration=None, delay=0.0, reset=True):
+        """
+        Make transactions fail with a Remote I/O error (a NAK), as a glitching or browned out device would.
+
+        Args:
+            address (int): Device address, None for every address.
+            duration (float): Seconds the fault lasts, None until recover() for a bus wide fault.
+            delay (float): Seconds from now until the fault starts.
+            reset (bool): The chip comes back with its power-on state, e.g. a blank display that is switched off.
+        """
+        start = self.time_source() + delay
+        self.faults.append([start, None if duration is None else start + duration, address, reset])
+
+    def recover(self):
+        """
+        Clear the bus wide faults that last until recovery, as clocking out a device holding SDA low does.
+        """
+        self.recoveries += 1
+        now = self.time_source()
+        for fault in self.faults:
+            if fault[2] is None and fault[1] is None and fault[0] <= now:
+                fault[1] = now
+
+    def _check_fault(self, address):
+        now = self.time_source()
+        for fault in list(self.faults):
+            start, end, fault_address, reset = fault
+            if now < start or (fault_address is not None and fault_address != address):
+                continue
+            if end is None or now < end:
+                self.failed_transactions += 1
+                raise OSError(errno.EREMOTEIO, "Remote I/O error")
+            self.faults.remove(fault)
+            if reset:
+                for chip_address, chip in self.chips.items():
+                    if fault_address in (None, chip_address):
+                        chip.reset()
+
+    def transaction_time(self, nbytes):
+        """
+        Return the modeled seconds one transaction of nbytes data bytes occupies the bus, address byte included.
+        """
+        return (nbytes + 1) * BITS_PER_BYTE / self.frequency
+
+    def _account(self, address, nbytes):
+        duration = self.transaction_time(nbytes)
+        self.transactions += 1
+        self.bytes += nbytes
+        self.bus_time += duration
+        counts = self.per_address.setdefault(address, [0, 0])
+        counts[0] += 1
+        counts[1] += nbytes
+        if self.latency:
+            self.sleep(duration)
+
+    def writeto(self, address, buffer, *, start=0, end=None):
+        if self.faults:
+            self._check_fault(address)
+        data = bytes(buffer[start:end])
+        self._account(address, len(data))
+        chip = self.chips.get(address)
+        if chip is not None:
+            chip.on_write(data)
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None):
+        if self.faults:
+            self._check_fault(address)
+        end = len(buffer) if end is None else end
+        self._account(address, end - start)
+
+    def writeto_then_readfrom(self, address, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0,
+                              in_end=None):
+        self.writeto(address, out_buffer, start=out_start, end=out_end)
+        self.readfrom_into(address, in_buffer, start=in_start, end=in_end)
+
+    def stats(self):
+        """
+        Return the bus counters.
+
+        Returns:
+            dict: Transactions, bytes, modeled bus time in milliseconds and per-address transactions and bytes.
+        """
+        return {
+            "transactions": self.transactions,
+            "bytes": self.bytes,
+            "bus_time_ms": round(self.bus_time * 1000, 2),
+            "failed_transactions": self.failed_transactions,
+            "recoveries": self.recoveries,
+            "per_address": {hex(address): tuple(counts) for address, counts in sorted(self.per_address.items())},
+        }
+
+
+class SimI2CDevice:
+    """
+    SimI2CDevice mirrors adafruit_bus_device.I2CDevice: lock the bus in a with block, then write or read.
+    """
+
+    def __init__(self, i2c, address):
+        self.i2c = i2c
+        self.device_address = address
+
+    def __enter__(self):
+        while not self.i2c.try_lock():
+            time.sleep(0)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.i2c.unlock()
+        return False
+
+    def write(self, buf, *, start=0, end=None):
+        self.i2c.writeto(self.device_address, buf, start=start, end=end)
+
+    def readinto(self, buf, *, start=0, end=None):
+        self.i2c.readfrom_into(self.device_address, buf, start=start, end=end)
+
+    def write_then_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        self.i2c.writeto_then_readfrom(self.device_address, out_buffer, in_buffer, out_start=out_start,
+                                       out_end=out_end, in_start=in_start, in_end=in_end)
+
+    def transfer(self, nwrite, nread):
+        """
+        Run a register access of nwrite bytes out and nread bytes back, for devices whose registers are not modeled.
+        """
+        with self:
+            if nread:
+                self.write_then_readinto(bytearray(nwrite), bytearray(nread))
+            else:
+                self.write(bytearray(nwrite))
+
+
+class SimHT16K33:
+    """
+    SimHT16K33 models the display RAM and command registers of an HT16K33 and records every frame written to it.
+    """
+
+    def __init__(self, time_source=time.monotonic, max_frames=1000):
+        """
+        Initialize the chip.
+
+        Args:
+            time_source (callable): Timestamps recorded frames.
+            max_frames (int): Most recent frames kept in frames.
+        """
+        self.time_source = time_source
+        self.frames = deque(maxlen=max_frames)
+        self.frame_count = 0
+        self.reset()
+
+    def reset(self):
+        """
+        Return to the power-on state: blank RAM, oscillator and display off, full brightness.
+        """
+        self.ram = bytearray(16)
+        self.brightness_level = 15
+        self.oscillator_on = False
+        self.display_on = False
+
+    def on_write(self, data):
+        if not data:
+            return
+        command = data[0]
+        if command < 0x10:
+            # Display RAM write; the address pointer auto increments
+            payload = data[1:]
+            self.ram[command:command + len(payload)] = payload
+            self.frames.append((self.time_source(), bytes(self.ram)))
+            self.frame_count += 1
+        elif command & 0xF0 == 0xE0:
+            self.brightness_level = command & 0x0F
+        elif command & 0xF0 == 0x80:
+            self.display_on = bool(command & 0x01)
+        elif command & 0xF0 == 0x20:
+            self.oscillator_on = bool(command & 0x01)
+
+
+class _SimSegments:
+    """
+    Common part of the simulated Seg7x4 and Seg14x4 drivers: a 17 byte _buffer (register address followed by
+    display RAM), an i2c_device list, fill/print/show, colon and brightness, as used by AlarmClock and ShadowDisplay.
+    """
+    # First display RAM byte of each character
+    POSITIONS = (0, 2, 4, 6)
+
+    def __init__(self, i2c, address, auto_write=True, time_source=time.monotonic):
+        self.chip = i2c.attach(address, SimHT16K33(time_source))
+        self.i2c_device = [SimI2CDevice(i2c, address)]
+        self._buffer = bytearray(17)
+        self._brightness = 1.0
+        self._auto_write = False
+        # Oscillator on, display on without blinking, full brightness, as the real driver does
+        self._write_cmd(0x21)
+        self._write_cmd(0x81)
+        self.brightness = 1.0
+        self.fill(0)
+        self._auto_write = auto_write
+
+    @property
+    def frames(self):
+        """
+        (time, 16 bytes of display RAM) for every frame that reached the chip, oldest first.
+        """
+        return self.chip.frames
+
+    @property
+    def auto_write(self):
+        return self._auto_write
+
+    @auto_write.setter
+    def auto_write(self, value):
+        self._auto_write = value
+
+    def _write_cmd(self, command):
+        with self.i2c_device[0] as device:
+            device.write(bytes([command]))
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        value = min(max(value, 0.0), 1.0)
+        self._brightness = value
+        self._write_cmd(0xE0 | min(round(15 * value), 15))
+
+    def show(self):
+        """
+        Write the whole buffer to the chip.
+        """
+        with self.i2c_device[0] as device:
+            device.write(self._buffer)
+
+    def fill(self, color):
+        fill = 0xFF if color else 0x00
+        for i in range(1, 17):
+            self._buffer[i] = fill
+        if self._auto_write:
+            self.show()
+
+    def print(self, value):
+        """
+        Push the characters of value in from the right, as the Adafruit drivers do.
+        """
+        for char in str(value):
+            if char == ".":
+                self._set_dot(len(self.POSITIONS) - 1)
+            elif char != ":":
+                self._scroll()
+                self._put(len(self.POSITIONS) - 1, char)
+        if self._auto_write:
+            self.show()
+
+    def _scroll(self):
+        width = self.CHAR_BYTES
+        for i in range(len(self.POSITIONS) - 1):
+            src = self.POSITIONS[i + 1] + 1
+            dst = self.POSITIONS[i] + 1
+            self._buffer[dst:dst + width] = self._buffer[src:src + width]
+
+    def text(self, ram=None):
+        """
+        Decode display RAM (the current buffer by default, or a recorded frame) to the characters shown.
+        """
+        if ram is None:
+            ram = self._buffer[1:]
+        return "".join(self._decode(ram, position) for position in self.POSITIONS)
+
+
+class SimSeg7x4(_SimSegments):
+    """
+    Simulated 7 segment x 4 digit display with a center colon.
+    """
+    POSITIONS = (0, 2, 6, 8)
+    CHAR_BYTES = 1
+
+    @property
+    def colon(self):
+        return bool(self._buffer[5] & 0x02)
+
+    @colon.setter
+    def colon(self, value):
+        if value:
+            self._buffer[5] |= 0x02
+        else:
+            self._buffer[5] &= ~0x02 & 0xFF
+        if self._auto_write:
+            self.show()
+
+    def _put(self, index, char):
+        self._buffer[self.POSITIONS[index] + 1] = SEG7_CHARS.get(char.upper(), 0x00)
+
+    def _set_dot(self, index):
+        self._buffer[self.POSITIONS[index] + 1] |= 0x80
+
+    def _decode(self, ram, position):
+        return SEG7_DECODE.get(ram[position] & 0x7F, "?")
+
+
+class SimSeg14x4(_SimSegments):
+    """
+    Simulated 14 segment x 4 character display. Characters are stored as their ASCII code
+    instead of the real segment font, which keeps frames readable and the byte counts the same.
+    """
+    POSITIONS = (0, 2, 4, 6)
+    CHAR_BYTES = 2
+
+    def _put(self, index, char):
+        offset = self.POSITIONS[index] + 1
+        self._buffer[offset] = ord(char) & 0x7F
+        self._buffer[offset + 1] = 0x00
+
+    def _set_dot(self, index):
+        self._buffer[self.POSITIONS[index] + 2] |= 0x40
+
+    def _decode(self, ram, position):
+        code = ram[position]
+        return chr(code) if 0x20 <= code < 0x7F else " "
+
+
+class SimSeesaw:
+    """
+    Simulated Seesaw board. Holds the bus device its encoder, pins and PWM outputs talk through.
+    """
+
+    def __init__(self, i2c, address):
+        self.i2c_device = SimI2CDevice(i2c, address)
+        self.address = address
+
+    def set_GPIO_interrupts(self, pins, enabled):
+        self.i2c_device.transfer(6, 0)
+
+    def enable_encoder_interrupt(self, encoder=0):
+        self.i2c_device.transfer(3, 0)
+
+    def get_GPIO_interrupt_flag(self):
+        self.i2c_device.transfer(2, 4)
+        return 0
+
+
+class SimEncoder:
+    """
+    Simulated Seesaw rotary encoder. The position follows the "encoder" events of the input script.
+    """
+
+    def __init__(self, hardware, seesaw):
+        self.hardware = hardware
+        self.seesaw = seesaw
+        self._position = 0
+
+    @property
+    def position(self):
+        # Seesaw encoder position register: 2 byte register address, 4 byte signed value
+        self.seesaw.i2c_device.transfer(2, 4)
+        for steps in self.hardware.due("encoder"):
+            self._position += steps
+        return self._position
+
+
+class SimDigitalIO:
+    """
+    Simulated Seesaw input pin, pulled up: value is False while a scripted press on this pin is held.
+    """
+
+    def __init__(self, hardware, seesaw, pin):
+        self.hardware = hardware
+        self.seesaw = seesaw
+        self.pin = pin
+        self.direction = None
+        self.pull = None
+        self._released_at = 0.0
+
+    @property
+    def value(self):
+        # Seesaw GPIO bulk read: 2 byte register address, 4 bytes of pin states
+        self.seesaw.i2c_device.transfer(2, 4)
+        now = self.hardware.time_source()
+        for hold in self.hardware.due(("button", self.seesaw.address, self.pin)):
+            self._released_at = max(self._released_at, now + hold)
+        return now >= self._released_at
+
+
+class SimPWMOut:
+    """
+    Simulated Seesaw PWM output; every duty cycle write goes over the bus.
+    """
+
+    def __init__(self, seesaw, pin):
+        self.seesaw = seesaw
+        self.pin = pin
+        self._duty_cycle = 0
+
+    @property
+    def duty_cycle(self):
+        return self._duty_cycle
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        # Register address, pin and 16 bit duty cycle
+        self.seesaw.i2c_device.transfer(5, 0)
+        self._duty_cycle = value
+
+
+class SimAPDS9960:
+    """
+    Simulated APDS9960. gesture() returns the "gesture" events of the input script and
+    proximity follows its "proximity" events.
+    """
+
+    def __init__(self, hardware, i2c, address=0x39):
+        self.hardware = hardware
+        self.i2c_device = SimI2CDevice(i2c, address)
+        self._enable_proximity = False
+        self._enable_gesture = False
+        self._proximity = 0
+        self.enable_proximity_interrupt = False
+        self.proximity_interrupt_threshold = (0, 0, 0)
+        self.gesture_calls = 0
+
+    def _write_enable(self):
+        # Read-modify-write of the ENABLE register
+        self.i2c_device.transfer(1, 1)
+        self.i2c_device.transfer(2, 0)
+
+    @property
+    def enable_proximity(self):
+        return self._enable_proximity
+
+    @enable_proximity.setter
+    def enable_proximity(self, value):
+        self._write_enable()
+        self._enable_proximity = value
+
+    @property
+    def enable_gesture(self):
+        return self._enable_gesture
+
+    @enable_gesture.setter
+    def enable_gesture(self, value):
+        self._write_enable()
+        self._enable_gesture = value
+
+    @property
+    def proximity(self):
+        self.i2c_device.transfer(1, 1)
+        for value in self.hardware.due("proximity"):
+            self._proximity = value
+        return self._proximity
+
+    def gesture(self):
+        self.gesture_calls += 1
+        # Gesture status register, then the 4 byte FIFO entry when a gesture is pending
+        self.i2c_device.transfer(1, 1)
+        if not self._enable_gesture:
+            return 0
+        gestures = self.hardware.due("gesture")
+        if not gestures:
+            return 0
+        self.i2c_device.transfer(1, 4)
+        # Gestures beyond the first in one read are kept for the next call
+        for later in gestures[1:]:
+            self.hardware.schedule("gesture", later, 0.0)
+        return gestures[0]
+
+    def clear_interrupt(self):
+        self.i2c_device.transfer(1, 0)
+
+
+class NullChannel:
+    """
+    Mixer channel that plays nothing and reports busy for the length of its sound.
+    """
+
+    def __init__(self, mixer, sound, loops):
+        self.mixer = mixer
+        self.sound = sound
+        self.loops = loops
+        self.started = mixer.time_source()
+        self.stopped = False
+        self.volume = 1.0
+
+    def set_volume(self, volume):
+        self.mixer._log("Channel.set_volume", volume)
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def stop(self):
+        self.mixer._log("Channel.stop", self.sound.path)
+        self.stopped = True
+
+    def get_busy(self):
+        if self.stopped:
+            return False
+        if self.loops < 0:
+            return True
+        return self.mixer.time_source() - self.started < self.sound.length * (self.loops + 1)
+
+
+class NullSound:
+    """
+    Sound that is never decoded. Every track is treated as length seconds long.
+    """
+
+    def __init__(self, mixer, path, length):
+        self.mixer = mixer
+        self.path = path
+        self.length = length
+        self.volume = 1.0
+
+    def get_length(self):
+        return self.length
+
+    def set_volume(self, volume):
+        self.mixer._log("Sound.set_volume", self.path, volume)
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def play(self, loops=0):
+        self.mixer._log("Sound.play", self.path, loops)
+        return NullChannel(self.mixer, self, loops)
+
+
+class NullMixer:
+    """
+    Stand-in for pygame.mixer that plays nothing and records every call in calls.
+    """
+
+    def __init__(self, logger=None, sound_length=1.0, time_source=time.monotonic, max_calls=1000):
+        """
+        Initialize the mixer.
+
+        Args:
+            logger: If given, every call is also logged at DEBUG level.
+            sound_length (float): Length in seconds reported for every sound.
+            time_source (callable): Used to time sound playback.
+            max_calls (int): Most recent calls kept in calls.
+        """
+        self.logger = logger
+        self.sound_length = sound_length
+        self.time_source = time_source
+        self.calls = deque(maxlen=max_calls)
+
+    def _log(self, name, *args):
+        self.calls.append((self.time_source(), name, args))
+        if self.logger:
+            self.logger.debug("mixer %s%s", name, args)
+
+    def init(self, *args, **kwargs):
+        self._log("init")
+
+    def quit(self):
+        self._log("quit")
+
+    def get_init(self):
+        return (44100, -16, 2)
+
+    def Sound(self, path):
+        self._log("Sound", path)
+        return NullSound(self, path, self.sound_length)
+
+
+class SimHardware:
+    """
+    SimHardware creates simulated devices with the same factory methods as hardware.PiHardware.
+
+    Inputs are scripted: schedule events with turn_encoder(), press_encoder_button(), press_button(),
+    wave() and set_proximity(), or pass a list of {"at", "action", "value"} dicts to script().
+    fail_device() injects I2C faults the same way.
+    Event times are seconds after the backend was created, or after the call for the helper methods.
+    """
+    name = "sim"
+
+    def __init__(self, latency=False, script=None, time_source=time.monotonic, sleep=time.sleep, logger=None):
+        """
+        Initialize the backend.
+
+        Args:
+            latency (bool): Model the transaction time of a 100 kHz I2C bus.
+            script (list): Input events, see script().
+            time_source (callable): Returns the current monotonic time in seconds.
+            sleep (callable): Used by the bus latency model.
+            logger: Passed to the null mixer.
+        """
+        self.latency = latency
+        self.time_source = time_source
+        self.sleep = sleep
+        self.logger = logger
+        self.started = time_source()
+        self._events = {}
+        self._sequence = itertools.count()
+        self.bus = None
+        # Faults scripted before i2c() created the bus: (start, address, duration, reset)
+        self._pending_faults = []
+        self.displays = {}
+        self.null_mixer = None
+        if script:
+            self.script(script)
+
+    def schedule(self, kind, value, delay=0.0):
+        """
+        Queue an input event of the given kind, delay seconds from now.
+        """
+        due = self.time_source() + delay
+        events = self._events.setdefault(kind, [])
+        bisect.insort(events, (due, next(self._sequence), value))
+
+    def due(self, kind):
+        """
+        Remove and return the values of the events of the given kind that are due.
+        """
+        events = self._events.get(kind)
+        if not events:
+            return []
+        now = self.time_source()
+        count = 0
+        while count < len(events) and events[count][0] <= now:
+            count += 1
+        values = [value for _due, _seq, value in events[:count]]
+        del events[:count]
+        return values
+
+    def script(self, events):
+        """
+        Queue a list of input events.
+
+        Args:
+            events (list): Dicts with "at" (seconds after the backend was created), "action" (one of
+                SCRIPT_ACTIONS) and "value": encoder steps, hold seconds for encoder_button, the Seesaw pin
+                for button (18 yellow, 19 white), the gesture code, the proximity count, or for fault a dict
+                with "device" (a FAULT_ADDRESSES name) and "duration" in seconds (null: until bus recovery).
+        """
+        for event in events:
+            action = event["action"]
+            if action not in SCRIPT_ACTIONS:
+                raise ValueError(f"Unknown script action: {action}")
+            delay = self.started + event.get("at", 0.0) - self.time_source()
+            value = event.get("value")
+            if action == "encoder_button":
+                self.press_encoder_button(delay, value or 0.1)
+            elif action == "button":
+                self.press_button(value, delay)
+            elif action == "fault":
+                self.fail_device(value["device"], value.get("duration"), delay)
+            else:
+                self.schedule(action, value, delay)
+
+    def turn_encoder(self, steps, delay=0.0):
+        self.schedule("encoder", steps, delay)
+
+    def press_encoder_button(self, delay=0.0, hold=0.1):
+        self.schedule(("button", 0x36, 24), hold, delay)
+
+    def press_button(self, pin, delay=0.0, hold=0.1):
+        self.schedule(("button", 0x3A, pin), hold, delay)
+
+    def wave(self, gesture, delay=0.0):
+        self.schedule("gesture", gesture, delay)
+
+    def set_proximity(self, value, delay=0.0):
+        self.schedule("proximity", value, delay)
+
+    def fail_device(self, device, duration=None, delay=0.0, reset=True):
+        """
+        Inject an I2C fault on the bus created by i2c(), see SimI2C.inject_fault().
+
+        Args:
+            device (str): Name in FAULT_ADDRESSES; "bus" fails every device.
+            duration (float): Seconds the fault lasts. None lasts until bus recovery for "bus", and 1 s otherwise.
+            delay (float): Seconds from now until the fault starts.
+            reset (bool): The device comes back with its power-on state.
+        """
+        if device not in FAULT_ADDRESSES:
+            raise ValueError(f"Unknown fault device: {device}")
+        address = FAULT_ADDRESSES[device]
+        if duration is None and address is not None:
+            duration = 1.0
+        if self.bus is None:
+            self._pending_faults.append((self.time_source() + delay, address, duration, reset))
+        else:
+            self.bus.inject_fault(address, duration, delay, reset)
+
+    # Device factory, same interface as hardware.PiHardware
+
+    def i2c(self):
+        self.bus = SimI2C(self.latency, sleep=self.sleep, time_source=self.time_source)
+        for start, address, duration, reset in self._pending_faults:
+            self.bus.inject_fault(address, duration, start - self.time_source(), reset)
+        self._pending_faults = []
+        return self.bus
+
+    def recover_bus(self, i2c):
+        i2c.recover()
+
+    def seg14x4(self, i2c, address=0x70, auto_write=True):
+        display = SimSeg14x4(i2c, address, auto_write, self.time_source)
+        self.displays[address] = display
+        return display
+
+    def seg7x4(self, i2c, address=0x70, auto_write=True):
+        display = SimSeg7x4(i2c, address, auto_write, self.time_source)
+        self.displays[address] = display
+        return display
+
+    def seesaw(self, i2c, address):
+        return SimSeesaw(i2c, address)
+
+    def rotary_encoder(self, seesaw):
+        return SimEncoder(self, seesaw)
+
+    def digital_io(self, seesaw, pin):
+        return SimDigitalIO(self, seesaw, pin)
+
+    def button(self, seesaw, pin):
+        return SimDigitalIO(self, seesaw, pin)
+
+    def pwm_out(self, seesaw, pin):
+        return SimPWMOut(seesaw, pin)
+
+    def gesture_sensor(self, i2c):
+        return SimAPDS9960(self, i2c)
+
+    def mixer(self):
+        self.null_mixer = NullMixer(self.logger, time_source=self.time_source)
+        self.null_mixer.init()
+        return self.null_mixer
@@ -0,0 +1,153 @@
+# startup.py
+# Startup timeline for aclock.py.
+# AlarmClock.__init__ marks the end of each init step; slow device setup runs
+# in background threads started through the timeline, so their durations are
+# recorded too. Times are measured from the start of the process where the OS
+# reports it, so interpreter startup and imports are included.
+
+import os
+import threading
+import time
+
+
+def process_age():
+    """
+    Return the seconds since this process started, or 0.0 where that is not available (non-Linux).
+    """
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # The command name may contain spaces; the start time is field 22, the 20th after it
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(time.clock_gettime(time.CLOCK_BOOTTIME) - started, 0.0)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+class StartupTimeline:
+    """
+    StartupTimeline records how long each init step took and when it finished.
+
+    Features:
+        - mark() closes a foreground step, timed from the previous mark
+        - background() runs a step in a daemon thread and records it when it finishes
+        - milestone() records an instant such as the first frame on the display
+        - Offsets are from process start, durations are real time even when the clock runs on virtual time
+    """
+
+    def __init__(self, logger=None, time_source=time.monotonic):
+        """
+        Initialize the timeline at the current time.
+
+        Args:
+            logger: Logger used for errors raised by background steps.
+            time_source (callable): Returns the current monotonic time in seconds.
+        """
+        self.logger = logger
+        self.time_source = time_source
+        self._lock = threading.Lock()
+        self._last = time_source()
+        self._origin = self._last - process_age()
+        self.steps = []
+        self.milestones = {}
+        self._threads = []
+        if self._origin < self._last:
+            # Interpreter startup and imports, up to the creation of the timeline
+            self._record("process", self._origin, self._last, False)
+
+    def _record(self, name, start, end, background, error=None):
+        with self._lock:
+            self.steps.append({
+                "step": name,
+                "start_ms": round((start - self._origin) * 1000, 1),
+                "duration_ms": round((end - start) * 1000, 1),
+                "background": background,
+                "error": error,
+            })
+
+    def mark(self, name):
+        """
+        Record the foreground step that just finished, timed from the previous mark.
+
+        Args:
+            name (str): Name of the step.
+        """
+        now = self.time_source()
+        self._record(name, self._last, now, False)
+        self._last = now
+
+    def milestone(self, name):
+        """
+        Record the current instant under the given name, e.g. "first_frame".
+        """
+        self.milestones[name] = round((self.time_source() - self._origin) * 1000, 1)
+
+    def background(self, name, fn, threaded=True):
+        """
+        Run an init step in a daemon thread and record its duration when it finishes.
+        Errors are logged and recorded, never raised.
+
+        Args:
+            name (str): Name of the step.
+            fn (callable): The step.
+            threaded (bool): False runs the step inline, e.g. on virtual time where runs must be repeatable.
+        """
+        def run():
+            start = self.time_source()
+            error = None
+            try:
+                fn()
+            except Exception as e:
+                error = str(e)
+                if self.logger:
+                    self.logger.error("Startup step %s error: %s", name, error)
+            self._record(name, start, self.time_source(), threaded, error)
+        if not threaded:
+            run()
+            self._last = self.time_source()
+            return
+        thread = threading.Thread(target=run, name=f"init-{name}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the background steps to finish.
+
+        Returns:
+            bool: True if all of them finished.
+        """
+        deadline = None if timeout is None else self.time_source() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - self.time_source(), 0.0))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def summary(self):
+        """
+        Return the timeline as a dict.
+
+        Returns:
+            dict: Steps in the order they finished, milestones in ms since process start, and
+                the number of background steps still running.
+        """
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "steps": steps,
+            "milestones": dict(self.milestones),
+            "running": sum(thread.is_alive() for thread in self._threads),
+        }
+
+    def report(self):
+        """
+        Return the timeline as printable text.
+        """
+        summary = self.summary()
+        lines = [f"startup: {', '.join(f'{name} at {ms} ms' for name, ms in summary['milestones'].items())}"]
+        for step in summary["steps"]:
+            where = "background" if step["background"] else "foreground"
+            error = f" error: {step['error']}" if step["error"] else ""
+            lines.append(f"  {step['step']:16}{step['start_ms']:>10} ms{step['duration_ms']:>10} ms  {where}{error}")
+        if summary["running"]:
+            lines.append(f"  {summary['running']} background step(s) still running")
+        return "\n".join(lines)
@@ -0,0 +1,121 @@
+# test_brightness_schedule.py
+# Checks the compiled BrightnessSchedule tables against the strptime rules that
+# AlarmClock.brightness() used before the tables, for every minute of the day.
+#
+#   python -m pytest test_brightness_schedule.py
+
+import datetime
+import functools
+from datetime import datetime as dt
+
+import pytest
+
+from brightness_schedule import BrightnessSchedule, MINUTES_PER_DAY, WINDOW_NAMES
+
+DEFAULT_WINDOWS = {
+    "manual_dim_start": "07:30", "manual_dim_end": "22:00",
+    "auto_dim_start": "22:00", "auto_dim_end": "23:59",
+    "auto_off_start": "00:00", "auto_off_end": "07:00",
+}
+DEBUG_WINDOWS = {
+    "manual_dim_start": "07:30", "manual_dim_end": "12:00",
+    "auto_dim_start": "12:00", "auto_dim_end": "12:59",
+    "auto_off_start": "13:00", "auto_off_end": "15:00",
+}
+# Saturday windows used for the per-weekday override
+WEEKEND_WINDOWS = {"manual_dim_start": "09:00", "auto_off_end": "08:45"}
+ALARM_TIMES = ("00:00", "00:01", "04:00", "06:59", "07:00", "07:29", "07:30", "12:00", "23:59")
+STARTING_MODES = ("MANUAL_DIM", "AUTO_DIM", "AUTO_OFF", "MANUAL_OFF")
+# A Monday; weekday 5 of the same week is the Saturday with WEEKEND_WINDOWS
+MONDAY = datetime.date(2026, 1, 5)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_time(hhmm):
+    return dt.strptime(hhmm, "%H:%M").time()
+
+
+def reference_brightness(windows, alarm_time, alarm_stat, display_override, display_mode, now):
+    """
+    AlarmClock.brightness() with auto dim on, as it was before the compiled tables.
+    """
+    def parse(name):
+        return parse_time(windows[name])
+    if parse("manual_dim_start") <= now.time() <= parse("manual_dim_end"):
+        display_mode = "MANUAL_DIM"
+    elif parse("auto_dim_start") < now.time() <= parse("auto_dim_end"):
+        display_mode = "AUTO_DIM"
+    if alarm_stat == "OFF":
+        if parse("auto_off_start") < now.time() <= parse("auto_off_end"):
+            if display_override == "OFF":
+                display_mode = "AUTO_OFF"
+    elif alarm_stat == "ON":
+        if parse_time("00:01") <= now.time() < alarm_time.time():
+            if display_override == "OFF":
+                display_mode = "AUTO_OFF"
+        if alarm_time.time() <= now.time() < parse("manual_dim_start"):
+            display_mode = "MANUAL_DIM"
+    return display_mode
+
+
+def mismatches(schedule, base, windows, weekday, alarm, alarm_stat, display_override):
+    """
+    Return the (minute, starting mode, expected, looked up) tuples where the schedule differs from the reference.
+
+    Args:
+        schedule (BrightnessSchedule): Schedule built from base.
+        base (dict): Default windows, compiled with the alarm time.
+        windows (dict): Windows the reference uses on that weekday.
+    """
+    alarm_time = dt.strptime(alarm, "%H:%M")
+    schedule.compile(tuple(base[name] for name in WINDOW_NAMES), alarm_time.hour * 60 + alarm_time.minute)
+    day = MONDAY + datetime.timedelta(days=weekday)
+    found = []
+    for minute in range(MINUTES_PER_DAY):
+        # Mid-minute: the tables work at minute resolution (see BrightnessSchedule)
+        now = dt.combine(day, datetime.time(minute // 60, minute % 60, 30))
+        mode = schedule.lookup(minute, weekday, alarm_stat, display_override)
+        for start in STARTING_MODES:
+            expected = reference_brightness(windows, alarm_time, alarm_stat, display_override, start, now)
+            actual = start if mode is None else mode
+            if actual != expected:
+                found.append((minute, start, expected, actual))
+    return found
+
+
+@pytest.mark.parametrize("alarm", ALARM_TIMES)
+@pytest.mark.parametrize("alarm_stat", ("ON", "OFF"))
+@pytest.mark.parametrize("display_override", ("ON", "OFF"))
+def test_default_windows_match_reference(alarm, alarm_stat, display_override):
+    schedule = BrightnessSchedule(DEFAULT_WINDOWS)
+    assert mismatches(schedule, DEFAULT_WINDOWS, DEFAULT_WINDOWS, 0, alarm, alarm_stat, display_override) == []
+
+
+@pytest.mark.parametrize("alarm", ALARM_TIMES)
+@pytest.mark.parametrize("alarm_stat", ("ON", "OFF"))
+@pytest.mark.parametrize("display_override", ("ON", "OFF"))
+def test_weekday_windows_match_reference(alarm, alarm_stat, display_override):
+    schedule = BrightnessSchedule(DEFAULT_WINDOWS)
+    schedule.set_weekday_windows(5, WEEKEND_WINDOWS)
+    weekend = dict(DEFAULT_WINDOWS, **WEEKEND_WINDOWS)
+    assert mismatches(schedule, DEFAULT_WINDOWS, weekend, 5, alarm, alarm_stat, display_override) == []
+    # The other days keep the default windows
+    assert mismatches(schedule, DEFAULT_WINDOWS, DEFAULT_WINDOWS, 4, alarm, alarm_stat, display_override) == []
+
+
+@pytest.mark.parametrize("alarm", ALARM_TIMES)
+@pytest.mark.parametrize("alarm_stat", ("ON", "OFF"))
+def test_debug_windows_match_reference(alarm, alarm_stat):
+    schedule = BrightnessSchedule(DEBUG_WINDOWS)
+    assert mismatches(schedule, DEBUG_WINDOWS, DEBUG_WINDOWS, 0, alarm, alarm_stat, "OFF") == []
+
+
+def test_minutes_to_change_lands_on_a_change():
+    schedule = BrightnessSchedule(DEFAULT_WINDOWS)
+    schedule.compile(tuple(DEFAULT_WINDOWS[name] for name in WINDOW_NAMES), 6 * 60 + 30)
+    for minute in range(MINUTES_PER_DAY):
+        step = schedule.minutes_to_change(minute, 0, "ON", "OFF")
+        mode = schedule.lookup(minute, 0, "ON", "OFF")
+        assert all(schedule.lookup(m, 0, "ON", "OFF") == mode for m in range(minute, minute + step))
+        if minute + step < MINUTES_PER_DAY:
+            assert schedule.lookup(minute + step, 0, "ON", "OFF") != mode
@@ -0,0 +1,22 @@
+# test_startup.py
+# Guards the cold start budget: a fresh process on the simulated hardware must
+# show the time on the numeric display within STARTUP_BUDGET_MS of process start.
+#
+#   python -m pytest test_startup.py
+
+from benchmark import STARTUP_BUDGET_MS, check_startup
+
+
+def test_first_frame_within_budget(tmp_path, monkeypatch):
+    # settings.json and the log are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    summary = check_startup(runs=3)
+    first_frame = summary["milestones"]["first_frame"]
+    assert first_frame < STARTUP_BUDGET_MS, summary
+
+
+def test_corrupt_settings_still_show_the_time(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text('{"manual_dim_level": 3, "alar')
+    summary = check_startup(runs=1)
+    assert summary["milestones"]["first_frame"] < STARTUP_BUDGET_MS, summary
@@ -0,0 +1,64 @@
+# volume_ramp.py
+# Time-based alarm volume ramp for aclock.py.
+# The volume is a function of the time since the alarm started, so the ramp
+# takes the same time however slowly the main loop runs.
+
+import math
+
+RAMP_CURVES = ("linear", "exponential", "stepped")
+# pygame/SDL_mixer applies channel volume in 128 steps
+MIXER_VOLUME_STEPS = 128
+
+
+class VolumeRamp:
+    """
+    VolumeRamp maps the seconds since the alarm started to a volume level in percent.
+
+    Curves:
+        - linear: constant percent per second
+        - exponential: constant ratio per second, which sounds even to the ear
+        - stepped: linear ramp held in a fixed number of equal steps
+    """
+
+    def __init__(self, start, target, duration, curve="linear", steps=10):
+        """
+        Initialize the ramp.
+
+        Args:
+            start (float): Starting volume in percent.
+            target (float): Final volume in percent.
+            duration (float): Seconds to go from start to target.
+            curve (str): One of RAMP_CURVES.
+            steps (int): Number of steps for the stepped curve.
+        """
+        if curve not in RAMP_CURVES:
+            raise ValueError(f"Unknown ramp curve: {curve}")
+        self.start = start
+        self.target = target
+        self.duration = duration
+        self.curve = curve
+        self.steps = max(1, steps)
+
+    def level_at(self, elapsed):
+        """
+        Return the volume in percent at the given number of seconds into the ramp.
+        """
+        if self.duration <= 0 or elapsed >= self.duration:
+            return self.target
+        fraction = max(elapsed, 0.0) / self.duration
+        if self.curve == "stepped":
+            fraction = math.floor(fraction * self.steps) / self.steps
+        elif self.curve == "exponential":
+            # Interpolate in the log domain; 1% floor so a ramp from silence still works
+            low = max(self.start, 1.0)
+            high = max(self.target, 1.0)
+            return low * (high / low) ** fraction
+        return self.start + (self.target - self.start) * fraction
+
+    def mixer_level_at(self, elapsed):
+        """
+        Return the volume at the given time quantized to the mixer's volume steps, as 0.0 to 1.0.
+        Callers only need to touch the mixer when this value changes.
+        """
+        level = min(max(self.level_at(elapsed), 0.0), 100.0) / 100.0
+        return round(level * MIXER_VOLUME_STEPS) / MIXER_VOLUME_STEPS